@@ -0,0 +1,228 @@
+"""Inverted-file (IVF) approximate nearest-neighbour index over corpus segments.
+
+Vectors are clustered with spherical k-means; each vector is filed under its
+nearest centroid. A query scores only the vectors filed under its `nprobe`
+nearest centroids, so `nprobe` trades recall for latency (`nprobe == n_lists`
+is an exact search).
+
+The index stores `(segment, row)` ids, not vectors: candidates are gathered
+from the memory-mapped segment stores. It keeps itself in sync with the
+corpus on `sync`: segments it has not seen are assigned incrementally, and
+segments that were deleted or compacted away are dropped.
+
+On disk (`<corpus>/ann/`): `centroids.npy`, `entries.npz` and `index.json`.
+"""
+import os
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CENTROIDS_FILE = "centroids.npy"
+ENTRIES_FILE = "entries.npz"
+INDEX_META_FILE = "index.json"
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int = 15,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-norm k-means centroids of unit-norm `vectors` (cosine similarity)."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = assign_to_centroids(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters on random points so every list gets used
+            sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+def assign_to_centroids(vectors: np.ndarray, centroids: np.ndarray,
+                        block_rows: int = 65536) -> np.ndarray:
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        out[start:start + block_rows] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    """IVF-Flat index whose ids point into memory-mapped corpus segments."""
+
+    def __init__(self, directory: str, nprobe: int = 8, n_lists: Optional[int] = None,
+                 min_train_size: int = 4096, retrain_growth: float = 8.0, seed: int = 0):
+        self.directory = directory
+        self.nprobe = nprobe
+        self.n_lists = n_lists
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self._lock = threading.RLock()
+
+        self.model_id: Optional[str] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self.segments: List[str] = []  # segment table; entries refer to positions in it
+        self._list = np.empty(0, dtype=np.int32)
+        self._seg = np.empty(0, dtype=np.int32)
+        self._row = np.empty(0, dtype=np.int64)
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.load()
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return int(self._row.shape[0])
+
+    # ----- Persistence -----
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load(self) -> None:
+        try:
+            with open(self._path(INDEX_META_FILE)) as f:
+                meta = json.load(f)
+            centroids = np.load(self._path(CENTROIDS_FILE))
+            entries = np.load(self._path(ENTRIES_FILE))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.model_id = meta["model_id"]
+            self.trained_size = meta["trained_size"]
+            self.segments = meta["segments"]
+            self.centroids = centroids
+            self._list, self._seg, self._row = entries["list"], entries["seg"], entries["row"]
+            self._csr = None
+        logger.info(f"Loaded IVF index: {len(self)} vectors in {centroids.shape[0]} lists")
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            np.save(self._path(CENTROIDS_FILE + ".tmp.npy"), self.centroids)
+            with open(self._path(ENTRIES_FILE + ".tmp.npz"), "wb") as f:
+                np.savez(f, list=self._list, seg=self._seg, row=self._row)
+            meta = {"model_id": self.model_id, "trained_size": self.trained_size,
+                    "segments": self.segments}
+            with open(self._path(INDEX_META_FILE + ".tmp"), "w") as f:
+                json.dump(meta, f)
+        os.replace(self._path(CENTROIDS_FILE + ".tmp.npy"), self._path(CENTROIDS_FILE))
+        os.replace(self._path(ENTRIES_FILE + ".tmp.npz"), self._path(ENTRIES_FILE))
+        os.replace(self._path(INDEX_META_FILE + ".tmp"), self._path(INDEX_META_FILE))
+
+    # ----- Maintenance -----
+    def sync(self, live: Dict[str, int], vectors_for: Callable[[str], np.ndarray],
+             model_id: Optional[str]) -> bool:
+        """Bring the index in line with the `live` segments (id -> row count).
+
+        Returns True if the index changed (and was saved).
+        """
+        with self._lock:
+            total = sum(live.values())
+            if self.model_id != model_id or (
+                    self.is_trained and total > self.trained_size * self.retrain_growth):
+                self._reset(model_id)
+            if not self.is_trained:
+                if total < self.min_train_size:
+                    return False
+                self._train(live, vectors_for)
+
+            changed = False
+            gone = [i for i, seg in enumerate(self.segments) if seg and seg not in live]
+            if gone:
+                keep = ~np.isin(self._seg, gone)
+                self._list, self._seg, self._row = self._list[keep], self._seg[keep], self._row[keep]
+                for i in gone:
+                    self.segments[i] = ""
+                changed = True
+
+            for segment_id in live:
+                if segment_id not in self.segments:
+                    self._insert(segment_id, np.asarray(vectors_for(segment_id)))
+                    changed = True
+
+            if changed:
+                self._csr = None
+                self.save()
+            return changed
+
+    def _reset(self, model_id: Optional[str]) -> None:
+        self.model_id = model_id
+        self.centroids = None
+        self.trained_size = 0
+        self.segments = []
+        self._list = np.empty(0, dtype=np.int32)
+        self._seg = np.empty(0, dtype=np.int32)
+        self._row = np.empty(0, dtype=np.int64)
+        self._csr = None
+
+    def _train(self, live: Dict[str, int], vectors_for: Callable[[str], np.ndarray]) -> None:
+        total = sum(live.values())
+        n_lists = self.n_lists or max(16, int(np.sqrt(total)))
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(total, n_lists * 64)
+        picks = np.sort(rng.choice(total, sample_size, replace=False))
+
+        sample, offset = [], 0
+        for segment_id, count in live.items():
+            local = picks[(picks >= offset) & (picks < offset + count)] - offset
+            if local.size:
+                sample.append(np.asarray(vectors_for(segment_id)[local]))
+            offset += count
+        self.centroids = spherical_kmeans(np.concatenate(sample), n_lists, seed=self.seed)
+        self.trained_size = total
+        logger.info(f"Trained IVF index with {self.centroids.shape[0]} lists on {sample_size} vectors")
+
+    def _insert(self, segment_id: str, vectors: np.ndarray) -> None:
+        seg_idx = len(self.segments)
+        self.segments.append(segment_id)
+        n = vectors.shape[0]
+        self._list = np.concatenate([self._list, assign_to_centroids(vectors, self.centroids)])
+        self._seg = np.concatenate([self._seg, np.full(n, seg_idx, dtype=np.int32)])
+        self._row = np.concatenate([self._row, np.arange(n, dtype=np.int64)])
+
+    # ----- Search -----
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._csr is None:
+            order = np.argsort(self._list, kind="stable")
+            bounds = np.searchsorted(self._list[order], np.arange(self.centroids.shape[0] + 1))
+            self._csr = (order, bounds)
+        return self._csr
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Rows filed under the `nprobe` centroids nearest to `query`, by segment id."""
+        with self._lock:
+            nprobe = min(nprobe or self.nprobe, self.centroids.shape[0])
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            order, bounds = self._inverted_lists()
+            picked = np.concatenate([order[bounds[p]:bounds[p + 1]] for p in probes])
+            segs, rows = self._seg[picked], self._row[picked]
+            return {self.segments[s]: np.sort(rows[segs == s]) for s in np.unique(segs)}
+
+
+def live_segments(corpus, model_id: Optional[str]) -> Dict[str, int]:
+    """Segment id -> row count for the corpus segments embedded with `model_id`."""
+    return {
+        segment["id"]: segment["count"]
+        for segment in corpus.manifest["segments"]
+        if model_id is None or segment.get("model_id") == model_id
+    }
+
+
+def live_mask(rows: np.ndarray, spans: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Which of `rows` fall inside one of the live `[start, end)` spans."""
+    mask = np.zeros(rows.shape[0], dtype=bool)
+    for start, end in spans:
+        mask |= (rows >= start) & (rows < end)
+    return mask
@@ -0,0 +1,217 @@
+"""Structure-aware chunking of extracted document text.
+
+Pages are consumed as a stream and cut into units along the document's own
+structure: headings start a new chunk and become its section title, numbered
+clauses and bullets start a new unit, and units that are still over budget
+are split on sentence boundaries (then words). Units are packed into chunks
+of at most `max_tokens`, with the last `overlap_tokens` carried over when a
+chunk is closed mid-section. Every step is a single forward pass, so
+chunking keeps up with page-parallel extraction.
+
+Each chunk's `metadata` carries `page`/`page_end`, `section`, and
+`char_start`/`char_end` offsets into the newline-joined document text.
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+DEFAULT_MAX_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 32
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+WHITESPACE_RE = re.compile(r"\s")
+COUNT_SLICE_CHARS = 1 << 16
+SENTENCE_RE = re.compile(r".+?(?:[.!?](?=\s+[\"'(\[]?[A-Z0-9])|$)", re.DOTALL)
+
+HEADING_RE = re.compile(
+    r"^(?:(?:SECTION|Section|ARTICLE|Article|PART|Part|APPENDIX|Appendix|EXHIBIT|Exhibit|"
+    r"ATTACHMENT|Attachment|SCHEDULE|Schedule)\s+[\w.\-]+\b.*"
+    r"|\d{1,2}(?:\.\d{1,2})*\.?\s+[A-Z][^.:;]{1,80})$"
+)
+NUMBER_MARKER_RE = re.compile(r"^\d{1,2}(?:\.\d{1,2})*\.?$")
+SEPARATOR_RE = re.compile(r"[ \t]*\n\s*|[ \t\u00a0]{2,}")
+CLAUSE_RE = re.compile(r"^(?:\(?[a-zA-Z0-9]{1,3}[.)]|\d+(?:\.\d+)+\.?|[•●▪*\-])\s+\S")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate model tokens: words plus punctuation marks."""
+    if len(text) <= COUNT_SLICE_CHARS:
+        return len(TOKEN_RE.findall(text))
+    # A whole RFP is counted a slice at a time, cut at whitespace (which no
+    # token spans), so no single regex call holds the GIL for long
+    count, start = 0, 0
+    while start < len(text):
+        space = WHITESPACE_RE.search(text, start + COUNT_SLICE_CHARS)
+        end = space.start() if space else len(text)
+        count += len(TOKEN_RE.findall(text, start, end))
+        start = end
+    return count
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > 100:
+        return False
+    if HEADING_RE.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    # Short all-caps lines such as "SCOPE OF SERVICES"
+    return len(letters) >= 4 and all(c.isupper() for c in letters) and len(line.split()) <= 12
+
+
+class Unit(NamedTuple):
+    text: str
+    start: int   # offset in the joined document text
+    end: int
+    page: int
+    tokens: int
+    is_heading: bool = False
+
+
+def _split_long(unit: Unit, max_tokens: int) -> Iterator[Unit]:
+    """Split an over-budget unit on sentences, and over-budget sentences on words."""
+    for match in SENTENCE_RE.finditer(unit.text):
+        sentence = match.group().strip()
+        if not sentence:
+            continue
+        offset = unit.start + match.start() + (len(match.group()) - len(match.group().lstrip()))
+        tokens = count_tokens(sentence)
+        if tokens <= max_tokens:
+            yield Unit(sentence, offset, offset + len(sentence), unit.page, tokens)
+            continue
+        words = list(re.finditer(r"\S+", sentence))
+        step = max(1, max_tokens // 2)  # words can carry punctuation tokens too
+        for i in range(0, len(words), step):
+            piece = words[i:i + step]
+            start, end = piece[0].start(), piece[-1].end()
+            text = sentence[start:end]
+            yield Unit(text, offset + start, offset + end, unit.page, count_tokens(text))
+
+
+def iter_segments(text: str) -> Iterator[Tuple[int, int, bool]]:
+    """Yield `(start, end, paragraph_break_before)` spans of `text`.
+
+    PDF extraction often flattens a page onto one line and marks layout with
+    runs of spaces, so both newlines and 2+ whitespace characters separate
+    segments; a blank line marks a paragraph break.
+    """
+    pos = 0
+    paragraph_break = False
+    for sep in SEPARATOR_RE.finditer(text):
+        if sep.start() > pos:
+            yield pos, sep.start(), paragraph_break
+        paragraph_break = sep.group().count("\n") >= 2
+        pos = sep.end()
+    if pos < len(text):
+        yield pos, len(text), paragraph_break
+
+
+def iter_units(pages: Iterable[Tuple[int, str]], max_tokens: int) -> Iterator[Tuple[Optional[str], Unit]]:
+    """Yield `(heading, unit)` pairs; `heading` is set when the unit opens a new section."""
+    doc_offset = 0
+    for page_index, (page_number, text) in enumerate(pages):
+        if page_index:
+            doc_offset += 1  # the "\n" that joins pages
+        para: List[int] = []  # [start, end] of the open paragraph within `text`
+        marker: Optional[int] = None  # start of a bare "3." waiting for its title
+
+        def flush() -> Iterator[Unit]:
+            if para:
+                body = text[para[0]:para[1]]
+                unit = Unit(body, doc_offset + para[0], doc_offset + para[1],
+                            page_number, count_tokens(body))
+                para.clear()
+                if unit.tokens > max_tokens:
+                    yield from _split_long(unit, max_tokens)
+                else:
+                    yield unit
+
+        for start, end, paragraph_break in iter_segments(text):
+            segment = text[start:end].strip()
+            start += len(text[start:end]) - len(text[start:end].lstrip())
+            end = start + len(segment)
+
+            if marker is not None:
+                start, segment, marker = marker, text[marker:end], None
+            elif NUMBER_MARKER_RE.match(segment):
+                marker = start
+                continue
+
+            if paragraph_break or is_heading(segment) or CLAUSE_RE.match(segment):
+                for unit in flush():
+                    yield None, unit
+            if is_heading(segment):
+                yield segment[:120], Unit(segment, doc_offset + start, doc_offset + end,
+                                          page_number, count_tokens(segment), True)
+            elif para:
+                para[1] = end
+            else:
+                para.extend([start, end])
+
+        if marker is not None:
+            if para:
+                para[1] = marker + len(text[marker:].rstrip())
+            else:
+                para.extend([marker, marker + len(text[marker:].rstrip())])
+        for unit in flush():
+            yield None, unit
+        doc_offset += len(text)
+
+
+def iter_structured_chunks(pages: Iterable[Tuple[int, str]], source_name: str,
+                           max_tokens: int = DEFAULT_MAX_TOKENS,
+                           overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> Iterator[Dict]:
+    """Chunk a stream of `(page_number, text)` pairs into retrieval chunks."""
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+    section: Optional[str] = None        # latest heading seen
+    chunk_section: Optional[str] = None  # section of the chunk being built
+    current: List[Unit] = []
+    current_tokens = 0
+
+    def emit(units: List[Unit]) -> Dict:
+        return {
+            "page_content": "\n".join(u.text for u in units),
+            "metadata": {
+                "source": source_name,
+                "page": units[0].page,
+                "page_end": units[-1].page,
+                "section": chunk_section,
+                "char_start": units[0].start,
+                "char_end": units[-1].end,
+            },
+        }
+
+    for heading, unit in iter_units(pages, max_tokens):
+        if heading is not None:
+            section = heading
+            # Stack consecutive headings ("3. GENERAL" / "3.1 Questions") into one chunk
+            if not (current and all(u.is_heading for u in current)
+                    and current_tokens + unit.tokens <= max_tokens):
+                if current:
+                    yield emit(current)
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += unit.tokens
+            chunk_section = section
+            continue
+
+        if current and current_tokens + unit.tokens > max_tokens:
+            yield emit(current)
+            # Carry trailing body units (not the heading) into the next chunk
+            carried: List[Unit] = []
+            carried_tokens = 0
+            for prev in reversed(current):
+                if prev.is_heading or carried_tokens + prev.tokens > overlap_tokens:
+                    break
+                carried.insert(0, prev)
+                carried_tokens += prev.tokens
+            if carried_tokens + unit.tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+
+        if not current:
+            chunk_section = section
+        current.append(unit)
+        current_tokens += unit.tokens
+
+    if current:
+        yield emit(current)
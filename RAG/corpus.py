@@ -0,0 +1,438 @@
+"""Persistent multi-document corpus built from append-only segments.
+
+Layout under the corpus directory:
+
+- `segments/<id>/`  one immutable `EmbeddingStore` per appended batch
+- `corpus.json`     manifest listing live segments and, per segment, the row
+                    range `[start, end)` owned by each `source_file`
+
+Appending a document writes a new segment, either in one call (`append`) or
+batch by batch as its chunks are embedded (`segment_writer`); readers see
+the document only once its segment is committed. Deleting a document only drops its
+row range from the manifest; the rows become garbage that `compact` (usually
+run in a background thread) rewrites away by merging sparse or small segments.
+Because every live row belongs to a document range, a search filtered to some
+`source_file`s only touches those ranges.
+
+Import legacy `embeddings*.json` files with:
+    python -m RAG.corpus import data/embeddings.json RAG/data/embeddings.json
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from RAG.store import EmbeddingStore, StoreWriter
+
+logger = logging.getLogger(__name__)
+
+CORPUS_MANIFEST = "corpus.json"
+SEGMENTS_DIR = "segments"
+# Rows copied per step when compaction merges segments
+MERGE_BLOCK_ROWS = 4096
+
+
+def _empty_manifest() -> Dict:
+    return {"version": 1, "next_segment": 1, "segments": []}
+
+
+class Corpus:
+    """A directory of `EmbeddingStore` segments indexed by `source_file`."""
+
+    def __init__(self, directory: str, compact_min_segments: int = 8,
+                 compact_live_ratio: float = 0.7):
+        self.directory = directory
+        self.compact_min_segments = compact_min_segments
+        self.compact_live_ratio = compact_live_ratio
+        self._lock = threading.RLock()
+        self._compaction: Optional[threading.Thread] = None
+        self._manifest: Optional[Dict] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._stores: Dict[str, EmbeddingStore] = {}
+        self._pending: set = set()  # segment ids reserved by a running compaction
+
+    # ----- Manifest -----
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, CORPUS_MANIFEST)
+
+    def _segment_dir(self, segment_id: str) -> str:
+        return os.path.join(self.directory, SEGMENTS_DIR, segment_id)
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._manifest_path())
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def is_stale(self) -> bool:
+        return self._manifest is None or self.signature() != self._signature
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self._manifest_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return _empty_manifest()
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest = manifest
+        self._signature = self.signature()
+
+    def refresh(self) -> None:
+        """Reload the manifest and drop handles to segments that are gone."""
+        with self._lock:
+            self._signature = self.signature()
+            self._manifest = self._load_manifest()
+            live = {segment["id"] for segment in self._manifest["segments"]}
+            self._stores = {k: v for k, v in self._stores.items() if k in live}
+
+    @property
+    def manifest(self) -> Dict:
+        if self.is_stale():
+            self.refresh()
+        return self._manifest
+
+    def store(self, segment_id: str) -> EmbeddingStore:
+        if segment_id not in self._stores:
+            self._stores[segment_id] = EmbeddingStore(self._segment_dir(segment_id))
+        return self._stores[segment_id]
+
+    # ----- Queries -----
+    def documents(self) -> Dict[str, int]:
+        """Live chunk count per `source_file`."""
+        counts: Dict[str, int] = {}
+        for segment in self.manifest["segments"]:
+            for source_file, (start, end) in segment["documents"].items():
+                counts[source_file] = counts.get(source_file, 0) + end - start
+        return counts
+
+    def ranges(self, source_files: Optional[List[str]] = None,
+               model_id: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """Live `(segment_id, start, end)` row ranges, optionally for some documents only.
+
+        With `model_id`, segments embedded by a different backend are skipped.
+        """
+        wanted = set(source_files) if source_files is not None else None
+        result = []
+        for segment in self.manifest["segments"]:
+            if model_id is not None and segment.get("model_id") != model_id:
+                continue
+            docs = segment["documents"]
+            if wanted is None and self._live_rows(segment) == segment["count"]:
+                result.append((segment["id"], 0, segment["count"]))
+                continue
+            for source_file, (start, end) in docs.items():
+                if wanted is None or source_file in wanted:
+                    result.append((segment["id"], start, end))
+        return result
+
+    def __len__(self) -> int:
+        return sum(self.documents().values())
+
+    # ----- Writes -----
+    def append(self, records: List[Dict], vectors, source_file: str,
+               model_id: Optional[str] = None) -> Optional[str]:
+        """Add `source_file` as a new segment, replacing any previous version of it."""
+        writer = self.segment_writer(source_file, model_id)
+        try:
+            writer.add(records, vectors)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def segment_writer(self, source_file: str, model_id: Optional[str] = None) -> "SegmentWriter":
+        """Start a new segment for `source_file`, to be filled batch by batch and then committed."""
+        with self._lock:
+            manifest = self._load_manifest()
+            segment_id = f"seg-{manifest['next_segment']:06d}"
+            manifest["next_segment"] += 1
+            # Reserved like a compaction's output, so orphan cleanup leaves it alone
+            self._pending.add(segment_id)
+            self._save_manifest(manifest)
+        return SegmentWriter(self, segment_id, source_file, model_id)
+
+    def _commit_segment(self, writer: "SegmentWriter") -> Optional[str]:
+        segment_id = writer.segment_id if writer.count else None
+        with self._lock:
+            manifest = self._load_manifest()
+            _, dropped = self._drop_document(manifest, writer.source_file)
+            if segment_id:
+                manifest["segments"].append({
+                    "id": segment_id,
+                    "count": writer.count,
+                    "model_id": writer.model_id,
+                    "documents": {writer.source_file: [0, writer.count]},
+                })
+            self._save_manifest(manifest)
+            self._pending.discard(writer.segment_id)
+
+        self._remove_segments(dropped if segment_id else dropped + [writer.segment_id])
+        self.maybe_compact()
+        return segment_id
+
+    def _abort_segment(self, writer: "SegmentWriter") -> None:
+        with self._lock:
+            self._pending.discard(writer.segment_id)
+        self._remove_segments([writer.segment_id])
+
+    def delete(self, source_file: str) -> int:
+        """Remove `source_file` from the corpus; returns the number of chunks dropped."""
+        with self._lock:
+            manifest = self._load_manifest()
+            removed, dropped = self._drop_document(manifest, source_file)
+            if removed:
+                self._save_manifest(manifest)
+
+        if removed:
+            self._remove_segments(dropped)
+            self.maybe_compact()
+        return removed
+
+    @staticmethod
+    def _drop_document(manifest: Dict, source_file: str) -> Tuple[int, List[str]]:
+        """Unlink `source_file` from `manifest`; returns rows removed and emptied segment ids."""
+        removed = 0
+        for segment in manifest["segments"]:
+            span = segment["documents"].pop(source_file, None)
+            if span:
+                removed += span[1] - span[0]
+        dropped = [s["id"] for s in manifest["segments"] if not s["documents"]]
+        manifest["segments"] = [s for s in manifest["segments"] if s["documents"]]
+        return removed, dropped
+
+    def _remove_segments(self, segment_ids) -> None:
+        # Fails harmlessly while a segment is still mapped on Windows;
+        # `compact` sweeps such orphans up later.
+        for segment_id in segment_ids:
+            shutil.rmtree(self._segment_dir(segment_id), ignore_errors=True)
+
+    # ----- Compaction -----
+    def _live_rows(self, segment: Dict) -> int:
+        return sum(end - start for start, end in segment["documents"].values())
+
+    def _compaction_candidates(self, manifest: Dict) -> List[Dict]:
+        segments = manifest["segments"]
+        candidates = {
+            s["id"]: s for s in segments
+            if self._live_rows(s) < s["count"] * self.compact_live_ratio
+        }
+        if len(segments) >= self.compact_min_segments:
+            # Size-tiered: fold the smallest segments together, leave big ones alone
+            for s in sorted(segments, key=self._live_rows)[:self.compact_min_segments]:
+                candidates[s["id"]] = s
+        if not candidates:
+            return []
+        # Only segments embedded by the same backend can share a matrix
+        model_id = next(iter(candidates.values())).get("model_id")
+        return [s for s in candidates.values() if s.get("model_id") == model_id]
+
+    def _remove_orphans(self, manifest: Dict) -> None:
+        segments_root = os.path.join(self.directory, SEGMENTS_DIR)
+        if not os.path.isdir(segments_root):
+            return
+        live = {segment["id"] for segment in manifest["segments"]} | self._pending
+        self._remove_segments(name for name in os.listdir(segments_root) if name not in live)
+
+    def compact(self) -> Optional[str]:
+        """Merge sparse segments, and the smallest ones once there are many, into one."""
+        with self._lock:
+            manifest = self._load_manifest()
+            # Segments a previous run could not delete (e.g. still mapped on Windows)
+            self._remove_orphans(manifest)
+            candidates = self._compaction_candidates(manifest)
+            if not candidates:
+                return None
+            segment_id = f"seg-{manifest['next_segment']:06d}"
+            manifest["next_segment"] += 1
+            self._pending.add(segment_id)
+            self._save_manifest(manifest)
+
+        try:
+            return self._merge_segments(candidates, segment_id)
+        finally:
+            self._pending.discard(segment_id)
+
+    def _merge_segments(self, candidates: List[Dict], segment_id: str) -> str:
+        # Copy live rows outside the lock; segments are immutable once written.
+        # Rows stream from each segment's mmap into the writer a block at a
+        # time, so compaction never holds more than one block in memory.
+        writer = StoreWriter(self._segment_dir(segment_id))
+        spans: Dict[Tuple[str, str], List[int]] = {}
+        try:
+            for segment in candidates:
+                store = EmbeddingStore(self._segment_dir(segment["id"]))
+                store.open()
+                for source_file, (start, end) in segment["documents"].items():
+                    spans[(segment["id"], source_file)] = [writer.count, writer.count + end - start]
+                    for block in range(start, end, MERGE_BLOCK_ROWS):
+                        rows = range(block, min(block + MERGE_BLOCK_ROWS, end))
+                        writer.add(store.get_many(rows, with_embeddings=False),
+                                   store.vectors[rows.start:rows.stop])
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+
+        with self._lock:
+            # Deletes and re-appends may have landed while we were copying
+            manifest = self._load_manifest()
+            merged_ids = {segment["id"] for segment in candidates}
+            documents = {}
+            for segment in manifest["segments"]:
+                if segment["id"] in merged_ids:
+                    for source_file in segment["documents"]:
+                        documents[source_file] = spans[(segment["id"], source_file)]
+
+            remaining = [s for s in manifest["segments"] if s["id"] not in merged_ids]
+            if documents:
+                remaining.append({"id": segment_id, "count": writer.count,
+                                  "model_id": candidates[0].get("model_id"), "documents": documents})
+            manifest["segments"] = remaining
+            self._save_manifest(manifest)
+
+        self._remove_segments(merged_ids if documents else merged_ids | {segment_id})
+        logger.info(f"Compacted {len(merged_ids)} segment(s) into {segment_id}")
+        return segment_id
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        """Start `compact` on a daemon thread unless one is already running."""
+        with self._lock:
+            if self._compaction and self._compaction.is_alive():
+                return None
+            self._compaction = threading.Thread(target=self._run_compaction, daemon=True)
+            self._compaction.start()
+            return self._compaction
+
+    def _run_compaction(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Corpus compaction failed: {e}")
+
+    def maybe_compact(self) -> Optional[threading.Thread]:
+        if self._compaction_candidates(self._load_manifest()):
+            return self.compact_in_background()
+        return None
+
+
+class SegmentWriter:
+    """One document's new segment, written as its chunks are embedded.
+
+    Batches go in through `add`, or another process (an ingest worker)
+    writes a store into `directory` itself and passes its row count to
+    `commit`. `commit` publishes the segment (replacing any previous version
+    of the document); `abort` throws it away. Until then readers do not see it.
+    """
+
+    def __init__(self, corpus: Corpus, segment_id: str, source_file: str, model_id: Optional[str]):
+        self.corpus = corpus
+        self.segment_id = segment_id
+        self.source_file = source_file
+        self.model_id = model_id
+        self.directory = corpus._segment_dir(segment_id)
+        self._store: Optional[StoreWriter] = None
+        self._written = 0
+
+    @property
+    def count(self) -> int:
+        return self._store.count if self._store is not None else self._written
+
+    def add(self, records: List[Dict], vectors) -> None:
+        if self._store is None:
+            self._store = StoreWriter(self.directory)
+        self._store.add(records, vectors)
+
+    def commit(self, written: Optional[int] = None) -> Optional[str]:
+        """Publish the segment; returns its id, or None if it is empty.
+
+        `written` is the row count of a store written into `directory` elsewhere.
+        """
+        if self._store is not None:
+            self._store.close()
+        elif written:
+            self._written = written
+        return self.corpus._commit_segment(self)
+
+    def abort(self) -> None:
+        if self._store is not None:
+            self._store.abort()
+        self.corpus._abort_segment(self)
+
+
+# ===== Command Line =====
+def import_json_store(json_path: str, corpus: Corpus) -> Dict[str, int]:
+    """Import a legacy `embeddings*.json` list, one document per `source_file`.
+
+    Documents are keyed `<json_path>:<source_file>`: legacy files all carry
+    the same `source_file`, and importing a second file must not replace the
+    first. Re-importing the same path replaces its earlier import.
+    """
+    with open(json_path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{json_path} is not a list of embedding records")
+
+    prefix = os.path.normpath(json_path)
+    by_source: Dict[str, List[Dict]] = {}
+    for item in data:
+        source_file = f"{prefix}:{item.get('source_file', os.path.basename(json_path))}"
+        by_source.setdefault(source_file, []).append(item)
+
+    for source_file, items in by_source.items():
+        records = [{**{k: v for k, v in item.items() if k != "embedding"}, "source_file": source_file}
+                   for item in items]
+        model_id = f"legacy-{len(items[0]['embedding'])}"
+        corpus.append(records, [item["embedding"] for item in items], source_file, model_id)
+    return {source_file: len(items) for source_file, items in by_source.items()}
+
+
+def main(argv=None):
+    # The corpus the server and agents use (RAG_CORPUS_DIR, or DATA_DIR/embeddings)
+    from src.llm_inference.utils.rfp_context import RAG_CORPUS_DIR
+
+    parser = argparse.ArgumentParser(description="Manage the multi-document embedding corpus.")
+    parser.add_argument("--dir", default=RAG_CORPUS_DIR,
+                        help=f"Corpus directory (default: {RAG_CORPUS_DIR}).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_cmd = sub.add_parser("import", help="Import legacy embeddings*.json files.")
+    import_cmd.add_argument("paths", nargs="+")
+    sub.add_parser("list", help="List documents and their chunk counts.")
+    delete_cmd = sub.add_parser("delete", help="Delete a document by source_file.")
+    delete_cmd.add_argument("source_file")
+    sub.add_parser("compact", help="Merge sparse and small segments now.")
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.dir)
+    if args.command == "import":
+        for path in args.paths:
+            try:
+                for source_file, count in import_json_store(path, corpus).items():
+                    print(f"Imported {count} chunks of {source_file} from {path}")
+            except Exception as e:
+                print(f"Error importing {path}: {e}", file=sys.stderr)
+    elif args.command == "list":
+        for source_file, count in sorted(corpus.documents().items()):
+            print(f"{count:>8}  {source_file}")
+    elif args.command == "delete":
+        print(f"Deleted {corpus.delete(args.source_file)} chunks of {args.source_file}")
+    elif args.command == "compact":
+        print(f"Compacted into {corpus.compact() or 'nothing to do'}")
+
+    # Let an append-triggered background compaction finish before exiting
+    if corpus._compaction:
+        corpus._compaction.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Persistent embedding cache keyed by chunk-text hash and embedding model ID.
+
+Re-uploaded RFPs and near-identical amendments share most of their chunks, so
+vectors are looked up by `sha256(text)` before anything is embedded. Entries
+live in a small SQLite database and the least recently used ones are evicted
+once the cache grows past `max_entries`.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+import numpy as np
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Size-bounded LRU cache of float32 embeddings stored in SQLite."""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   model_id  TEXT NOT NULL,
+                   text_hash TEXT NOT NULL,
+                   vector    BLOB NOT NULL,
+                   last_used REAL NOT NULL,
+                   PRIMARY KEY (model_id, text_hash)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, model_id: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for the hashes that are present, touching them."""
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        now = time.time()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model_id = ? AND text_hash IN ({placeholders})",
+                    [model_id, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model_id = ? AND text_hash = ?",
+                [(now, model_id, h) for h in found],
+            )
+            self._conn.commit()
+        return found
+
+    def put_many(self, model_id: str, items: Sequence[Tuple[str, np.ndarray]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model_id, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                [(model_id, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def embed(self, model_id: str, texts: List[str],
+              embed_batch: Callable[[List[str]], np.ndarray]) -> Tuple[List[np.ndarray], Dict[str, int]]:
+        """Embed `texts`, reusing cached vectors; returns vectors and hit/miss counts.
+
+        All misses are embedded together in a single `embed_batch` call.
+        """
+        hashes = [text_hash(t) for t in texts]
+        cached = self.get_many(model_id, hashes)
+
+        missing: Dict[str, str] = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, text)
+        fresh: Dict[str, np.ndarray] = {}
+        if missing:
+            vectors = np.asarray(embed_batch(list(missing.values())), dtype=np.float32)
+            fresh = dict(zip(missing.keys(), vectors))
+            self.put_many(model_id, list(fresh.items()))
+
+        vectors = [cached[h] if h in cached else fresh[h] for h in hashes]
+        hits = sum(1 for h in hashes if h in cached)
+        return vectors, {"cache_hits": hits, "cache_misses": len(hashes) - hits}
@@ -0,0 +1,145 @@
+"""Pluggable local embedding backends.
+
+Every backend embeds a whole batch of texts in one call and returns a float32
+matrix with one row per text. `model_id` identifies the backend together with
+its parameters; it keys the embedding cache and tags corpus segments so that
+vectors from different backends are never compared.
+
+Pick a backend with the `EMBEDDING_BACKEND` environment variable:
+
+- `hashing`               hashed, sublinear term-frequency features (default)
+- `projection`            hashed features reduced by a seeded random projection
+- `sentence-transformers` a small CPU model loaded from `EMBEDDING_MODEL_PATH`
+"""
+import os
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Sequence
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'-][a-z0-9]+)*")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with shall may must not any all such".split()
+)
+
+
+# Tokens whose hashes are kept; bigrams rarely repeat, so a small LRU holds the hits
+TOKEN_HASH_CACHE_SIZE = int(os.getenv("TOKEN_HASH_CACHE_SIZE", "4096"))
+
+
+@lru_cache(maxsize=TOKEN_HASH_CACHE_SIZE)
+def _token_hash(token: str) -> int:
+    # Deterministic across processes, unlike the built-in (salted) hash()
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word unigrams plus adjacent-word bigrams, minus stop words."""
+    words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_counts(texts: Sequence[str], n_features: int) -> np.ndarray:
+    """Signed feature-hashing of `texts` into a dense `(len(texts), n_features)` matrix."""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        hashes = [_token_hash(token) for token in tokenize(text)]
+        rows.extend([i] * len(hashes))
+        cols.extend(hashes)
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    if cols:
+        cols = np.asarray(cols, dtype=np.uint64)
+        signs = np.where(cols & (1 << 31), -1.0, 1.0).astype(np.float32)
+        np.add.at(matrix, (np.asarray(rows), (cols % n_features).astype(np.int64)), signs)
+    # Sublinear tf keeps long boilerplate chunks from dominating
+    return np.sign(matrix) * np.log1p(np.abs(matrix))
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+# ===== Backends =====
+class Embedder:
+    """Base class: subclasses implement `embed_batch`."""
+
+    model_id: str = "base"
+    dim: int = 0
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    """Hashed term-frequency features; no model files, no fitting."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.model_id = f"hashing-tf-{dim}"
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        return _normalize(hashed_counts(texts, self.dim))
+
+
+class RandomProjectionEmbedder(Embedder):
+    """Hashed features in a wide space, reduced by a fixed Gaussian projection."""
+
+    def __init__(self, dim: int = 256, n_features: int = 1 << 14, seed: int = 42):
+        self.dim = dim
+        self.n_features = n_features
+        self.model_id = f"random-projection-{n_features}x{dim}-s{seed}"
+        rng = np.random.default_rng(seed)
+        self._projection = (rng.standard_normal((n_features, dim)) / np.sqrt(dim)).astype(np.float32)
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        return _normalize(hashed_counts(texts, self.n_features) @ self._projection)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """A sentence-transformers model loaded from local files and run on CPU."""
+
+    def __init__(self, model_path: str, batch_size: int = 64):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("The 'sentence-transformers' module is not installed. Please install it using 'pip install sentence-transformers'.")
+
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.batch_size = batch_size
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.model_id = f"sentence-transformers:{os.path.basename(os.path.normpath(model_path))}"
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        vectors = self.model.encode(list(texts), batch_size=self.batch_size,
+                                    convert_to_numpy=True, normalize_embeddings=True)
+        return vectors.astype(np.float32, copy=False)
+
+
+BACKENDS = {
+    "hashing": HashingEmbedder,
+    "projection": RandomProjectionEmbedder,
+    "sentence-transformers": SentenceTransformerEmbedder,
+}
+
+
+def get_embedder(backend: str = None) -> Embedder:
+    """Build the backend named by `backend` or the `EMBEDDING_BACKEND` env var."""
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "hashing")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Use one of: {', '.join(BACKENDS)}")
+    if backend == "sentence-transformers":
+        model_path = os.getenv("EMBEDDING_MODEL_PATH")
+        if not model_path:
+            raise ValueError("EMBEDDING_MODEL_PATH must point to a local sentence-transformers model.")
+        return SentenceTransformerEmbedder(model_path)
+    return BACKENDS[backend]()
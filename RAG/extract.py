@@ -0,0 +1,357 @@
+"""Text extraction for uploaded documents.
+
+Each supported extension has an extractor in `EXTRACTORS`, registered with
+`@register_extractor`, that yields the document as a generator of
+`PageText`s in page order, so downstream chunking and embedding can start as
+soon as the first page is extracted instead of after the last. Each page
+carries its own extraction time.
+
+PDFs are extracted page-range by page-range on a process pool. A `.zip`
+bundle of attachments is unpacked and its files are extracted on the same
+pool, several at a time; their pages come back in bundle order, numbered on
+from the previous file's, each file opening with an "Attachment <name>"
+heading so its chunks keep the file name as their section.
+
+Nothing holds the whole document's text: only a bounded window of page
+ranges (or bundle files) is in flight at once, and `.txt` files are read in
+blocks, so memory grows with the block size rather than the document.
+"""
+import os
+import io
+import time
+import shutil
+import logging
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import PyPDF2
+from PyPDF2.generic import IndirectObject
+from docx import Document  # For handling .docx files
+from docx.table import Table
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+TEXT_BLOCK_CHARS = int(os.getenv("TEXT_BLOCK_CHARS", str(1 << 20)))  # .txt read per block
+# Limits on what a .zip bundle may unpack to
+BUNDLE_MAX_FILES = int(os.getenv("BUNDLE_MAX_FILES", "200"))
+BUNDLE_MAX_BYTES = int(os.getenv("BUNDLE_MAX_BYTES", str(512 << 20)))
+
+_extract_pool: Optional[ProcessPoolExecutor] = None
+
+# extension -> extractor(path, workers) yielding the file's pages in order
+Extractor = Callable[[str, int], Iterator["PageText"]]
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+class PageText(NamedTuple):
+    number: int      # 1-based page number
+    text: str
+    seconds: float   # time spent extracting this page
+
+
+def register_extractor(*extensions: str) -> Callable[[Extractor], Extractor]:
+    """Register the decorated function as the extractor for `extensions` (".pdf", ...)."""
+    def register(fn: Extractor) -> Extractor:
+        for extension in extensions:
+            EXTRACTORS[extension.lower()] = fn
+        return fn
+    return register
+
+
+def get_extractor(filename: str) -> Optional[Extractor]:
+    return EXTRACTORS.get(os.path.splitext(filename)[1].lower())
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    global _extract_pool
+    if _extract_pool is None:
+        _extract_pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS)
+    return _extract_pool
+
+
+def _iter_in_order(fn: Callable, tasks: Iterable[Tuple], workers: int) -> Iterator:
+    """Yield `fn(*task)` for each task in order, computed on the extraction pool.
+
+    Keeps only a couple of tasks per worker in flight, so finished results do
+    not pile up ahead of a slower consumer.
+    """
+    pool = _get_extract_pool()
+    tasks = iter(tasks)
+    futures = deque()
+    try:
+        for task in islice(tasks, workers * 2):
+            futures.append(pool.submit(fn, *task))
+        while futures:
+            result = futures.popleft().result()
+            for task in islice(tasks, 1):
+                futures.append(pool.submit(fn, *task))
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+# Page attributes a page inherits from the /Pages nodes above it
+INHERITABLE_PAGE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+def _iter_page_objects(reader: PyPDF2.PdfReader) -> Iterator[PyPDF2.PageObject]:
+    """Yield the reader's pages in order, walking the page tree as they are asked for.
+
+    `reader.pages` flattens the whole tree on first use and keeps every page
+    for the reader's lifetime; this walk holds only the nodes above the
+    current page, so a page is released once the caller is done with it.
+    """
+    def walk(reference, node, inherited):
+        if node.get("/Type", "/Pages") == "/Pages":
+            inherited = {**inherited, **{k: node[k] for k in INHERITABLE_PAGE_ATTRIBUTES if k in node}}
+            for kid in node["/Kids"]:
+                yield from walk(kid, kid.get_object(), inherited)
+        elif node["/Type"] == "/Page":
+            page = PyPDF2.PageObject(reader, reference if isinstance(reference, IndirectObject) else None)
+            page.update({**inherited, **node})
+            yield page
+
+    pages = reader.trailer["/Root"]["/Pages"]
+    yield from walk(pages, pages.get_object(), {})
+
+
+def _page_count(reader: PyPDF2.PdfReader) -> int:
+    # The page tree root's /Count, so counting does not flatten the tree
+    return int(reader.trailer["/Root"]["/Pages"].get_object()["/Count"])
+
+
+def _iter_reader_pages(reader: PyPDF2.PdfReader, start: int, end: int) -> Iterator[PageText]:
+    for i, page in enumerate(islice(_iter_page_objects(reader), start, end), start):
+        t0 = time.perf_counter()
+        text = page.extract_text() or ""
+        yield PageText(i + 1, text, time.perf_counter() - t0)
+        if (i + 1 - start) % PDF_PAGES_PER_TASK == 0:
+            # The reader caches every object it parses; pages already read are not revisited
+            reader.resolved_objects.clear()
+
+
+def _iter_page_range(path: str, start: int, end: int) -> Iterator[PageText]:
+    # Given a path, PyPDF2 reads the whole file into memory; an open file it reads on demand
+    with open(path, "rb") as f:
+        yield from _iter_reader_pages(PyPDF2.PdfReader(f), start, end)
+
+
+def _extract_page_range(path: str, start: int, end: int) -> List[PageText]:
+    """Worker: extract pages `[start, end)` of the PDF at `path`."""
+    return list(_iter_page_range(path, start, end))
+
+
+def iter_pdf_pages(path: str, workers: int = None,
+                   pages_per_task: int = None) -> Iterator[PageText]:
+    """Yield the pages of the PDF at `path` in order, extracted in parallel."""
+    workers = workers or PDF_EXTRACT_WORKERS
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        page_count = _page_count(reader)
+
+        # Not worth the pool round trip for short documents
+        if workers <= 1 or page_count <= pages_per_task:
+            yield from _iter_reader_pages(reader, 0, page_count)
+            return
+    reader = None
+
+    ranges = ((path, start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task))
+    for pages in _iter_in_order(_extract_page_range, ranges, workers):
+        yield from pages
+
+
+def iter_text_blocks(stream: io.TextIOBase, block_chars: int = None) -> Iterator[str]:
+    """Yield the text of `stream` in blocks that `"\n".join` back into the original.
+
+    Blocks end just before a blank line where there is one (else before a
+    newline), so the chunker never sees a paragraph cut in two.
+    """
+    block_chars = block_chars or TEXT_BLOCK_CHARS
+    buffer = ""
+    while True:
+        data = stream.read(block_chars)
+        if not data:
+            break
+        buffer += data
+        cut = buffer.rfind("\n\n")
+        if cut < 0:
+            cut = buffer.rfind("\n")
+        if cut >= 0:
+            # The newline at `cut` is the one the join puts back
+            yield buffer[:cut]
+            buffer = buffer[cut + 1:]
+    yield buffer
+
+
+# ===== Extractors =====
+@register_extractor(".pdf")
+def extract_pdf(path: str, workers: int) -> Iterator[PageText]:
+    return iter_pdf_pages(path, workers=workers)
+
+
+@register_extractor(".txt")
+def extract_txt(path: str, workers: int) -> Iterator[PageText]:
+    """All page 1, yielded block by block."""
+    # newline="" keeps line endings exactly as uploaded
+    with open(path, "r", encoding="utf-8", newline="") as stream:
+        t0 = time.perf_counter()
+        for block in iter_text_blocks(stream):
+            yield PageText(1, block, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+
+
+def _docx_lines(container) -> Iterator[str]:
+    """Lines of a document body, header, footer or table cell, paragraphs and tables in order."""
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                cells, seen = [], set()
+                for cell in row.cells:
+                    # A merged cell is returned once per grid column it spans
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    cells.append(" ".join(" ".join(_docx_lines(cell)).split()))
+                if any(cells):
+                    yield " | ".join(cells)
+        else:
+            yield block.text
+
+
+@register_extractor(".docx")
+def extract_docx(path: str, workers: int) -> Iterator[PageText]:
+    """All page 1: headers, then the body with its tables (a row per line), then footers."""
+    t0 = time.perf_counter()
+    document = Document(path)
+
+    def margins(kind: str) -> List[str]:
+        lines = []
+        for section in document.sections:
+            for part in (getattr(section, f"first_page_{kind}"), getattr(section, kind),
+                         getattr(section, f"even_page_{kind}")):
+                # A linked header repeats the previous section's
+                if part.is_linked_to_previous:
+                    continue
+                for line in _docx_lines(part):
+                    if line.strip() and line not in lines:
+                        lines.append(line)
+        return lines
+
+    text = "\n".join(margins("header") + list(_docx_lines(document)) + margins("footer"))
+    yield PageText(1, text, time.perf_counter() - t0)
+
+
+def _extract_member(path: str, name: str) -> List[PageText]:
+    """Worker: extract one file of a bundle, within this process."""
+    return list(get_extractor(name)(path, 1))
+
+
+def _unpack_bundle(path: str, directory: str) -> List[Tuple[str, str]]:
+    """Unpack the extractable files of the zip at `path`; returns `(file path, name)` pairs.
+
+    Files go under numbered names, never their archive paths, and the
+    unpacked total is capped at BUNDLE_MAX_BYTES however the archive reports
+    its sizes.
+    """
+    members, total = [], 0
+    with zipfile.ZipFile(path) as bundle:
+        for info in bundle.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            extension = os.path.splitext(name)[1].lower()
+            if extension == ".zip" or get_extractor(name) is None:
+                logger.info(f"Skipping {name} in bundle: unsupported file type")
+                continue
+            if len(members) == BUNDLE_MAX_FILES:
+                raise ValueError(f"Bundle has more than {BUNDLE_MAX_FILES} files")
+            target = os.path.join(directory, f"{len(members):04d}{extension}")
+            with bundle.open(info) as src, open(target, "wb") as dst:
+                while True:
+                    data = src.read(1 << 20)
+                    if not data:
+                        break
+                    total += len(data)
+                    if total > BUNDLE_MAX_BYTES:
+                        raise ValueError(f"Bundle unpacks to more than {BUNDLE_MAX_BYTES} bytes")
+                    dst.write(data)
+            members.append((target, name))
+    return members
+
+
+@register_extractor(".zip")
+def extract_bundle(path: str, workers: int) -> Iterator[PageText]:
+    """The bundle's files in order, extracted `workers` at a time, pages numbered on across files."""
+    directory = tempfile.mkdtemp(prefix="bundle_")
+    try:
+        members = _unpack_bundle(path, directory)
+        if not members:
+            raise ValueError("Bundle holds no .txt, .docx or .pdf files")
+
+        if workers <= 1 or len(members) == 1:
+            # One file keeps its own page-range parallelism
+            results = (get_extractor(name)(member, workers) for member, name in members)
+        else:
+            results = _iter_in_order(_extract_member, members, workers)
+
+        offset = 0
+        for (_, name), pages in zip(members, results):
+            last, heading = 0, f"Attachment {name}"
+            for page in pages:
+                text = page.text
+                if heading and text.strip():
+                    # Opens the file's first section, so its chunks carry the file name
+                    text, heading = f"{heading}\n\n{text}", None
+                last = max(last, page.number)
+                yield PageText(offset + page.number, text, page.seconds)
+            offset += last
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def iter_document_pages(file_data: Union[bytes, str], filename: str) -> Iterator[PageText]:
+    """Yield the text of `file_data` (bytes or a path) page by page.
+
+    Only PDFs have real pages; `.txt` and `.docx` are all page 1, `.txt`
+    yielded block by block. Bundles number their files' pages on in order.
+    """
+    extractor = get_extractor(filename)
+    if extractor is None:
+        raise ValueError(f"Unsupported file format. Use {', '.join(EXTRACTORS)}")
+    started = time.perf_counter()
+    page_count = 0
+
+    tmp_path = None
+    if isinstance(file_data, str):
+        path = file_data
+    else:
+        # Extractors (and pool workers) read files, not pickled bytes
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1], delete=False) as tmp:
+            tmp.write(file_data)
+            tmp_path = path = tmp.name
+    try:
+        for page in extractor(path, PDF_EXTRACT_WORKERS):
+            page_count = max(page_count, page.number)
+            yield page
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    logger.info(f"Extracted {page_count} page(s) from {filename} in {time.perf_counter() - started:.2f}s")
+
+
+def extract_text_from_file(file_data, filename: str) -> str:
+    """Extract text content from different file types."""
+    try:
+        return "\n".join(page.text for page in iter_document_pages(file_data, filename))
+    except Exception as e:
+        print(f"Error extracting text: {e}")
+        return ""
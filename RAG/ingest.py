@@ -0,0 +1,271 @@
+"""Document ingest (extract, chunk, embed, write) and the process pool it runs on.
+
+Parsing, chunking and embedding are CPU-bound. Run in the server process,
+even on a thread, they hold the GIL and stall every other request, health
+checks included. `IngestPool` runs them in worker processes instead. A
+worker writes the document's chunks and vectors straight into the corpus
+segment directory it is handed, and the RFP text into the job's workspace;
+the server publishes the segment once the worker reports back, so the corpus
+manifest still has a single writer.
+
+The pool admits a bounded number of documents (ingesting or waiting to);
+past that `admit` refuses and `/upload` answers 429. `stats` reports how
+busy the workers are.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from RAG import extract
+from RAG.chunker import iter_structured_chunks
+from RAG.embedding_cache import EmbeddingCache
+from RAG.embeddings import Embedder, get_embedder, _token_hash
+from RAG.extract import iter_document_pages
+from RAG.store import StoreWriter
+
+logger = logging.getLogger(__name__)
+
+# ===== Configuration =====
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))  # chunks embedded per call
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+# Worker processes; 0 ingests on a thread of the server process instead
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Documents admitted but not yet ingested; uploads past this get 429
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", str(max(1, INGEST_WORKERS) * 4)))
+# Niceness added to worker processes, so the OS schedules request handling first
+INGEST_WORKER_NICE = int(os.getenv("INGEST_WORKER_NICE", "10"))
+
+
+# ===== Ingest =====
+def iter_user_chunks(pages: Iterable[Tuple[int, str]], source_name: str) -> Iterator[Dict]:
+    """Chunk `(page_number, text)` pairs along headings, clauses and sentences as they arrive."""
+    return iter_structured_chunks(pages, source_name, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+
+
+def embed_chunks(chunks: Iterable[Dict], source_file: str, writer, embedder: Embedder,
+                 cache: EmbeddingCache) -> Dict[str, int]:
+    """Embed `chunks` batch by batch and `writer.add` each batch; returns cache hit/miss counts.
+
+    Only one batch of chunks and vectors is in memory at a time.
+    """
+    cache_stats = {"cache_hits": 0, "cache_misses": 0}
+    chunks = iter(chunks)
+    while True:
+        batch = list(islice(chunks, EMBED_BATCH_SIZE))
+        if not batch:
+            break
+
+        # Only chunks whose text hash is not cached for this model get embedded
+        batch_vectors, batch_stats = cache.embed(
+            embedder.model_id, [chunk["page_content"] for chunk in batch], embedder.embed_batch
+        )
+        for key in cache_stats:
+            cache_stats[key] += batch_stats[key]
+
+        timestamp = datetime.utcnow().isoformat()
+        writer.add([{
+            "text": chunk["page_content"],
+            "metadata": chunk["metadata"],
+            "source_file": source_file,
+            "timestamp": timestamp
+        } for chunk in batch], batch_vectors)
+    return cache_stats
+
+
+def ingest_pages(file_data, filename: str, source_file: str, text_path: str, writer,
+                 embedder: Embedder, cache: EmbeddingCache) -> Dict:
+    """Extract, chunk and embed one document into `writer`; write its text to `text_path`.
+
+    `file_data` is the document's bytes or the path it was spooled to. Pages
+    stream from the extractor into the chunker and embedder, so embedding
+    starts before the last PDF page has been parsed, and each page's text is
+    appended to the RFP text file for the agents as it goes by rather than
+    collected in memory.
+    """
+    page_timings = []
+    page_numbers = set()
+    has_text = False
+
+    def pages(out) -> Iterator[Tuple[int, str]]:
+        nonlocal has_text
+        for index, page in enumerate(iter_document_pages(file_data, filename)):
+            # Same layout json.dump(..., indent=2) gives {"text": ..., "source_file": ...}
+            out.write(("\\n" if index else "") + json.dumps(page.text, ensure_ascii=False)[1:-1])
+            has_text = has_text or bool(page.text)
+            page_numbers.add(page.number)
+            page_timings.append(round(page.seconds, 4))
+            yield page.number, page.text
+
+    started = time.perf_counter()
+    tmp_path = f"{text_path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write('{\n  "text": "')
+            cache_stats = embed_chunks(iter_user_chunks(pages(out), filename), source_file,
+                                       writer, embedder, cache)
+            out.write('",\n  "source_file": ' + json.dumps(source_file, ensure_ascii=False) + "\n}")
+        if not has_text:
+            raise ValueError("Could not extract text from file or file was empty.")
+        os.replace(tmp_path, text_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        # The next document shares few tokens with this one
+        _token_hash.cache_clear()
+
+    return {
+        "chunks": writer.count,
+        "pages": len(page_numbers),
+        "page_seconds": page_timings,
+        "ingest_seconds": round(time.perf_counter() - started, 3),
+        **cache_stats,
+    }
+
+
+# ===== Worker Processes =====
+_worker_embedder: Optional[Embedder] = None
+_worker_cache: Optional[EmbeddingCache] = None
+
+
+def _init_worker(cache_path: str, cache_max_entries: int, workers: int) -> None:
+    global _worker_embedder, _worker_cache
+    if INGEST_WORKER_NICE and hasattr(os, "nice"):
+        os.nice(INGEST_WORKER_NICE)
+    # A forked worker must not reuse the server's extraction pool or SQLite connection
+    extract._extract_pool = None
+    # Split the extraction pool's processes between the ingest workers
+    extract.PDF_EXTRACT_WORKERS = max(1, extract.PDF_EXTRACT_WORKERS // max(1, workers))
+    _worker_embedder = get_embedder()
+    _worker_cache = EmbeddingCache(cache_path, max_entries=cache_max_entries)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+def ingest_in_worker(file_data, filename: str, source_file: str, text_path: str,
+                     segment_dir: str) -> Dict:
+    """Worker: ingest one document, writing its chunks as a store in `segment_dir`."""
+    writer = StoreWriter(segment_dir)
+    try:
+        stats = ingest_pages(file_data, filename, source_file, text_path, writer,
+                             _worker_embedder, _worker_cache)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return stats
+
+
+class IngestPool:
+    """Runs ingest on `workers` processes (or a thread, with 0) and bounds how much is admitted."""
+
+    def __init__(self, cache_path: str, cache_max_entries: int, workers: int = INGEST_WORKERS,
+                 max_pending: int = INGEST_MAX_PENDING):
+        self.workers = max(0, workers)
+        self.max_pending = max(1, max_pending)
+        self._initargs = (cache_path, cache_max_entries, self.workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: Dict[int, float] = {}  # task number -> start time
+        self._tasks = 0
+        self._busy_seconds = 0.0
+        self._durations = deque(maxlen=200)
+        self._created = time.perf_counter()
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers)
+
+    async def start(self) -> None:
+        """Starts the worker processes, so the first upload does not wait for them."""
+        if self.workers and self._executor is None:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor()
+            await asyncio.gather(*[loop.run_in_executor(executor, _worker_ready)
+                                   for _ in range(self.workers)])
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=self._initargs)
+        return self._executor
+
+    # ----- Admission -----
+    def admit(self) -> bool:
+        """Reserves room for one more document; False when the pool is saturated."""
+        if self.admitted >= self.max_pending:
+            self.rejected += 1
+            return False
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        """Gives back an `admit` once its document is ingested (or abandoned)."""
+        self.admitted = max(0, self.admitted - 1)
+
+    def retry_after(self) -> int:
+        """Rough seconds until the pool has room again, for a 429's Retry-After."""
+        mean = sum(self._durations) / len(self._durations) if self._durations else 1.0
+        waiting = max(0, self.admitted - len(self._running))
+        return max(1, round(mean * (waiting // self.capacity + 1)))
+
+    # ----- Running -----
+    async def run(self, fn: Callable, *args) -> Any:
+        """`fn(*args)` on a worker process (a thread with 0 workers), one per worker at a time."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        async with self._slots:
+            task = self._tasks = self._tasks + 1
+            self._running[task] = time.perf_counter()
+            try:
+                if self.workers:
+                    result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+                else:
+                    result = await asyncio.to_thread(fn, *args)
+                self.completed += 1
+                return result
+            except BaseException:
+                self.failed += 1
+                raise
+            finally:
+                seconds = time.perf_counter() - self._running.pop(task)
+                self._busy_seconds += seconds
+                self._durations.append(seconds)
+
+    def stats(self) -> Dict:
+        now = time.perf_counter()
+        busy = self._busy_seconds + sum(now - started for started in self._running.values())
+        durations = sorted(self._durations)
+        return {
+            "mode": "process" if self.workers else "thread",
+            "workers": self.workers,
+            "running": len(self._running),
+            "waiting": max(0, self.admitted - len(self._running)),
+            "admitted": self.admitted,
+            "max_pending": self.max_pending,
+            "saturated": self.admitted >= self.max_pending,
+            "utilization": round(busy / (self.capacity * max(now - self._created, 1e-9)), 3),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "mean_seconds": round(sum(durations) / len(durations), 3) if durations else None,
+            "p95_seconds": round(durations[int(0.95 * (len(durations) - 1))], 3) if durations else None,
+        }
@@ -0,0 +1,158 @@
+"""In-process job queue for the upload -> ingest -> agents pipeline.
+
+`/upload` submits a job and returns its id at once. Worker tasks on the
+server's event loop take jobs off an `asyncio.Queue` and run the pipeline in
+the same warm process, so there is no flag file to poll and no fresh
+interpreter re-importing the Gemini client for every document.
+
+Each job keeps an ordered list of events: status changes, per-stage
+progress, each agent's result as soon as it is saved, and the checklist's
+text as the model streams it. Clients either poll `Job.to_dict()` or follow `JobManager.stream`,
+which yields every event from a given offset and waits for new ones until the
+job finishes.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Jobs run in their own workspaces, so several can be in flight; the LLM gateway
+# still bounds how many model calls they make at once
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "100"))  # finished jobs kept for status queries
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    def __init__(self, filename: str, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.payload = payload
+        self.status = QUEUED
+        self.stage: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict] = []
+        self._changed = asyncio.Event()
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def emit(self, event: str, **data) -> None:
+        """Appends an event and wakes every stream waiting on this job."""
+        self.events.append({"seq": len(self.events), "event": event, "time": time.time(), **data})
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+        self.emit("stage", stage=stage)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "queue_seconds": round((self.started or time.time()) - self.created, 3),
+            "run_seconds": round((self.finished or time.time()) - self.started, 3) if self.started else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs `pipeline(job)` for submitted jobs on `workers` tasks in this process."""
+
+    def __init__(self, pipeline: Callable[[Job], Awaitable[Dict]], workers: int = JOB_WORKERS,
+                 history: int = JOB_HISTORY):
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.history = history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Starts the workers; call from the running event loop (e.g. app startup)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, filename: str, payload: Any) -> Job:
+        if self._queue is None:
+            self.start()
+        job = Job(filename, payload)
+        self.jobs[job.id] = job
+        self._forget_old()
+        job.emit("status", status=QUEUED, position=self._queue.qsize() + 1)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def stream(self, job: Job, offset: int = 0) -> AsyncIterator[Dict]:
+        """Yields the job's events from `offset`, then new ones as they happen, until it finishes."""
+        while True:
+            changed = job._changed
+            while offset < len(job.events):
+                yield job.events[offset]
+                offset += 1
+            if job.terminal:
+                return
+            await changed.wait()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started = time.time()
+            job.emit("status", status=RUNNING)
+            try:
+                job.result = await self.pipeline(job)
+                job.status = DONE
+            except asyncio.CancelledError:
+                # Shutdown: end the job so stream() clients see a terminal status
+                job.error = "cancelled"
+                job.status = FAILED
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job.id} ({job.filename}) failed")
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                job.payload = None
+                job.finished = time.time()
+                job.emit("status", status=job.status, error=job.error)
+                self._queue.task_done()
+            logger.info(f"Job {job.id} {job.status} in {job.finished - job.started:.2f}s "
+                        f"(queued {job.started - job.created:.2f}s)")
+
+    def _forget_old(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.terminal]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
@@ -1,132 +1,269 @@
 import os
-import io
+import sys
 import json
 import asyncio
-from datetime import datetime
-from typing import List, Dict
-import numpy as np
+import uuid
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
 from dotenv import load_dotenv
-from sklearn.metrics.pairwise import cosine_similarity
-import PyPDF2
-from docx import Document  # For handling .docx files
 
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+# Allow `python RAG/main.py` as well as `uvicorn RAG.main:app`
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.corpus import Corpus, SegmentWriter
+from RAG.embedding_cache import EmbeddingCache
+from RAG.embeddings import get_embedder
+from RAG.retriever import LocalRetriever
+from RAG.ann import IVFIndex
+from RAG.extract import get_extractor
+from RAG.ingest import IngestPool, ingest_in_worker, ingest_pages
+from RAG.jobs import Job, JobManager
+from src.llm_inference.utils.workspace import Workspace, prune_workspaces, SHARED_DATA_DIR
+from src.llm_inference.utils.rfp_context import RAG_CORPUS_DIR
+from src.llm_inference.utils.output_cache import OUTPUT_FILES
+
 # Load environment variables
 load_dotenv()
 
 # ===== Configuration =====
-DATA_DIR = os.path.join(os.getcwd(), "data")
+# The same settings the agents read (DATA_DIR, RAG_CORPUS_DIR), wherever the server is started
+DATA_DIR = SHARED_DATA_DIR
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # Use fixed filenames for storage
-STORAGE_PATH = os.path.join(DATA_DIR, "embeddings.json")
+STORAGE_PATH = RAG_CORPUS_DIR  # Corpus directory
 TEXT_STORAGE_PATH = os.path.join(DATA_DIR, "embedding.json")
-FLAG_FILE = "rag_ready.flag"
+EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+# "exact" scores every chunk; "ivf" uses the approximate index under STORAGE_PATH/ann
+RETRIEVER_INDEX = os.getenv("RETRIEVER_INDEX", "exact")
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))  # higher = better recall, slower queries
+# EMBED_BATCH_SIZE, CHUNK_* and INGEST_* are read by RAG.ingest
+# Uploads are copied to disk this many bytes at a time, never read whole
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(DATA_DIR, "uploads"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1 << 20)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(512 << 20)))  # 0 = no limit
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# ===== Embedding Backend =====
+# Selected by EMBEDDING_BACKEND; its model_id keys the cache and tags corpus segments
+embedder = get_embedder()
 
-# ===== Gemini Client =====
-class GeminiClient:
-    def __init__(self):
-        try:
-            import google.generativeai as genai
-        except ImportError:
-            raise ImportError("The 'google-generativeai' module is not installed. Please install it using 'pip install google-generativeai'.")
-        
-        genai.configure(api_key=GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-
-    async def generate_content(self, prompt: str) -> str:
+# ===== Store Embeddings Locally =====
+corpus = Corpus(STORAGE_PATH)
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+
+def publish_segment(writer: SegmentWriter, stats: Dict, written: Optional[int] = None) -> None:
+    """Commit an ingested document's segment (replacing its previous version) and index it."""
+    if not (written or writer.count):
+        # Nothing to file; keep whatever version of the document was there
+        writer.abort()
+        return
+    writer.commit(written)
+    print(f"Stored {stats['chunks']} embeddings for {writer.source_file} in corpus at {STORAGE_PATH} "
+          f"({stats['cache_hits']} cache hits, {stats['cache_misses']} misses)")
+
+    # Incrementally file the new segment into the ANN index, if enabled
+    retriever.sync_index()
+
+# ===== Local Retriever =====
+ann_index = None
+if RETRIEVER_INDEX == "ivf":
+    ann_index = IVFIndex(os.path.join(STORAGE_PATH, "ann"), nprobe=ANN_NPROBE)
+
+retriever = LocalRetriever(corpus, embedder.embed, embedder.model_id, index=ann_index)
+retriever.sync_index()
+
+# ===== Ingest Pipeline =====
+ingest_pool = IngestPool(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+
+def remove_job_documents(workspace: Workspace) -> int:
+    """Drop the documents `workspace`'s job filed in the corpus; returns the chunks removed.
+
+    Blocks on the corpus manifest, so it runs off the event loop, as
+    `prune_workspaces`' `on_remove` on a worker thread.
+    """
+    if not workspace.job_id:
+        return 0
+    prefix = workspace.document_key("")
+    return sum(corpus.delete(source_file) for source_file in list(corpus.documents())
+               if source_file.startswith(prefix))
+
+def ingest_paths(filename: str, workspace: Optional[Workspace]) -> Tuple[str, str]:
+    """The corpus key and RFP text path for `filename` ingested in `workspace`."""
+    # A job's chunks are filed under a key carrying its id, so concurrent
+    # uploads of the same file name do not replace each other in the corpus
+    source_file = workspace.document_key(filename) if workspace else filename
+    return source_file, workspace.rfp_path if workspace else TEXT_STORAGE_PATH
+
+def ingest_document(file_data, filename: str, workspace: Optional[Workspace] = None) -> Dict:
+    """Extract, chunk and embed one document in this process (see `RAG.ingest.ingest_pages`).
+
+    The RFP text for the agents goes to the job's workspace, or to the shared
+    TEXT_STORAGE_PATH without one.
+    """
+    source_file, text_path = ingest_paths(filename, workspace)
+    writer = corpus.segment_writer(source_file, embedder.model_id)
+    try:
+        stats = ingest_pages(file_data, filename, source_file, text_path, writer, embedder, embedding_cache)
+    except BaseException:
+        writer.abort()
+        raise
+    publish_segment(writer, stats)
+    return stats
+
+async def run_ingest(file_data, filename: str, workspace: Optional[Workspace] = None) -> Dict:
+    """`ingest_document`, with the CPU-bound part on the ingest pool's worker processes.
+
+    The worker writes the segment's store; publishing it stays here, so only
+    this process ever writes the corpus manifest.
+    """
+    if not ingest_pool.workers:
+        return await ingest_pool.run(ingest_document, file_data, filename, workspace)
+
+    source_file, text_path = ingest_paths(filename, workspace)
+    writer = await asyncio.to_thread(corpus.segment_writer, source_file, embedder.model_id)
+    try:
+        stats = await ingest_pool.run(ingest_in_worker, file_data, filename, source_file, text_path,
+                                      writer.directory)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    await asyncio.to_thread(publish_segment, writer, stats, stats["chunks"])
+    return stats
+
+# ===== Agent Pipeline =====
+_run_agents = None
+
+def agent_runner():
+    """The agents' `run_agents`, imported once so every job reuses the warm Gemini client."""
+    global _run_agents
+    if _run_agents is None:
+        # The agent runner imports its agents as `evaluation.*`
+        sys.path.append(os.path.join(project_root, "src", "llm_inference"))
         try:
-            response = await self.model.generate_content_async(prompt)
-            return response.text
-        except Exception as e:
-            return f"[Error generating response: {str(e)}]"
-
-# ===== Dummy Embedding Function =====
-def get_dummy_embedding(text):
-    return np.round(np.random.rand(128), 3)
-
-# Initialize Gemini client
-gemini_client = GeminiClient()
-
-# ===== Extract Text from File =====
-def extract_text_from_file(file_data, filename: str) -> str:
-    """Extract text content from different file types."""
-    filename = filename.lower()
-    
+            from src.llm_inference.main import run_agents
+        except SystemExit as e:
+            # The agents exit when their startup data is missing; fail the job, not the worker
+            raise RuntimeError(f"Agents failed to load (exit code {e.code})") from None
+        _run_agents = run_agents
+    return _run_agents
+
+def load_agent_output(workspace: Workspace, agent: str) -> Optional[Dict]:
+    """The output an agent saved in the workspace, or None if it saved none."""
     try:
-        if filename.endswith(".txt"):
-            return file_data.decode("utf-8")
-        elif filename.endswith(".docx"):
-            document = Document(io.BytesIO(file_data))
-            return "\n".join([para.text for para in document.paragraphs])
-        elif filename.endswith(".pdf"):
-            reader = PyPDF2.PdfReader(io.BytesIO(file_data))
-            return "\n".join(page.extract_text() or "" for page in reader.pages)
-        else:
-            raise ValueError("Unsupported file format. Use .txt, .docx, or .pdf")
-    except Exception as e:
-        print(f"Error extracting text: {e}")
-        return ""
+        with open(workspace.path(OUTPUT_FILES[agent]), encoding="utf-8") as f:
+            return json.load(f)
+    except (KeyError, OSError, ValueError):
+        return None
 
-# ===== Universal File Loader =====
-def load_user_file(text_content, source_name: str) -> List[Dict]:
+async def run_pipeline(job: Job) -> Dict:
+    """Ingest the uploaded document, then run the agent DAG on it, all inside the job's workspace."""
     try:
-        chunks = [
-            {
-                "page_content": text_content[i:i + 512],
-                "metadata": {"source": source_name}
-            }
-            for i in range(0, len(text_content), 512)
-        ]
-        return chunks
-    except Exception as e:
-        print(f"Error processing content: {e}")
-        return []
+        # A pruned job's document leaves the corpus with its workspace, so
+        # the corpus holds only the documents of jobs that are still kept
+        await asyncio.to_thread(prune_workspaces, on_remove=remove_job_documents)
+        workspace = Workspace.for_job(job.id).create()
+        job.set_stage("ingest")
+        ingest = await run_ingest(job.payload, job.filename, workspace)
+    finally:
+        # The payload is the upload's spool file; it is not needed once ingested
+        # (or once the job failed before ingest), and its admission slot is freed
+        if isinstance(job.payload, str):
+            remove_spooled(job.payload)
+        job.payload = None
+        ingest_pool.release()
+    job.emit("ingest", chunks=ingest["chunks"], pages=ingest["pages"], seconds=ingest["ingest_seconds"])
 
-# ===== Store Embeddings Locally =====
-def store_embeddings(chunks, filename):
-    rag_data = []
-
-    for chunk in chunks:
-        embedding = get_dummy_embedding(chunk["page_content"])
-        doc = {
-            "text": chunk["page_content"],
-            "embedding": embedding.tolist(),
-            "metadata": chunk["metadata"],
-            "source_file": filename,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        rag_data.append(doc)
-
-    # Store Locally
-    with open(STORAGE_PATH, "w") as f:
-        json.dump(rag_data, f, indent=2)
-    print(f"Stored {len(rag_data)} embeddings locally at {STORAGE_PATH}")
-
-    return rag_data
+    # Each agent's result goes out as soon as it is saved, and the checklist
+    # as it is generated, so the UI shows content long before the run ends
+    def on_agent(agent: str, status: str) -> None:
+        job.emit("agent", agent=agent, status=status)
+        if status == "ok":
+            output = load_agent_output(workspace, agent)
+            if output is not None:
+                job.emit("result", agent=agent, output=output)
 
-# ===== Local Retriever =====
-class LocalRetriever:
-    def retrieve(self, query, top_k=3):
-        query_embed = get_dummy_embedding(query)
+    job.set_stage("agents")
+    run_agents = await asyncio.to_thread(agent_runner)
+    timings = await run_agents(
+        workspace=workspace,
+        on_event=on_agent,
+        on_token=lambda text: job.emit("token", agent="checklist", text=text),
+    )
+    agents = {name: {"status": t.status, "seconds": round(t.seconds, 3), "error": t.error}
+              for name, t in timings.items()}
+    failed = [name for name, t in timings.items() if t.status != "ok"]
+    if failed:
+        raise RuntimeError(f"Agent stage(s) did not complete: {', '.join(failed)}")
+    # The UI fetches these once the job is done; never report done without them
+    missing = [name for name in timings if name in OUTPUT_FILES and load_agent_output(workspace, name) is None]
+    if missing:
+        raise RuntimeError(f"Agent stage(s) saved no output: {', '.join(missing)}")
+    return {"ingest": ingest, "agents": agents}
 
-        with open(STORAGE_PATH) as f:
-            data = json.load(f)
+jobs = JobManager(run_pipeline)
 
-        sim_scores = [
-            cosine_similarity([query_embed], [np.array(item["embedding"])])[0][0]
-            for item in data
-        ]
-        top_indices = np.argsort(sim_scores)[-top_k:][::-1]
-        return [data[i] for i in top_indices]
+# ===== Upload Spooling =====
+class UploadTooLarge(Exception):
+    pass
+
+async def spool_upload(file: UploadFile) -> str:
+    """Copy the upload to a file under UPLOAD_SPOOL_DIR, a chunk at a time; returns its path."""
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    suffix = os.path.splitext(file.filename)[1].lower()
+    path = os.path.join(UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}{suffix}")
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            while True:
+                data = await file.read(UPLOAD_CHUNK_BYTES)
+                if not data:
+                    break
+                size += len(data)
+                if UPLOAD_MAX_BYTES and size > UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge(f"File is larger than {UPLOAD_MAX_BYTES} bytes")
+                out.write(data)
+    except BaseException:
+        remove_spooled(path)
+        raise
+    return path
+
+def remove_spooled(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def clear_spool_dir() -> None:
+    """Remove uploads left behind by jobs that never ran (e.g. the server was stopped)."""
+    if os.path.isdir(UPLOAD_SPOOL_DIR):
+        for entry in os.scandir(UPLOAD_SPOOL_DIR):
+            if entry.is_file():
+                remove_spooled(entry.path)
 
 # ===== FastAPI Application =====
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Jobs do not survive a restart, so neither do their spooled uploads
+    await asyncio.to_thread(clear_spool_dir)
+    # Start the ingest workers before the server has threads of its own to fork
+    await ingest_pool.start()
+    jobs.start()
+    # Import the agents up front so the first job does not pay for it
+    try:
+        await asyncio.to_thread(agent_runner)
+    except Exception as e:
+        print(f"Agents not preloaded: {e}")
+    yield
+    await jobs.stop()
+    ingest_pool.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -141,49 +278,47 @@ app.add_middleware(
 async def upload_file(file: UploadFile = File(...)):
     try:
         # Validate file type
-        if not file.filename.lower().endswith(('.pdf', '.txt', '.docx')):
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Only PDF, TXT, and DOCX files are allowed"}
-            )
-        
-        # Read file content
-        content = await file.read()
-        
-        # Extract text from the file
-        text_content = extract_text_from_file(content, file.filename)
-        
-        if not text_content:
+        if get_extractor(file.filename) is None:
             return JSONResponse(
                 status_code=400,
-                content={"error": "Could not extract text from file or file was empty."}
+                content={"error": "Only PDF, TXT, DOCX, and ZIP files are allowed"}
             )
-        
-        with open(TEXT_STORAGE_PATH, "w", encoding="utf-8") as f:
-            json.dump({"text": text_content}, f, ensure_ascii=False, indent=2)
-
-        # Process the text content into chunks
-        chunks = load_user_file(text_content, "embedding.json")
-        
-        if not chunks:
+
+        # Backpressure: refuse rather than queue without bound while the ingest pool is full
+        if not ingest_pool.admit():
             return JSONResponse(
-                status_code=400,
-                content={"error": "File could not be processed or was empty."}
+                status_code=429,
+                content={"error": "Too many documents waiting to be ingested; try again shortly"},
+                headers={"Retry-After": str(ingest_pool.retry_after())}
             )
-        
-        # Store embeddings
-        store_embeddings(chunks, "embedding.json")
 
-        # Signal to orchestrator that parsing is complete
-        with open(FLAG_FILE, 'w') as f:
-            f.write('ready')
-        print("Successfully Parsed and flag written")
+        # Spool to disk; ingest reads it back page by page
+        try:
+            path = await spool_upload(file)
+        except BaseException as e:
+            ingest_pool.release()
+            if isinstance(e, UploadTooLarge):
+                return JSONResponse(status_code=413, content={"error": str(e)})
+            raise
 
+        # Ingest and the agents run on the job workers; the client follows the job
+        try:
+            job = jobs.submit(file.filename, path)
+        except Exception:
+            remove_spooled(path)
+            ingest_pool.release()
+            raise
         return JSONResponse(
-            status_code=200,
-            content={"message": "File converted to text and processed successfully as embeddings.txt"}
+            status_code=202,
+            content={
+                "message": "File accepted for processing",
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/jobs/{job.id}",
+                "events_url": f"/jobs/{job.id}/events",
+            }
         )
-    
+
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -192,6 +327,59 @@ async def upload_file(file: UploadFile = File(...)):
             content={"error": f"Server error: {str(e)}"}
         )
 
+@app.get("/jobs")
+async def list_jobs():
+    return {"queue_depth": jobs.queue_depth(),
+            "jobs": [job.to_dict() for job in reversed(list(jobs.jobs.values()))]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"No job {job_id}"})
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Server-sent events for one job; reconnecting clients resume after Last-Event-ID.
+
+    Events: `status`, `stage`, `agent` (per-agent status), `result` (an agent's
+    saved output), `token` (a piece of the checklist as it is generated) and a
+    final `end` carrying the job's summary.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"No job {job_id}"})
+    last_event_id = request.headers.get("last-event-id")
+    offset = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    async def events():
+        async for event in jobs.stream(job, offset):
+            yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        yield f"event: end\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/documents")
+async def list_documents():
+    # May reload the manifest from disk, under the lock ingest and compaction also take
+    return {"documents": await asyncio.to_thread(corpus.documents)}
+
+@app.delete("/documents/{source_file}")
+async def delete_document(source_file: str):
+    removed = await asyncio.to_thread(corpus.delete, source_file)
+    if not removed:
+        return JSONResponse(
+            status_code=404,
+            content={"error": f"No document named {source_file} in the corpus"}
+        )
+    return {"message": f"Deleted {removed} chunks of {source_file}"}
+
+@app.get("/metrics")
+async def metrics():
+    return {"ingest": ingest_pool.stats(), "jobs": {"queue_depth": jobs.queue_depth()}}
+
 @app.get("/")
 async def root():
     return {"message": "File Processing API is running"}
@@ -0,0 +1,139 @@
+from typing import Callable, List, Dict, Optional
+import numpy as np
+
+from RAG.store import normalize_rows
+from RAG.corpus import Corpus
+from RAG.ann import IVFIndex, live_segments, live_mask
+
+# Rows scored per matrix-vector product; bounds the working set on huge corpora
+SCORE_BLOCK_ROWS = 65536
+
+
+# ===== Matrix Helpers =====
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the `top_k` highest scores, best first, without a full sort."""
+    n = scores.shape[0]
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k >= n:
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def search_matrix(matrix: np.ndarray, query: np.ndarray, top_k: int,
+                  block_rows: int = SCORE_BLOCK_ROWS):
+    """Exact top-k by dot product over a (possibly memory-mapped) matrix.
+
+    Returns `(indices, scores)` best first. The matrix is scored in row blocks
+    so a memory-mapped corpus larger than RAM is streamed from the page cache.
+    """
+    n = matrix.shape[0]
+    if n <= block_rows:
+        scores = np.asarray(matrix @ query)
+        idx = top_k_indices(scores, top_k)
+        return idx, scores[idx]
+
+    best_idx = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+    for start in range(0, n, block_rows):
+        block_scores = np.asarray(matrix[start:start + block_rows] @ query)
+        local = top_k_indices(block_scores, top_k)
+        best_idx = np.concatenate([best_idx, local + start])
+        best_scores = np.concatenate([best_scores, block_scores[local]])
+        keep = top_k_indices(best_scores, top_k)
+        best_idx, best_scores = best_idx[keep], best_scores[keep]
+    return best_idx, best_scores
+
+
+# ===== Local Retriever =====
+class LocalRetriever:
+    """Cosine-similarity retriever over the local multi-document `Corpus`.
+
+    Stored vectors are unit-normalized float32 rows opened with `np.memmap`,
+    so a query is a matrix-vector product per live row range followed by an
+    `argpartition`, and only the winning records are read from the sidecars.
+    Passing `source_files` restricts scoring to those documents' row ranges,
+    and only segments embedded with `model_id` (when given) are searched.
+
+    With an `IVFIndex`, unfiltered queries only score the vectors in the
+    `nprobe` nearest inverted lists; filtered queries, and corpora too small
+    to train the index, always use the exact search.
+    """
+
+    def __init__(self, corpus: Corpus, embed_fn: Callable[[str], np.ndarray],
+                 model_id: Optional[str] = None, index: Optional[IVFIndex] = None):
+        self.corpus = corpus
+        self.embed_fn = embed_fn
+        self.model_id = model_id
+        self.index = index
+        self._index_signature = None
+
+    def refresh(self) -> None:
+        """Reload the corpus manifest after new segments have been written."""
+        self.corpus.refresh()
+        self.sync_index()
+
+    def sync_index(self) -> None:
+        """Insert new segments into the ANN index and drop removed ones."""
+        if self.index is None or self._index_signature == self.corpus.signature():
+            return
+        live = live_segments(self.corpus, self.model_id)
+        self.index.sync(live, lambda segment_id: self.corpus.store(segment_id).vectors,
+                        self.model_id)
+        self._index_signature = self.corpus.signature()
+
+    def retrieve(self, query, top_k=3, source_files: Optional[List[str]] = None,
+                 nprobe: Optional[int] = None) -> List[Dict]:
+        query_embed = normalize_rows(self.embed_fn(query))[0]
+        try:
+            return self._search(query_embed, top_k, source_files, nprobe)
+        except FileNotFoundError:
+            # A background compaction removed a segment mid-query; retry on the new manifest
+            self.refresh()
+            return self._search(query_embed, top_k, source_files, nprobe)
+
+    def _search(self, query_embed: np.ndarray, top_k: int,
+                source_files: Optional[List[str]], nprobe: Optional[int] = None) -> List[Dict]:
+        if self.index is not None and source_files is None:
+            self.sync_index()
+            if self.index.is_trained:
+                hits = self._ann_hits(query_embed, top_k, nprobe)
+                return self._fetch(hits, top_k)
+        return self._fetch(self._exact_hits(query_embed, top_k, source_files), top_k)
+
+    def _ann_hits(self, query_embed: np.ndarray, top_k: int, nprobe: Optional[int]):
+        spans = {}
+        for segment_id, start, end in self.corpus.ranges(None, self.model_id):
+            spans.setdefault(segment_id, []).append((start, end))
+
+        hits = []  # (score, segment_id, row)
+        for segment_id, rows in self.index.candidates(query_embed, nprobe).items():
+            if segment_id not in spans:
+                continue
+            rows = rows[live_mask(rows, spans[segment_id])]
+            if not rows.size:
+                continue
+            scores = np.asarray(self.corpus.store(segment_id).vectors[rows] @ query_embed)
+            best = top_k_indices(scores, top_k)
+            hits.extend(zip(scores[best].tolist(), [segment_id] * len(best), rows[best].tolist()))
+        return hits
+
+    def _exact_hits(self, query_embed: np.ndarray, top_k: int,
+                    source_files: Optional[List[str]]):
+        hits = []  # (score, segment_id, row)
+        for segment_id, start, end in self.corpus.ranges(source_files, self.model_id):
+            # Segments are immutable, so a mapping stays valid once opened
+            vectors = self.corpus.store(segment_id).vectors
+            idx, scores = search_matrix(vectors[start:end], query_embed, top_k)
+            hits.extend(zip(scores.tolist(), [segment_id] * len(idx), (idx + start).tolist()))
+        return hits
+
+    def _fetch(self, hits, top_k: int) -> List[Dict]:
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        results = []
+        for score, segment_id, row in hits[:top_k]:
+            record = self.corpus.store(segment_id).get_many([row])[0]
+            record["score"] = score
+            results.append(record)
+        return results
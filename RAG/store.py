@@ -0,0 +1,195 @@
+"""Binary, memory-mapped embedding store.
+
+A store is a directory holding:
+
+- `vectors.npy`   contiguous float32 matrix (one unit-normalized row per chunk),
+                  opened with `np.load(mmap_mode="r")` so it is never read into RAM
+- `chunks.jsonl`  compact line-delimited sidecar with the chunk text and metadata
+- `offsets.npy`   int64 byte offset of every line in `chunks.jsonl`
+- `manifest.json` row count and dimension, written last so readers never see a
+                  half-written store
+
+Stores are immutable once written; `RAG.corpus` composes them into segments.
+`StoreWriter` writes one batch at a time, so a large document's vectors and
+records are never all in memory at once.
+"""
+import os
+import json
+import shutil
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "offsets.npy"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def normalize_rows(matrix) -> np.ndarray:
+    """Return a float32 copy of `matrix` with every row scaled to unit length."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _dump_line(record: Dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class StoreWriter:
+    """Writes a store batch by batch; nothing is visible to readers until `close`.
+
+    Rows go to a raw float32 file as they arrive and become `vectors.npy` on
+    close, by writing the .npy header for the final shape and copying the
+    rows after it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.count = 0
+        self.dim: Optional[int] = None
+        self._offsets = array("q")
+        self._position = 0
+        self._chunks = open(self._path(CHUNKS_FILE + ".tmp"), "wb")
+        self._rows = open(self._path(VECTORS_FILE + ".rows.tmp"), "wb")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def add(self, records: List[Dict], vectors) -> None:
+        if not len(records):
+            return
+        vectors = normalize_rows(vectors)
+        if vectors.shape[0] != len(records):
+            raise ValueError(f"Got {len(records)} records but {vectors.shape[0]} vectors")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Got {vectors.shape[1]}-dimensional vectors for a {self.dim}-dimensional store")
+
+        for record in records:
+            line = _dump_line(record)
+            self._offsets.append(self._position)
+            self._position += len(line)
+            self._chunks.write(line)
+        self._rows.write(vectors.tobytes())
+        self.count += len(records)
+
+    def close(self) -> None:
+        """Finish the files and publish them, manifest last."""
+        self._chunks.close()
+        self._rows.close()
+        rows_path = self._path(VECTORS_FILE + ".rows.tmp")
+        with open(self._path(VECTORS_FILE + ".tmp.npy"), "wb") as out:
+            np.lib.format.write_array_header_1_0(out, {
+                "descr": np.lib.format.dtype_to_descr(np.dtype(np.float32)),
+                "fortran_order": False,
+                "shape": (self.count, self.dim or 0),
+            })
+            with open(rows_path, "rb") as rows:
+                shutil.copyfileobj(rows, out, 1 << 20)
+        os.remove(rows_path)
+        np.save(self._path(OFFSETS_FILE + ".tmp.npy"), np.frombuffer(self._offsets, dtype=np.int64))
+
+        os.replace(self._path(VECTORS_FILE + ".tmp.npy"), self._path(VECTORS_FILE))
+        os.replace(self._path(OFFSETS_FILE + ".tmp.npy"), self._path(OFFSETS_FILE))
+        os.replace(self._path(CHUNKS_FILE + ".tmp"), self._path(CHUNKS_FILE))
+
+        manifest = {"version": FORMAT_VERSION, "count": self.count, "dim": self.dim or 0}
+        with open(self._path(MANIFEST_FILE + ".tmp"), "w") as f:
+            json.dump(manifest, f)
+        os.replace(self._path(MANIFEST_FILE + ".tmp"), self._path(MANIFEST_FILE))
+
+    def abort(self) -> None:
+        """Drop whatever was written so far."""
+        self._chunks.close()
+        self._rows.close()
+        for name in (CHUNKS_FILE + ".tmp", VECTORS_FILE + ".rows.tmp"):
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+
+class EmbeddingStore:
+    """A directory of memory-mapped vectors plus a JSONL record sidecar."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._vectors: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # ----- Writing -----
+    def write(self, records: List[Dict], vectors) -> None:
+        """Replace the store contents with `records` and their `vectors`."""
+        writer = StoreWriter(self.directory)
+        try:
+            writer.add(records, vectors)
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+
+    # ----- Reading -----
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """Changes whenever a new corpus is written; None if the store is empty."""
+        try:
+            stat = os.stat(self._path(MANIFEST_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def open(self) -> None:
+        """(Re)map the vectors and offsets of the current corpus."""
+        self._signature = self.signature()
+        # Threads share stores and skip `open` once `_vectors` is set, so the
+        # offsets must be in place before the vectors are
+        if self._signature is None:
+            self._offsets = np.empty(0, dtype=np.int64)
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            return
+        self._offsets = np.load(self._path(OFFSETS_FILE), mmap_mode="r")
+        self._vectors = np.load(self._path(VECTORS_FILE), mmap_mode="r")
+
+    def is_stale(self) -> bool:
+        return self._vectors is None or self.signature() != self._signature
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            self.open()
+        return self._vectors
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def get_many(self, indices: Iterable[int], with_embeddings: bool = True) -> List[Dict]:
+        """Read the records at `indices`, optionally attaching each stored embedding."""
+        vectors = self.vectors
+        results = []
+        with open(self._path(CHUNKS_FILE), "rb") as f:
+            for i in indices:
+                f.seek(int(self._offsets[i]))
+                record = json.loads(f.readline())
+                if with_embeddings:
+                    record["embedding"] = vectors[i].tolist()
+                results.append(record)
+        return results
+
+    def iter_records(self) -> Iterable[Dict]:
+        """Stream every record in order without loading the sidecar at once."""
+        if self.signature() is None:
+            return
+        with open(self._path(CHUNKS_FILE), "rb") as f:
+            for line in f:
+                yield json.loads(line)
@@ -46,8 +46,9 @@ export function Button({
           
           if (response.ok) {
             const result = await response.json();
-            console.log("Upload successful:", result);
-            router.push("/upload");
+            console.log("Upload accepted:", result);
+            // The dashboard follows the job until its outputs are ready
+            router.push(`/upload?job=${result.job_id}`);
           } else {
             const errorData = await response.json();
             console.error("Upload failed:", errorData);
@@ -1,18 +1,112 @@
-import React from "react";
+import React, { useEffect, useRef, useState } from "react";
+
+const FEED_URL = "http://127.0.0.1:8001/tenders";
+const PAGE_SIZE = 20;
+const POLL_MS = 60000;
 
 export default function ExplorePage() {
+  const [items, setItems] = useState([]);
+  const [page, setPage] = useState(1);
+  const [pages, setPages] = useState(0);
+  const [error, setError] = useState(null);
+  const cursor = useRef(0);
+
+  // Load one page of the feed
+  useEffect(() => {
+    fetch(`${FEED_URL}?page=${page}&page_size=${PAGE_SIZE}`)
+      .then((res) => {
+        if (!res.ok) throw new Error("Network response was not ok");
+        return res.json();
+      })
+      .then((feed) => {
+        setItems(feed.items);
+        setPages(feed.pages);
+        cursor.current = feed.cursor;
+        setError(null);
+      })
+      .catch((err) => setError(err.message));
+  }, [page]);
+
+  // While on the first page, only fetch what the watcher added since the last fetch
+  useEffect(() => {
+    if (page !== 1) return;
+    const timer = setInterval(() => {
+      fetch(`${FEED_URL}?since=${cursor.current}&page_size=${PAGE_SIZE}`)
+        .then((res) => (res.ok ? res.json() : null))
+        .then((feed) => {
+          if (!feed) return;
+          cursor.current = feed.cursor;
+          if (feed.items.length) {
+            setItems((current) => {
+              const fresh = new Set(feed.items.map((t) => t.ref_no));
+              return [...feed.items, ...current.filter((t) => !fresh.has(t.ref_no))].slice(0, PAGE_SIZE);
+            });
+          }
+        })
+        .catch(() => {});
+    }, POLL_MS);
+    return () => clearInterval(timer);
+  }, [page]);
+
   return (
     <div className="p-8">
-      <h1 className="text-2xl font-semibold mb-4">Relevant Tenders Report</h1>
-      <a
-        href="/api/relevant-tenders-report"
-        target="_blank"
-        rel="noopener noreferrer"
-        className="bg-blue-600 text-white px-4 py-2 rounded hover:bg-blue-700"
-      >
-        📄 View PDF Report
-      </a>
+      <div className="flex items-center justify-between mb-6">
+        <h1 className="text-2xl font-semibold">Relevant Tenders</h1>
+        <a
+          href="/api/relevant-tenders-report"
+          target="_blank"
+          rel="noopener noreferrer"
+          className="bg-blue-600 text-white px-4 py-2 rounded hover:bg-blue-700"
+        >
+          📄 View PDF Report
+        </a>
+      </div>
+
+      {error && <p className="text-red-500 mb-4">Could not load tenders: {error}</p>}
+      {!error && items.length === 0 && <p className="text-gray-400">No relevant tenders yet.</p>}
+
+      <ul className="space-y-4">
+        {items.map((t) => (
+          <li key={t.ref_no} className="border border-gray-700 rounded p-4">
+            <div className="font-semibold">{t.title}</div>
+            <div className="text-sm text-gray-400">
+              {t.organization} · {t.ref_no} · Due {t.due_date}
+            </div>
+            <div className="text-sm mt-2">
+              Score {t.score ?? "N/A"} — {t.reason}
+            </div>
+            {t.recommendations.length > 0 && (
+              <ul className="list-disc ml-6 mt-2 text-sm">
+                {t.recommendations.map((rec, i) => (
+                  <li key={i}>{rec}</li>
+                ))}
+              </ul>
+            )}
+          </li>
+        ))}
+      </ul>
+
+      {pages > 1 && (
+        <div className="flex items-center gap-4 mt-6">
+          <button
+            disabled={page <= 1}
+            onClick={() => setPage(page - 1)}
+            className="px-3 py-1 rounded border border-gray-600 disabled:opacity-40"
+          >
+            Previous
+          </button>
+          <span className="text-sm">
+            Page {page} of {pages}
+          </span>
+          <button
+            disabled={page >= pages}
+            onClick={() => setPage(page + 1)}
+            className="px-3 py-1 rounded border border-gray-600 disabled:opacity-40"
+          >
+            Next
+          </button>
+        </div>
+      )}
     </div>
   );
 }
-
@@ -1,38 +1,147 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
+import { useRouter } from 'next/router';
 
+const RAG_API = 'http://127.0.0.1:8000';
+const DATA_API = 'http://127.0.0.1:8001';
 
 export default function Home() {
+  const router = useRouter();
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [retryCount, setRetryCount] = useState(0);
+  const [job, setJob] = useState(null);
+  // Agent results and checklist text streamed while the job is still running
+  const [results, setResults] = useState({});
+  const [checklistText, setChecklistText] = useState('');
+  const received = useRef(false);
 
   useEffect(() => {
+    if (!router.isReady) return;
+    const jobId = router.query.job;
+    let cancelled = false;
+    let source = null;
+    let timer = null;
+
     const fetchData = () => {
-      fetch('http://127.0.0.1:8000/data')
+      fetch(jobId ? `${DATA_API}/data?job=${jobId}` : `${DATA_API}/data`)
         .then((res) => {
+          if (jobId && res.status === 404) {
+            // The job finished but saved no checklist; retrying will not change that
+            const missing = new Error('The analysis finished without producing a checklist');
+            missing.final = true;
+            throw missing;
+          }
           if (!res.ok) {
             throw new Error('Network response was not ok');
           }
           return res.json();
         })
         .then((data) => {
+          if (cancelled) return;
           setData(data);
           setLoading(false);
         })
         .catch((error) => {
           console.error('Error fetching data:', error);
+          if (cancelled) return;
+          if (error.final) {
+            setError(error.message);
+            setLoading(false);
+            return;
+          }
           // Instead of showing error immediately, we'll retry
           setRetryCount(prevCount => prevCount + 1);
           // Wait before retrying
-          setTimeout(fetchData, 3000);
+          timer = setTimeout(fetchData, 3000);
         });
     };
 
-    fetchData();
-  }, []);
+    const finish = (status) => {
+      if (status.status === 'done') {
+        // The checklist may already have arrived as a result event
+        if (!received.current) fetchData();
+      } else {
+        setError(status.error || 'Processing failed');
+        setLoading(false);
+      }
+    };
+
+    // Fallback when the event stream is unavailable: poll the job status
+    const poll = () => {
+      fetch(`${RAG_API}/jobs/${jobId}`)
+        .then((res) => res.json())
+        .then((status) => {
+          if (cancelled) return;
+          setJob((current) => ({ ...current, status: status.status, stage: status.stage }));
+          if (status.status === 'done' || status.status === 'failed') finish(status);
+          else timer = setTimeout(poll, 1000);
+        })
+        .catch(() => {
+          if (!cancelled) timer = setTimeout(poll, 2000);
+        });
+    };
 
-  if (loading) return <LoadingState retryCount={retryCount} />;
+    if (!jobId) {
+      fetchData();
+    } else if (typeof EventSource === 'undefined') {
+      poll();
+    } else {
+      source = new EventSource(`${RAG_API}/jobs/${jobId}/events`);
+      source.addEventListener('status', (e) => {
+        const event = JSON.parse(e.data);
+        setJob((current) => ({ ...current, status: event.status }));
+      });
+      source.addEventListener('stage', (e) => {
+        const event = JSON.parse(e.data);
+        setJob((current) => ({ ...current, stage: event.stage }));
+      });
+      source.addEventListener('agent', (e) => {
+        const event = JSON.parse(e.data);
+        setJob((current) => ({
+          ...current,
+          agents: { ...(current?.agents || {}), [event.agent]: event.status },
+        }));
+      });
+      source.addEventListener('result', (e) => {
+        const event = JSON.parse(e.data);
+        if (event.agent === 'checklist') {
+          received.current = true;
+          setData(event.output);
+          setLoading(false);
+        } else {
+          setResults((current) => ({ ...current, [event.agent]: event.output }));
+        }
+      });
+      source.addEventListener('token', (e) => {
+        const event = JSON.parse(e.data);
+        setChecklistText((current) => current + event.text);
+      });
+      source.addEventListener('end', (e) => {
+        source.close();
+        finish(JSON.parse(e.data));
+      });
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) return;
+        source.close();
+        poll();
+      };
+    }
+
+    return () => {
+      cancelled = true;
+      if (source) source.close();
+      if (timer) clearTimeout(timer);
+    };
+  }, [router.isReady, router.query.job]);
+
+  if (loading) {
+    return (
+      <LoadingState retryCount={retryCount} job={job}>
+        <PartialResults results={results} checklistText={checklistText} />
+      </LoadingState>
+    );
+  }
   if (error) return <ErrorState message={error} />;
   if (!data) return <div className="text-center p-8 text-gray-300">No data available</div>;
 
@@ -61,22 +170,85 @@ export default function Home() {
   );
 }
 
-function LoadingState({ retryCount = 0 }) {
+function LoadingState({ retryCount = 0, job = null, children = null }) {
+  const agents = Object.entries(job?.agents || {});
   return (
     <div className="flex items-center justify-center min-h-screen bg-gray-900">
       <div className="text-center">
         <div className="w-16 h-16 border-4 border-indigo-500 border-t-transparent rounded-full animate-spin mx-auto"></div>
-        <p className="mt-4 text-lg text-gray-300 font-medium">Loading dashboard data...</p>
+        <p className="mt-4 text-lg text-gray-300 font-medium">
+          {job?.stage === 'ingest' && 'Reading and indexing your RFP...'}
+          {job?.stage === 'agents' && 'Analysing the RFP...'}
+          {job && !job.stage && (job.status === 'queued' ? 'Waiting in queue...' : 'Starting...')}
+          {!job && 'Loading dashboard data...'}
+        </p>
+        {agents.length > 0 && (
+          <ul className="mt-2 text-sm text-gray-400">
+            {agents.map(([agent, status]) => (
+              <li key={agent}>{agent.replace('_', ' ')}: {status}</li>
+            ))}
+          </ul>
+        )}
         {retryCount > 0 && (
           <p className="mt-2 text-sm text-gray-400">
             Waiting for server to respond... (Attempt {retryCount})
           </p>
         )}
+        {children}
       </div>
     </div>
   );
 }
 
+// Each finished agent stage, shown with the final view's panels while the checklist is written
+const STAGE_VIEWS = {
+  eligibility: (output) => {
+    const requirements = [
+      ...(output.met_requirements || []).map((requirement) => ({ requirement, status: true })),
+      ...(output.unmet_requirements || []).map((requirement) => ({ requirement, status: false })),
+    ];
+    return requirements.length > 0 && <RequirementsPanel requirements={requirements} />;
+  },
+  compliance: (output) => {
+    const risk = output.risk_assessment || {};
+    return (
+      <ComplianceSummary data={{
+        summary: `Overall risk score: ${risk.overall_risk_score ?? 'N/A'}`,
+        major_gaps: (risk.high_risk_items || []).map((item) => `${item.category}: ${item.description}`),
+      }} />
+    );
+  },
+  gap_analysis: (output) => (
+    <ActionPlanPanel actionPlan={(output.gaps || []).map((gap, index) => ({
+      step: index + 1,
+      description: `${gap.requirement}: ${gap.recommendation}`,
+    }))} />
+  ),
+};
+
+function PartialResults({ results, checklistText }) {
+  const agents = Object.entries(results);
+  if (agents.length === 0 && !checklistText) return null;
+  return (
+    <div className="mt-8 max-w-3xl mx-auto text-left space-y-4">
+      {agents.map(([agent, output]) => (
+        <div key={agent}>
+          <h3 className="font-semibold text-gray-200 mb-2">{agent.replace('_', ' ')} result</h3>
+          {STAGE_VIEWS[agent] ? STAGE_VIEWS[agent](output) : (
+            <pre className="text-xs text-gray-400 overflow-x-auto">{JSON.stringify(output, null, 2)}</pre>
+          )}
+        </div>
+      ))}
+      {checklistText && (
+        <div className="bg-gray-800 rounded-lg p-4 border border-gray-700">
+          <h3 className="font-semibold text-gray-200 mb-2">Checklist (generating...)</h3>
+          <pre className="text-xs text-gray-400 whitespace-pre-wrap">{checklistText}</pre>
+        </div>
+      )}
+    </div>
+  );
+}
+
 function ErrorState({ message }) {
   return (
     <div className="flex items-center justify-center min-h-screen bg-gray-900">
@@ -124,28 +296,30 @@ function ComplianceSummary({ data }) {
     <div className="bg-gray-800 shadow-xl rounded-xl p-6 transform transition-all hover:shadow-2xl border border-gray-700">
       <h2 className="text-xl font-semibold text-gray-200 border-b border-gray-700 pb-3 mb-5">Compliance Overview</h2>
       
-      <div className="flex justify-center mb-6">
-        <div className="relative w-36 h-36">
-          <svg className="w-full h-full -rotate-90 transform" viewBox="0 0 36 36">
-            <path 
-              className="stroke-current text-gray-700" 
-              fill="none" 
-              strokeWidth="3.8" 
-              d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"
-            />
-            <path 
-              className={`stroke-current ${statusColor}`}
-              fill="none" 
-              strokeWidth="3.8" 
-              strokeDasharray={`${percentage}, 100`} 
-              d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"
-            />
-          </svg>
-          <div className={`absolute inset-0 flex items-center justify-center text-3xl font-bold ${statusColor} ring-4 ${statusRing} rounded-full`}>
-            {data.compliance_percentage}
+      {!Number.isNaN(percentage) && (
+        <div className="flex justify-center mb-6">
+          <div className="relative w-36 h-36">
+            <svg className="w-full h-full -rotate-90 transform" viewBox="0 0 36 36">
+              <path 
+                className="stroke-current text-gray-700" 
+                fill="none" 
+                strokeWidth="3.8" 
+                d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"
+              />
+              <path 
+                className={`stroke-current ${statusColor}`}
+                fill="none" 
+                strokeWidth="3.8" 
+                strokeDasharray={`${percentage}, 100`} 
+                d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831"
+              />
+            </svg>
+            <div className={`absolute inset-0 flex items-center justify-center text-3xl font-bold ${statusColor} ring-4 ${statusRing} rounded-full`}>
+              {data.compliance_percentage}
+            </div>
           </div>
         </div>
-      </div>
+      )}
       
       <p className="text-gray-300 mb-6 text-center font-medium">{data.summary}</p>
       
@@ -289,12 +463,14 @@ function ActionPlanPanel({ actionPlan }) {
               </div>
               <div className="bg-gray-900 p-4 rounded-lg border border-gray-700 shadow-sm group-hover:shadow-md transition-shadow duration-200">
                 <h3 className="font-medium text-gray-200">{step.description}</h3>
-                <p className="mt-2 text-sm text-gray-400 flex items-center">
-                  <svg className="w-4 h-4 mr-1.5 text-indigo-400" fill="none" stroke="currentColor" viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">
-                    <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"></path>
-                  </svg>
-                  {step.timeline}
-                </p>
+                {step.timeline && (
+                  <p className="mt-2 text-sm text-gray-400 flex items-center">
+                    <svg className="w-4 h-4 mr-1.5 text-indigo-400" fill="none" stroke="currentColor" viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">
+                      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z"></path>
+                    </svg>
+                    {step.timeline}
+                  </p>
+                )}
               </div>
             </div>
           ))}
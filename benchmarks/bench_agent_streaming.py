@@ -0,0 +1,201 @@
+"""Time to first content over the job event stream, against a local fake streaming LLM.
+
+The RAG server runs under uvicorn with the Gemini gateway pointed at a local
+fake API (REST transport). The fake answers each agent's `generateContent`
+call after `--latency` seconds. It answers the checklist's
+`streamGenerateContent` call piece by piece, so the checklist takes about
+`--pieces * --piece-delay` seconds to generate. One RFP is uploaded and
+`/jobs/{id}/events` is read as a client would.
+
+Before streaming, the UI showed nothing until the job's `end` event and a
+`/data` fetch. Now it can render the first agent's `result` event, then the
+checklist's `token` events as they arrive. The run fails unless the streamed
+tokens add up to the checklist the fake generated, and the checklist
+`result` matches it.
+
+Usage:
+    python benchmarks/bench_agent_streaming.py [--latency 0.5] [--pieces 40] [--piece-delay 0.05]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import warnings
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+SECTIONS = ("Eligibility criteria", "Mandatory certifications", "Scope of work", "Deliverables",
+            "Timeline and milestones", "Contract terms", "Submission requirements")
+
+
+def agent_answer(prompt: str) -> dict:
+    if "compliance risks" in prompt:
+        return {"risk_assessment": {"overall_risk_score": 4, "high_risk_items": [],
+                                    "medium_risk_items": ["Liquidated damages"], "low_risk_items": []}}
+    if "**gaps**" in prompt:
+        return {"summary": "One certification gap", "gaps": ["ISO 27001 certificate"]}
+    return {"eligible": True, "reasons": ["Meets the turnover threshold"], "recommendations": []}
+
+
+class FakeStreamingGemini(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float, checklist: str, pieces: int, piece_delay: float):
+        super().__init__(("127.0.0.1", 0), FakeStreamingGeminiHandler)
+        self.latency = latency
+        self.piece_delay = piece_delay
+        size = -(-len(checklist) // pieces)
+        self.pieces = [checklist[i:i + size] for i in range(0, len(checklist), size)]
+
+
+class FakeStreamingGeminiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = request["contents"][0]["parts"][0]["text"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        if ":streamGenerateContent" in self.path:
+            # A JSON array written one candidate at a time, as the real API streams it
+            self.wfile.write(b"[")
+            for index, piece in enumerate(server.pieces):
+                time.sleep(server.piece_delay)
+                self.wfile.write((b"," if index else b"") + json.dumps(
+                    {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}).encode())
+                self.wfile.flush()
+            self.wfile.write(b"]")
+            return
+        time.sleep(server.latency)
+        text = json.dumps(agent_answer(prompt))
+        self.wfile.write(json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": text}]},
+                                                     "finishReason": "STOP"}]}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_rfp(words_per_section: int = 150) -> str:
+    filler = ("The contractor shall provide qualified personnel, documented processes and timely "
+              "reports to the contracting officer as described in this solicitation. ")
+    repeat = words_per_section // len(filler.split()) + 1
+    return "\n\n".join(f"{number}. {title}\n{filler * repeat}" for number, title in enumerate(SECTIONS, 1))
+
+
+def read_events(base_url: str, job_id: str, started: float):
+    """Reads the job's SSE stream to the end; returns (arrival seconds, event name, data) tuples."""
+    import httpx
+
+    events, name, data = [], None, []
+    with httpx.stream("GET", f"{base_url}/jobs/{job_id}/events", timeout=120) as response:
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                name = line[len("event: "):]
+            elif line.startswith("data: "):
+                data.append(line[len("data: "):])
+            elif not line and name:
+                events.append((time.perf_counter() - started, name, json.loads("\n".join(data))))
+                name, data = None, []
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake latency of each agent's call.")
+    parser.add_argument("--pieces", type=int, default=40, help="Pieces the checklist is streamed in.")
+    parser.add_argument("--piece-delay", type=float, default=0.05, help="Seconds between pieces.")
+    args = parser.parse_args()
+
+    with open(os.path.join(project_root, "data", "checklist_output.json"), encoding="utf-8") as f:
+        checklist = json.dumps(json.load(f), indent=2)
+
+    workdir = tempfile.mkdtemp(prefix="bench_streaming_")
+    os.environ["JOB_WORKSPACE_DIR"] = os.path.join(workdir, "jobs")
+    os.environ["RAG_CORPUS_DIR"] = os.path.join(workdir, "data", "embeddings")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_response_cache.sqlite3")
+    os.environ["DATA_DIR"] = os.path.join(workdir, "data")  # the RAG server's corpus, caches and spool
+    logging.disable(logging.WARNING)
+    fake = FakeStreamingGemini(args.latency, checklist, args.pieces, args.piece_delay)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    server = None
+    try:
+        import httpx
+        import uvicorn
+        from src.llm_inference.utils import gemini
+        from src.llm_inference.utils.response_cache import ResponseCache
+
+        import RAG.main as rag
+
+        # genai's settings are global and RAG.main configures them on import, so
+        # point them at the fake afterwards; the agents are imported later, by
+        # the server's startup, and bind this client
+        gemini.gemini_client = gemini.GeminiClient(
+            transport="rest", api_endpoint=f"http://127.0.0.1:{fake.server_port}",
+            requests_per_minute=0, response_cache=ResponseCache(os.environ["LLM_CACHE_PATH"]),
+            cache_bypass=True)
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(rag.app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        base_url = f"http://127.0.0.1:{port}"
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            upload = httpx.post(f"{base_url}/upload",
+                                files={"file": ("rfp.txt", build_rfp().encode(), "text/plain")})
+            events = read_events(base_url, upload.json()["job_id"], started)
+
+        first = {}
+        for seconds, name, data in events:
+            key = f"{name}:{data.get('agent')}" if name in ("result", "token") else name
+            first.setdefault(key, seconds)
+            first.setdefault(name, seconds)
+        tokens = [data["text"] for _, name, data in events if name == "token"]
+        results = {data["agent"]: data["output"] for _, name, data in events if name == "result"}
+        end = events[-1][2] if events and events[-1][1] == "end" else {}
+
+        print(f"agents answer after {args.latency:.2f}s; checklist streams in {len(fake.pieces)} pieces "
+              f"every {args.piece_delay:.2f}s")
+        for label, key in (("first agent result", "result"), ("first checklist token", "token"),
+                           ("checklist result", "result:checklist"), ("job end", "end")):
+            print(f"  {label:<22} {first.get(key, float('nan')):6.2f}s")
+        if "result" in first and "end" in first:
+            print(f"time to first content: {first['end']:.2f}s -> {first['result']:.2f}s "
+                  f"({first['end'] / first['result']:.1f}x sooner)")
+
+        ok = (end.get("status") == "done" and "".join(tokens) == checklist
+              and results.get("checklist") == json.loads(checklist)
+              and {"eligibility", "compliance", "gap_analysis"} <= set(results))
+        print(f"tokens: {len(tokens)} | streamed checklist matches: {'yes' if ok else 'NO'}")
+    finally:
+        if server is not None:
+            server.should_exit = True
+        fake.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare the IVF index with exact search: recall@k and latency per nprobe.
+
+Usage:
+    python benchmarks/bench_ann.py [--chunks 200000] [--dim 128] [--nprobe 1 4 8 16 32]
+
+Vectors are drawn from a Gaussian mixture so that, like real chunk
+embeddings, they have cluster structure for the index to exploit.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.corpus import Corpus
+from RAG.ann import IVFIndex
+from RAG.retriever import LocalRetriever
+
+
+def clustered_vectors(rng, topics, n, spread):
+    picks = rng.integers(0, topics.shape[0], n)
+    return topics[picks] + spread * rng.standard_normal((n, topics.shape[1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--segments", type=int, default=8, help="Documents appended one by one.")
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--topics", type=int, default=1024, help="Mixture components.")
+    parser.add_argument("--spread", type=float, default=0.8, help="Within-topic noise scale.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((args.topics, args.dim))
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Corpus(os.path.join(tmp, "corpus"), compact_min_segments=args.segments + 1)
+        per_segment = args.chunks // args.segments
+        for s in range(args.segments):
+            records = [{"text": f"doc{s}-{i}", "metadata": {}} for i in range(per_segment)]
+            corpus.append(records, clustered_vectors(rng, topics, per_segment, args.spread), f"doc{s}.pdf")
+
+        queries = clustered_vectors(rng, topics, args.queries, args.spread)
+        exact = LocalRetriever(corpus, lambda q: q)
+
+        start = time.perf_counter()
+        index = IVFIndex(os.path.join(tmp, "corpus", "ann"))
+        ann = LocalRetriever(corpus, lambda q: q, index=index)
+        ann.sync_index()
+        build_s = time.perf_counter() - start
+        print(f"{len(corpus)} chunks, dim {args.dim}: built {index.centroids.shape[0]} lists "
+              f"in {build_s:.2f}s\n")
+
+        start = time.perf_counter()
+        truth = [{r["text"] for r in exact.retrieve(q, args.top_k)} for q in queries]
+        exact_ms = (time.perf_counter() - start) / len(queries) * 1e3
+        print(f"{'search':<12} {'recall@' + str(args.top_k):>10} {'ms/query':>9} {'speedup':>8}")
+        print(f"{'exact':<12} {1.0:>10.3f} {exact_ms:>9.2f} {1.0:>7.1f}x")
+
+        for nprobe in args.nprobe:
+            start = time.perf_counter()
+            found = [{r["text"] for r in ann.retrieve(q, args.top_k, nprobe=nprobe)} for q in queries]
+            ann_ms = (time.perf_counter() - start) / len(queries) * 1e3
+            recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+            print(f"{'ivf/' + str(nprobe):<12} {recall:>10.3f} {ann_ms:>9.2f} {exact_ms / ann_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Extraction throughput on a zip bundle of RFP attachments: one file at a time vs the worker pool.
+
+The bundle mixes synthetic PDFs, DOCX files (requirement tables, headers and
+footers) and plain-text notes, like a government RFP package. It is
+extracted with `--workers` processes; with 1, its files are extracted one
+after another in this process, as uploads were before bundles. The run
+reports time to first page (when chunking can start), total time, and files,
+pages and zipped MB extracted per second. It fails unless every worker count
+yields the same pages, and every table cell, header and footer marker shows
+up in the text; it also counts how many of those markers the previous
+paragraphs-only DOCX extraction kept.
+
+Usage:
+    python benchmarks/bench_bundle_extraction.py [--files 24] [--pages 40] [--workers 1,2,4]
+"""
+import os
+import sys
+import time
+import zipfile
+import argparse
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_extraction import write_synthetic_pdf
+from RAG import extract
+from RAG.extract import iter_document_pages, _get_extract_pool
+
+
+def write_docx(path: str, index: int, rows: int) -> list:
+    """A DOCX with a header, footer and requirement table; returns the markers it holds."""
+    from docx import Document
+
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = f"Tender HDR-{index:03d}"
+    document.sections[0].footer.paragraphs[0].text = f"Confidential FTR-{index:03d}"
+    document.add_paragraph(f"{index}. Eligibility Criteria")
+    document.add_paragraph("Bidders shall meet every requirement in the table below.")
+    table = document.add_table(rows=rows + 1, cols=3)
+    for col, title in enumerate(("Requirement", "Threshold", "Evidence")):
+        table.cell(0, col).text = title
+    markers = [f"HDR-{index:03d}", f"FTR-{index:03d}"]
+    for row in range(1, rows + 1):
+        marker = f"TBL-{index:03d}-{row:03d}"
+        table.cell(row, 0).text = f"Requirement {marker}"
+        table.cell(row, 1).text = f"At least {row * 5} crore average annual turnover"
+        table.cell(row, 2).text = "Audited balance sheets for the last three financial years"
+        markers.append(marker)
+    document.save(path)
+    return markers
+
+
+def write_bundle(path: str, workdir: str, files: int, pages: int) -> list:
+    """Writes `files` attachments (PDF, DOCX, TXT in turn) into the zip at `path`."""
+    markers = []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for index in range(files):
+            kind = ("pdf", "docx", "txt")[index % 3]
+            member = os.path.join(workdir, f"attachment-{index:03d}.{kind}")
+            if kind == "pdf":
+                write_synthetic_pdf(member, pages)
+            elif kind == "docx":
+                markers += write_docx(member, index, pages)
+            else:
+                with open(member, "w", encoding="utf-8") as f:
+                    f.write("\n\n".join(f"{n}. Clarification {index}-{n}\nBidders may ask questions "
+                                        "in writing before the pre-bid meeting." for n in range(1, pages + 1)))
+            bundle.write(member, f"rfp/annexures/{os.path.basename(member)}")
+            os.remove(member)
+    return markers
+
+
+def paragraphs_only(path: str) -> str:
+    """The bundle's DOCX text as the previous extractor read it: body paragraphs only."""
+    import io
+    from docx import Document
+
+    with zipfile.ZipFile(path) as bundle:
+        return "\n".join(para.text for name in bundle.namelist() if name.endswith(".docx")
+                         for para in Document(io.BytesIO(bundle.read(name))).paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--pages", type=int, default=40, help="Pages per PDF, table rows per DOCX.")
+    parser.add_argument("--workers", default="1,2,4", help="Extraction worker counts to compare.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bundle.zip")
+        markers = write_bundle(path, workdir, args.files, args.pages)
+        size = os.path.getsize(path) / 2**20
+        before = paragraphs_only(path)
+        print(f"{args.files}-file bundle ({size:.1f} MB zipped), {os.cpu_count()} CPU(s); "
+              f"paragraphs-only DOCX extraction kept {sum(m in before for m in markers)}/{len(markers)} "
+              f"table/header/footer markers\n")
+        print(f"{'workers':>7}{'first page s':>14}{'total s':>9}{'files/s':>9}{'pages/s':>9}{'MB/s':>7}  same")
+
+        expected = None
+        failed = False
+        for workers in (int(x) for x in args.workers.split(",")):
+            extract.PDF_EXTRACT_WORKERS = workers
+            if workers > 1:
+                # The server keeps its pool alive; don't charge process start-up to the run
+                extract._extract_pool = None
+                list(_get_extract_pool().map(abs, range(workers)))
+
+            started = time.perf_counter()
+            first = None
+            pages = []
+            for page in iter_document_pages(path, "bundle.zip"):
+                if first is None:
+                    first = time.perf_counter() - started
+                pages.append((page.number, page.text))
+            total = time.perf_counter() - started
+
+            text = "\n".join(text for _, text in pages)
+            if expected is None:
+                expected = pages
+            same = (pages == expected and all(marker in text for marker in markers)
+                    and text.count("Attachment rfp/annexures/") == args.files)
+            print(f"{workers:>7}{first:>14.3f}{total:>9.2f}{args.files / total:>9.1f}"
+                  f"{len(pages) / total:>9.1f}{size / total:>7.2f}  {'yes' if same else 'NO'}")
+            failed = failed or not same
+            if extract._extract_pool is not None:
+                extract._extract_pool.shutdown()
+                extract._extract_pool = None
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure structure-aware chunking throughput on RAG/data/RFP.txt.
+
+Usage:
+    python benchmarks/bench_chunker.py [--file RAG/data/RFP.txt] [--repeat 50]
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.chunker import iter_structured_chunks, count_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=os.path.join(project_root, "RAG", "data", "RFP.txt"))
+    parser.add_argument("--repeat", type=int, default=50, help="Copies of the document, as pages.")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8") as f:
+        text = f.read()
+    pages = [(i + 1, text) for i in range(args.repeat)]
+    size_mb = len(text) * args.repeat / 1e6
+
+    start = time.perf_counter()
+    chunks = list(iter_structured_chunks(pages, os.path.basename(args.file),
+                                         args.max_tokens, args.overlap_tokens))
+    elapsed = time.perf_counter() - start
+
+    tokens = [count_tokens(c["page_content"]) for c in chunks]
+    sections = Counter(c["metadata"]["section"] for c in chunks[:len(chunks) // args.repeat])
+    print(f"{args.repeat} x {args.file} ({size_mb:.1f} MB of text)")
+    print(f"{len(chunks)} chunks in {elapsed:.2f}s: {len(chunks) / elapsed:.0f} chunks/s, "
+          f"{size_mb / elapsed:.1f} MB/s")
+    print(f"tokens per chunk: mean {sum(tokens) / len(tokens):.0f}, max {max(tokens)} "
+          f"(budget {args.max_tokens})")
+    print(f"{len(sections)} distinct sections per copy, e.g. {', '.join(map(str, list(sections)[:4]))}")
+
+
+if __name__ == "__main__":
+    main()
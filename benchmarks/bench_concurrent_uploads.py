@@ -0,0 +1,202 @@
+"""Concurrent uploads: 20 RFPs through /upload at once, each in its own job workspace.
+
+Every upload is named `rfp.txt`, and each carries its own marker (`RFP-0007`)
+in every section. A stub model answers each agent with the markers it finds
+in its prompt, so a prompt built from another job's RFP, or from another
+job's agent output, shows up as a foreign marker in the saved outputs. The
+run fails unless every job finishes, every workspace holds only its own
+marker, the corpus keeps all uploads apart, and `/data?job=<id>` serves each
+job's own checklist.
+
+All state (corpus, job workspaces, caches) lives in a temporary directory.
+
+Usage:
+    python benchmarks/bench_concurrent_uploads.py [--uploads 20] [--workers 1,4] [--latency 0.3]
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+import warnings
+import contextlib
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+MARKER_RE = re.compile(r"RFP-\d{4}")
+OUTPUTS = ("eligibility_output.json", "compliance_output.json", "gap_analysis_output.json",
+           "checklist_output.json")
+SECTIONS = ("Eligibility criteria", "Mandatory certifications", "Scope of work", "Deliverables",
+            "Timeline and milestones", "Contract terms", "Liability and indemnification",
+            "Submission requirements")
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Answers each agent's prompt in the shape its parser expects, echoing the RFP markers it saw."""
+
+    latency = 0.3
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        await asyncio.sleep(self.latency)
+        markers = sorted(set(MARKER_RE.findall(prompt)))
+        if "generate a checklist" in prompt:
+            body = {"checklist": [{"item": "Reviewed", "markers": markers}]}
+        elif "compliance risks" in prompt:
+            body = {"risk_assessment": {"overall_risk_score": 3, "high_risk_items": [],
+                                        "medium_risk_items": [], "low_risk_items": markers}}
+        elif "**gaps**" in prompt:
+            body = {"summary": "No gaps", "markers": markers}
+        else:
+            body = {"eligible": True, "reasons": markers, "recommendations": []}
+        response = StubResponse(json.dumps(body))
+        if not stream:
+            return response
+
+        async def pieces():
+            yield response
+        return pieces()
+
+
+def build_rfp(index: int, words_per_section: int) -> str:
+    marker = f"RFP-{index:04d}"
+    filler = ("The contractor shall provide qualified personnel, documented processes and timely "
+              "reports to the contracting officer as described in this solicitation. ")
+    repeat = words_per_section // len(filler.split()) + 1
+    return "\n\n".join(f"{number}. {title}\n{title} for solicitation {marker}. {filler * repeat}"
+                       for number, title in enumerate(SECTIONS, 1))
+
+
+async def run_uploads(rag, uploads: int, workers: int, words_per_section: int):
+    import httpx
+    from RAG.jobs import JobManager
+
+    rag.jobs = JobManager(rag.run_pipeline, workers=workers)
+    transport = httpx.ASGITransport(app=rag.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://rag", timeout=300) as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/upload", files={"file": ("rfp.txt", build_rfp(i, words_per_section).encode(),
+                                                   "text/plain")})
+            for i in range(uploads)
+        ])
+        accepted = time.perf_counter() - started
+        job_ids = [response.json()["job_id"] for response in responses]
+
+        statuses = {}
+        while len(statuses) < len(job_ids):
+            for index, job_id in enumerate(job_ids):
+                if index not in statuses:
+                    status = (await client.get(f"/jobs/{job_id}")).json()
+                    if status["status"] in ("done", "failed"):
+                        statuses[index] = status
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+    await rag.jobs.stop()
+    return job_ids, statuses, accepted, elapsed
+
+
+def check_isolation(rag, data_client, job_ids, statuses) -> list:
+    from src.llm_inference.utils.workspace import Workspace
+
+    problems = []
+    documents = rag.corpus.documents()
+    for index, job_id in enumerate(job_ids):
+        marker = f"RFP-{index:04d}"
+        status = statuses[index]
+        if status["status"] != "done":
+            problems.append(f"job {index} {status['status']}: {status['error']}")
+            continue
+        workspace = Workspace.for_job(job_id)
+        with open(workspace.rfp_path, encoding="utf-8") as f:
+            rfp = json.load(f)
+        if rfp["source_file"] != workspace.document_key("rfp.txt") or rfp["source_file"] not in documents:
+            problems.append(f"job {index}: RFP not filed under its own corpus key")
+        if set(MARKER_RE.findall(rfp["text"])) != {marker}:
+            problems.append(f"job {index}: workspace holds another job's RFP text")
+        for name in OUTPUTS:
+            with open(workspace.path(name), encoding="utf-8") as f:
+                seen = set(MARKER_RE.findall(f.read()))
+            if seen != {marker}:
+                problems.append(f"job {index}: {name} saw {sorted(seen)}, expected [{marker}]")
+        served = data_client.get(f"/data?job={job_id}")
+        if served.status_code != 200 or set(MARKER_RE.findall(served.text)) != {marker}:
+            problems.append(f"job {index}: /data?job= did not serve its own checklist")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--workers", default="1,4", help="Job worker counts to compare.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub model latency in seconds.")
+    parser.add_argument("--words-per-section", type=int, default=800,
+                        help="RFP size; the default puts each RFP over the agents' context budgets.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_uploads_")
+    os.environ["JOB_WORKSPACE_DIR"] = os.path.join(workdir, "jobs")
+    os.environ["RAG_CORPUS_DIR"] = os.path.join(workdir, "data", "embeddings")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_response_cache.sqlite3")
+    os.environ["TENDER_STATE_PATH"] = os.path.join(workdir, "tender_state.sqlite3")
+    # Every upload is sent at once; admit them all rather than answering 429
+    os.environ["INGEST_MAX_PENDING"] = str(args.uploads)
+    os.environ["DATA_DIR"] = os.path.join(workdir, "data")  # the RAG server's corpus, caches and spool
+    logging.disable(logging.WARNING)
+
+    try:
+        # The agents bind the shared client at import, so swap it in first
+        from src.llm_inference.utils import gemini
+        from src.llm_inference.utils.response_cache import ResponseCache
+        StubModel.latency = args.latency
+        gemini.gemini_client = gemini.GeminiClient(
+            model_factory=StubModel, requests_per_minute=1e6, rate_limits={}, burst=1000,
+            initial_concurrency=64, max_concurrency=64,
+            response_cache=ResponseCache(os.environ["LLM_CACHE_PATH"]), cache_bypass=True)
+
+        from fastapi.testclient import TestClient
+        import RAG.main as rag
+        import data.main as data_api
+        data_client = TestClient(data_api.app)
+
+        print(f"{args.uploads} uploads of rfp.txt, stub model latency {args.latency:.2f}s")
+        print(f"{'workers':>8}{'accept s':>10}{'total s':>9}{'jobs/s':>8}{'p50 job s':>11}{'p95 job s':>11}"
+              f"  isolated")
+        failed = False
+        for workers in (int(x) for x in args.workers.split(",")):
+            # The agents and /data print their results; keep the table readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                job_ids, statuses, accepted, elapsed = asyncio.run(
+                    run_uploads(rag, args.uploads, workers, args.words_per_section))
+                problems = check_isolation(rag, data_client, job_ids, statuses)
+            runs = sorted(s["run_seconds"] or 0.0 for s in statuses.values())
+            p95 = runs[min(len(runs) - 1, int(0.95 * len(runs)))]
+            print(f"{workers:>8}{accepted:>10.3f}{elapsed:>9.2f}{args.uploads / elapsed:>8.2f}"
+                  f"{runs[len(runs) // 2]:>11.2f}{p95:>11.2f}  {'yes' if not problems else 'NO'}")
+            for problem in problems[:10]:
+                print(f"    {problem}")
+            failed = failed or bool(problems)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
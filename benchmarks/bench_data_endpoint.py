@@ -0,0 +1,133 @@
+"""Load test for the data API's /data endpoint: read-per-request vs the output cache.
+
+The "before" app is the previous handler, which stats, opens and parses
+`checklist_output.json` on every request and lets FastAPI re-serialize the
+result. The "after" app is `data/main.py`, which serves cached response
+bytes while the file's mtime is unchanged. Its conditional requests, sent
+with the ETag of the last response, get 304 with no body. Requests go
+through an in-process ASGI transport, so the numbers are server-side cost
+without network overhead.
+
+The checklist is the repo's `data/checklist_output.json`; `--scale` repeats
+its lists to mimic larger RFPs. The run also checks that both apps serve the
+same JSON, and that rewriting the file changes the ETag.
+
+Usage:
+    python benchmarks/bench_data_endpoint.py [--requests 2000] [--concurrency 16] [--scale 1,20]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import warnings
+import contextlib
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+JOB_ID = "bench"
+
+
+def build_checklist(scale: int) -> dict:
+    with open(os.path.join(project_root, "data", "checklist_output.json"), encoding="utf-8") as f:
+        checklist = json.load(f)
+    return {key: value * scale if isinstance(value, list) else value for key, value in checklist.items()}
+
+
+def baseline_app(filepath: str):
+    """The /data handler as it was: stat, open and parse the file on every request."""
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/data")
+    async def get_data():
+        print(f"Reading file: {filepath} (last modified: {time.ctime(os.path.getmtime(filepath))})")
+        with open(filepath, "r") as f:
+            data = json.load(f)
+        return data
+
+    return app
+
+
+async def load(app, url: str, requests: int, concurrency: int, conditional: bool = False):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://data") as client:
+        first = await client.get(url)
+        headers = {"If-None-Match": first.headers["etag"]} if conditional else {}
+        statuses = {}
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(url, headers=headers)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return requests / (time.perf_counter() - started), statuses, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scale", default="1,20", help="How many times to repeat the checklist's lists.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_data_")
+    os.environ["JOB_WORKSPACE_DIR"] = os.path.join(workdir, "jobs")
+    os.environ["TENDER_STATE_PATH"] = os.path.join(workdir, "tender_state.sqlite3")
+    failed = False
+    try:
+        import data.main as data_api
+        from src.llm_inference.utils.workspace import Workspace
+
+        workspace = Workspace.for_job(JOB_ID).create()
+        filepath = workspace.path("checklist_output.json")
+        url = f"/data?job={JOB_ID}"
+
+        print(f"{args.requests} requests, {args.concurrency} concurrent")
+        print(f"{'scale':>6}{'KB':>8}{'before req/s':>14}{'after req/s':>13}{'304 req/s':>11}{'speedup':>9}  same")
+        for scale in (int(x) for x in args.scale.split(",")):
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(build_checklist(scale), f, indent=2, ensure_ascii=False)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                before, _, expected = asyncio.run(load(baseline_app(filepath), "/data", args.requests,
+                                                       args.concurrency))
+            after, statuses, actual = asyncio.run(load(data_api.app, url, args.requests, args.concurrency))
+            revalidated, conditional, _ = asyncio.run(load(data_api.app, url, args.requests,
+                                                           args.concurrency, conditional=True))
+            same = (actual.json() == expected.json() and statuses == {200: args.requests}
+                    and conditional == {304: args.requests})
+            print(f"{scale:>6}{os.path.getsize(filepath) / 1024:>8.0f}{before:>14.0f}{after:>13.0f}"
+                  f"{revalidated:>11.0f}{after / before:>8.1f}x  {'yes' if same else 'NO'}")
+            failed = failed or not same
+
+        # A rewrite must be picked up on the next request, with a new ETag
+        etag = asyncio.run(load(data_api.app, url, 1, 1))[2].headers["etag"]
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump({"requirements_checklist": []}, f)
+        fresh = asyncio.run(load(data_api.app, url, 1, 1))[2]
+        reloaded = fresh.headers["etag"] != etag and fresh.json() == {"requirements_checklist": []}
+        print(f"rewrite picked up: {'yes' if reloaded else 'NO'} | cache {data_api.outputs.stats()}")
+        failed = failed or not reloaded
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Measure embedding throughput (chunks/sec) for each local backend.
+
+Usage:
+    python benchmarks/bench_embeddings.py [--file RAG/data/RFP.txt] [--repeat 20]
+    EMBEDDING_MODEL_PATH=/models/all-MiniLM-L6-v2 python benchmarks/bench_embeddings.py
+"""
+import os
+import sys
+import time
+import argparse
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.embeddings import BACKENDS, get_embedder, _token_hash
+
+
+def load_chunks(path, size=512):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=os.path.join(project_root, "RAG", "data", "RFP.txt"))
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the document to embed.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.file) * args.repeat
+    print(f"{len(chunks)} chunks of up to 512 characters from {args.file}\n")
+    print(f"{'backend':<24} {'dim':>5} {'batch s':>8} {'chunks/s':>10} {'query ms':>9}")
+
+    for name in args.backends:
+        try:
+            embedder = get_embedder(name)
+        except (ImportError, ValueError) as e:
+            print(f"{name:<24} skipped: {e}")
+            continue
+
+        embedder.embed_batch(chunks[:8])  # warm-up
+        _token_hash.cache_clear()
+        start = time.perf_counter()
+        embedder.embed_batch(chunks)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for chunk in chunks[:50]:
+            embedder.embed(chunk[:80])
+        query_ms = (time.perf_counter() - start) / 50 * 1e3
+
+        print(f"{name:<24} {embedder.dim:>5} {elapsed:>8.3f} {len(chunks) / elapsed:>10.0f} {query_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
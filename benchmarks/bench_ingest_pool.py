@@ -0,0 +1,192 @@
+"""Health and status latency while 10 uploads are ingesting: ingest thread vs ingest processes.
+
+The RAG server runs under uvicorn in its own process, with the agents pointed
+at a local fake LLM that answers at once, so ingest is the only heavy work.
+`--uploads` synthetic PDFs are posted together. While they are in flight the
+client polls `/` (health) and `/metrics` (status) every `--interval` seconds,
+and the run reports their latency percentiles. Polling stops when the last
+document is ingested.
+
+With INGEST_WORKERS=0 ingest runs on a thread of the server process, as it
+did before the pool, and holds the GIL against every request. With worker
+processes the server process only routes requests, publishes segments and
+runs the agents. On a single CPU the workers add no capacity, only a lower
+scheduling priority (INGEST_WORKER_NICE), so expect the gap to widen with
+cores.
+Each run also sends one extra upload while the pool is full, which must get
+429 with a Retry-After header, and fails unless every admitted job finishes.
+
+Usage:
+    python benchmarks/bench_ingest_pool.py [--uploads 10] [--pages 200] [--workers 0,2]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import warnings
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from bench_pdf_extraction import write_synthetic_pdf
+from bench_agent_streaming import FakeStreamingGemini
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float("nan")
+
+
+def start_server(workdir: str, workers: int, max_pending: int, llm_endpoint: str):
+    port = free_port()
+    env = dict(os.environ,
+               PYTHONPATH=project_root,
+               INGEST_WORKERS=str(workers),
+               INGEST_MAX_PENDING=str(max_pending),
+               DATA_DIR=os.path.join(workdir, "data"),
+               JOB_WORKSPACE_DIR=os.path.join(workdir, "jobs"),
+               RAG_CORPUS_DIR=os.path.join(workdir, "data", "embeddings"),
+               LLM_CACHE_PATH=os.path.join(workdir, "llm_response_cache.sqlite3"),
+               LLM_CACHE_BYPASS="1",
+               LLM_TRANSPORT="rest",
+               LLM_API_ENDPOINT=llm_endpoint,
+               LLM_REQUESTS_PER_MINUTE="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "RAG.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def wait_ready(client, server, timeout: float = 120) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def run(base_url: str, server, pdf: bytes, uploads: int, interval: float):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        await wait_ready(client, server)
+        latencies = {"/": [], "/metrics": []}
+        ingested = asyncio.Event()
+
+        async def poll():
+            while not ingested.is_set():
+                for path in latencies:
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    latencies[path].append(time.perf_counter() - started)
+                    if path == "/metrics":
+                        stats = response.json()["ingest"]
+                        if stats["completed"] + stats["failed"] >= uploads:
+                            ingested.set()
+                await asyncio.sleep(interval)
+
+        poller = asyncio.create_task(poll())
+        started = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/upload", files={"file": (f"rfp-{i}.pdf", pdf, "application/pdf")})
+            for i in range(uploads)
+        ])
+        # The pool now holds `uploads` documents, its limit; one more must be refused
+        extra = await client.post("/upload", files={"file": ("extra.pdf", pdf, "application/pdf")})
+        await poller
+        ingest_seconds = time.perf_counter() - started
+
+        job_ids = [response.json().get("job_id") for response in responses]
+        statuses = {}
+        while len(statuses) < len(job_ids):
+            for job_id in job_ids:
+                if job_id and job_id not in statuses:
+                    status = (await client.get(f"/jobs/{job_id}")).json()
+                    if status["status"] in ("done", "failed"):
+                        statuses[job_id] = status
+            if None in job_ids:
+                break
+            await asyncio.sleep(0.1)
+        stats = (await client.get("/metrics")).json()["ingest"]
+    return latencies, ingest_seconds, responses, extra, statuses, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=200, help="Pages per synthetic PDF.")
+    parser.add_argument("--workers", default="0,2", help="INGEST_WORKERS values to compare.")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between health polls.")
+    args = parser.parse_args()
+
+    fake = FakeStreamingGemini(0.0, json.dumps({"requirements_checklist": []}), 1, 0.0)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    llm_endpoint = f"http://127.0.0.1:{fake.server_port}"
+
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_pool_")
+    pdf_path = os.path.join(workdir, "rfp.pdf")
+    write_synthetic_pdf(pdf_path, args.pages)
+    with open(pdf_path, "rb") as f:
+        pdf = f.read()
+
+    print(f"{args.uploads} uploads of a {args.pages}-page PDF ({len(pdf) / 2**20:.1f} MB), "
+          f"{os.cpu_count()} CPU(s)")
+    print(f"{'workers':>8}{'ingest s':>10}{'/ p50 ms':>10}{'/ p99 ms':>10}{'/ max ms':>10}"
+          f"{'/metrics p99 ms':>17}{'util':>6}  429  done")
+    failed = False
+    try:
+        for workers in (int(x) for x in args.workers.split(",")):
+            run_dir = os.path.join(workdir, f"workers-{workers}")
+            os.makedirs(run_dir)
+            server, base_url = start_server(run_dir, workers, args.uploads, llm_endpoint)
+            try:
+                latencies, seconds, responses, extra, statuses, stats = asyncio.run(
+                    run(base_url, server, pdf, args.uploads, args.interval))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+            health = [x * 1000 for x in latencies["/"]]
+            status = [x * 1000 for x in latencies["/metrics"]]
+            refused = extra.status_code == 429 and "retry-after" in extra.headers
+            done = (all(r.status_code == 202 for r in responses) and len(statuses) == args.uploads
+                    and all(s["status"] == "done" for s in statuses.values()))
+            print(f"{workers:>8}{seconds:>10.2f}{percentile(health, 0.5):>10.1f}"
+                  f"{percentile(health, 0.99):>10.1f}{max(health):>10.1f}{percentile(status, 0.99):>17.1f}"
+                  f"{stats['utilization']:>6.2f}  {'yes' if refused else 'NO':>3}  {'yes' if done else 'NO'}")
+            for job in [s for s in statuses.values() if s["status"] != "done"][:5]:
+                print(f"    job {job['job_id']} {job['status']}: {job['error']}")
+            failed = failed or not (refused and done)
+    finally:
+        fake.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
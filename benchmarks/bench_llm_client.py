@@ -0,0 +1,81 @@
+"""Check that agents sharing the GeminiClient overlap instead of blocking each other.
+
+Two stub "agents" call the shared client at the same time against a slow local
+stub model, once with a blocking model (offloaded to the client's thread pool)
+and once with a native async one. If the calls blocked the event loop, the
+wall time would be the sum of the latencies; overlapping calls take about the
+latency of one. The run exits non-zero if either kind of model serialized.
+
+Usage:
+    python benchmarks/bench_llm_client.py [--latency 0.5] [--agents 2]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.llm_inference.utils.gemini import GeminiClient
+
+
+class BlockingStubModel:
+    """Only has the blocking `generate_content`, like the calls the agents used to make."""
+
+    def __init__(self, model_name: str, latency: float):
+        self.model_name = model_name
+        self.latency = latency
+
+    def generate_content(self, prompt: str):
+        time.sleep(self.latency)
+        return SimpleNamespace(text=f'{{"model": "{self.model_name}"}}')
+
+
+class AsyncStubModel(BlockingStubModel):
+    async def generate_content_async(self, prompt: str):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(text=f'{{"model": "{self.model_name}"}}')
+
+
+async def run_agents(client: GeminiClient, agents: int):
+    spans = []
+    loop_start = time.perf_counter()
+
+    async def agent(i: int):
+        start = time.perf_counter() - loop_start
+        await client.generate_content(f"prompt {i}", f"stub-model-{i % 2}")
+        spans.append((start, time.perf_counter() - loop_start))
+
+    await asyncio.gather(*(agent(i) for i in range(agents)))
+    return time.perf_counter() - loop_start, spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--agents", type=int, default=2)
+    args = parser.parse_args()
+    if args.agents < 2:
+        parser.error("--agents must be at least 2 for the calls to overlap")
+
+    failed = False
+    for label, model_cls in (("blocking model, thread offload", BlockingStubModel),
+                             ("native async model", AsyncStubModel)):
+        client = GeminiClient("stub-model-0",
+                              model_factory=lambda name: model_cls(name, args.latency))
+        wall, spans = asyncio.run(run_agents(client, args.agents))
+        overlapped = max(start for start, _ in spans) < min(end for _, end in spans)
+        parallel = overlapped and wall < args.agents * args.latency
+        print(f"{label}: {args.agents} agents x {args.latency:.2f}s in {wall:.2f}s "
+              f"(serial would be {args.agents * args.latency:.2f}s) -> "
+              f"{'ran in parallel' if parallel else 'SERIALIZED'}")
+        failed = failed or not parallel
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
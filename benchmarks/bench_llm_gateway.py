@@ -0,0 +1,126 @@
+"""Exercise the LLM gateway against a local fake Gemini REST endpoint.
+
+The fake server answers `generateContent` after a fixed latency, returns 429
+when more than `--capacity` requests are in flight and a 503 for a fraction
+of requests. The same burst of prompts is sent through an unthrottled client
+(no retries, unbounded concurrency) and through the gateway (token bucket,
+AIMD concurrency, jittered retries), and the outcomes are compared.
+
+Usage:
+    python benchmarks/bench_llm_gateway.py [--requests 40] [--capacity 4] [--error-rate 0.05]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from src.llm_inference.utils.gemini import GeminiClient
+
+
+class FakeGemini(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, latency: float, capacity: int, error_rate: float):
+        super().__init__(("127.0.0.1", 0), FakeGeminiHandler)
+        self.latency = latency
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.in_flight = 0
+        self.counts = {200: 0, 429: 0, 503: 0}
+        self.lock = threading.Lock()
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.in_flight += 1
+            overloaded = server.in_flight > server.capacity
+        try:
+            if overloaded:
+                self._reply(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                            "status": "RESOURCE_EXHAUSTED"}})
+                return
+            time.sleep(server.latency)
+            if random.random() < server.error_rate:
+                self._reply(503, {"error": {"code": 503, "message": "The model is overloaded",
+                                            "status": "UNAVAILABLE"}})
+                return
+            self._reply(200, {"candidates": [{"content": {"role": "model", "parts": [{"text": "{}"}]},
+                                              "finishReason": "STOP"}]})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _reply(self, status: int, payload: dict):
+        with self.server.lock:
+            self.server.counts[status] += 1
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def burst(client: GeminiClient, n: int, model: str):
+    results = await asyncio.gather(
+        *(client.generate_content(f"prompt {i}", model) for i in range(n)), return_exceptions=True
+    )
+    return sum(1 for r in results if not isinstance(r, Exception))
+
+
+def run(label: str, server: FakeGemini, args, **client_kwargs):
+    server.counts = {200: 0, 429: 0, 503: 0}
+    client = GeminiClient("fake-model", transport="rest",
+                          api_endpoint=f"http://127.0.0.1:{server.server_port}",
+                          max_threads=args.requests, **client_kwargs)
+    start = time.perf_counter()
+    ok = asyncio.run(burst(client, args.requests, "fake-model"))
+    elapsed = time.perf_counter() - start
+    metrics = client.metrics()["fake-model"]
+    print(f"{label}: {ok}/{args.requests} succeeded in {elapsed:.2f}s | server saw "
+          f"{server.counts[200]} ok, {server.counts[429]} x 429, {server.counts[503]} x 503 | "
+          f"retries {metrics['retries']}, final concurrency limit {metrics['concurrency_limit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--capacity", type=int, default=4, help="Requests the fake server serves at once.")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of 503 responses.")
+    parser.add_argument("--rpm", type=float, default=600, help="Gateway token bucket rate.")
+    args = parser.parse_args()
+
+    random.seed(0)
+    server = FakeGemini(args.latency, args.capacity, args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    run("unthrottled", server, args, requests_per_minute=0, initial_concurrency=args.requests,
+        max_concurrency=args.requests, max_retries=0)
+    run("gateway    ", server, args, requests_per_minute=args.rpm, burst=args.capacity,
+        initial_concurrency=2, max_concurrency=args.requests, max_retries=6,
+        backoff_base=0.1, backoff_max=2.0)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
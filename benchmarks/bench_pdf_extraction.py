@@ -0,0 +1,87 @@
+"""Time page-parallel PDF extraction on a synthetic multi-hundred-page PDF.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [--pages 400] [--workers 1 2 4]
+
+Reports time-to-first-page (when chunking can start), total time and the
+slowest pages, and checks every page comes back in order with its text.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.extract import iter_pdf_pages, _get_extract_pool
+
+LINE = "Section {page}.{line} The Contractor shall provide all deliverables by the due date."
+
+
+def write_synthetic_pdf(path, pages, lines_per_page=40):
+    """Write a plain-text PDF with Helvetica text; no PDF library required."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(1, pages + 1):
+        ops = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        ops += [f"({LINE.format(page=page, line=line)}) Tj T*" for line in range(lines_per_page)]
+        ops.append("ET")
+        stream = "\n".join(ops)
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        write_synthetic_pdf(path, args.pages)
+        print(f"{args.pages}-page synthetic PDF ({os.path.getsize(path) / 1e6:.1f} MB)\n")
+        print(f"{'workers':>7} {'first page s':>12} {'total s':>8} {'pages/s':>8}  slowest pages")
+
+        # The server keeps its pool alive; don't charge process start-up to the first run
+        list(_get_extract_pool().map(abs, range(os.cpu_count() or 1)))
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            first = None
+            pages = []
+            for page in iter_pdf_pages(path, workers=workers, pages_per_task=args.pages_per_task):
+                if first is None:
+                    first = time.perf_counter() - start
+                pages.append(page)
+            total = time.perf_counter() - start
+
+            assert [p.number for p in pages] == list(range(1, args.pages + 1)), "pages out of order"
+            assert all(f"Section {p.number}.0 " in p.text for p in pages), "page text missing"
+            slowest = sorted(pages, key=lambda p: p.seconds, reverse=True)[:3]
+            slow = ", ".join(f"p{p.number}={p.seconds * 1e3:.1f}ms" for p in slowest)
+            print(f"{workers:>7} {first:>12.3f} {total:>8.2f} {args.pages / total:>8.0f}  {slow}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark LocalRetriever against the previous per-chunk retrieval path.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--sizes 1000 10000 100000] [--queries 20]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from RAG.corpus import Corpus, import_json_store
+from RAG.retriever import LocalRetriever
+
+DIM = 128
+
+
+def embed(text):
+    return np.round(np.random.rand(DIM), 3)
+
+
+def legacy_retrieve(storage_path, query_embed, top_k=3):
+    """The original implementation: reload JSON, score chunk by chunk, full argsort."""
+    try:
+        from sklearn.metrics.pairwise import cosine_similarity
+    except ImportError:
+        def cosine_similarity(a, b):
+            a, b = np.asarray(a), np.asarray(b)
+            return (a @ b.T) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+    with open(storage_path) as f:
+        data = json.load(f)
+
+    sim_scores = [
+        cosine_similarity([query_embed], [np.array(item["embedding"])])[0][0]
+        for item in data
+    ]
+    top_indices = np.argsort(sim_scores)[-top_k:][::-1]
+    return [data[i] for i in top_indices]
+
+
+def build_corpus(path, n):
+    data = [
+        {"text": f"chunk {i}", "embedding": embed("").tolist(), "metadata": {"source": "bench"}}
+        for i in range(n)
+    ]
+    with open(path, "w") as f:
+        json.dump(data, f)
+    return data
+
+
+def time_queries(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--legacy-queries", type=int, default=3,
+                        help="Queries to time on the legacy path (it is slow at 100k).")
+    args = parser.parse_args()
+
+    print(f"{'chunks':>8} {'legacy ms/q':>12} {'vector ms/q':>12} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"embeddings_{n}.json")
+            build_corpus(path, n)
+            query_vecs = [embed("") for _ in range(args.queries)]
+
+            legacy = time_queries(lambda q: legacy_retrieve(path, q),
+                                  query_vecs[:args.legacy_queries])
+
+            corpus = Corpus(os.path.join(tmp, f"corpus_{n}"))
+            import_json_store(path, corpus)
+            retriever = LocalRetriever(corpus, lambda q: q)
+            retriever.refresh()
+            vector = time_queries(lambda q: retriever.retrieve(q), query_vecs)
+
+            print(f"{n:>8} {legacy * 1e3:>12.2f} {vector * 1e3:>12.3f} {legacy / vector:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
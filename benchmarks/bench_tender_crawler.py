@@ -0,0 +1,180 @@
+"""Tender listing crawl: sequential full re-scrape vs the incremental, concurrent crawler.
+
+A local HTTP server serves listing pages recorded from the fixture page: the
+fixture's rows are spread over `--pages` pages of `--rows` tenders, each page
+links to the others like eprocure's pager, and the server answers
+`If-None-Match` / `If-Modified-Since` with `304 Not Modified`. `--latency`
+adds a per-request delay standing in for the portal's response time.
+
+The crawler runs cold (empty state store), warm (nothing changed), and after
+one tender's closing date is changed and one tender is added to page 1.
+
+Usage:
+    python benchmarks/bench_tender_crawler.py [--pages 20] [--rows 20] [--latency 0.15] [--concurrency 4]
+"""
+import os
+import re
+import sys
+import time
+import html
+import asyncio
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import warnings
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+import httpx
+from src.llm_inference.evaluation.scraper import parse_tender_table
+from src.llm_inference.utils.tender_crawler import TenderCrawler, TenderStateStore
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ROW_RE = re.compile(r'\s*<tr class="(?:odd|even)">.*?</tr>', re.DOTALL)
+PAGE_PATH = "/eprocure/app?action=latestActiveTenders&page={}"
+
+
+def render_row(tender: dict, parity: str) -> str:
+    cells = [tender["organization"], tender["title"], tender["ref_no"],
+             "01-Jun-2025 10:00 AM", "01-Jun-2025 11:00 AM", tender["due_date"]]
+    return f'\n      <tr class="{parity}">' + "".join(f"<td>{html.escape(c)}</td>" for c in cells) + "</tr>"
+
+
+class RecordedListing:
+    """Listing pages built from the fixture, re-rendered whenever the tenders change."""
+
+    def __init__(self, fixture: str, pages: int, rows: int):
+        rows_found = list(ROW_RE.finditer(fixture))
+        self.head = fixture[:rows_found[0].start()]
+        self.tail = fixture[rows_found[-1].end():]
+        base = parse_tender_table(fixture)
+        self.pages = []
+        for page in range(pages):
+            self.pages.append([{**base[(page * rows + i) % len(base)],
+                                "ref_no": f"{base[(page * rows + i) % len(base)]['ref_no']}/P{page + 1}"}
+                               for i in range(rows)])
+        self.bodies = {}
+        self.render()
+
+    def render(self):
+        pager = "".join(f'<a href="{html.escape(PAGE_PATH.format(n))}">{n}</a> '
+                        for n in range(1, len(self.pages) + 1))
+        for number, tenders in enumerate(self.pages, start=1):
+            rows = "".join(render_row(t, "odd" if i % 2 == 0 else "even") for i, t in enumerate(tenders))
+            body = self.head + rows + self.tail.replace(
+                '<table id="footer">', f'<div class="pagination">{pager}</div>\n  <table id="footer">')
+            data = body.encode("utf-8")
+            etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+            previous = self.bodies.get(PAGE_PATH.format(number))
+            modified = previous[2] if previous and previous[1] == etag else formatdate(usegmt=True)
+            self.bodies[PAGE_PATH.format(number)] = (data, etag, modified)
+        self.bodies["/eprocure/app?action=latestActiveTenders"] = self.bodies[PAGE_PATH.format(1)]
+
+
+def serve(listing: RecordedListing, latency: float):
+    counts = {"200": 0, "304": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            entry = listing.bodies.get(self.path)
+            if entry is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data, etag, modified = entry
+            if self.headers.get("If-None-Match") == etag:
+                counts["304"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            counts["200"] += 1
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", modified)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counts
+
+
+def sequential_scrape(base_url: str, pages: int):
+    """The old approach: every page re-downloaded on a fresh connection and re-parsed."""
+    tenders = []
+    for number in range(1, pages + 1):
+        response = httpx.get(base_url + PAGE_PATH.format(number), headers={"User-Agent": "Mozilla/5.0"})
+        tenders.extend(parse_tender_table(response.text))
+    return tenders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20, help="Tenders per page.")
+    parser.add_argument("--latency", type=float, default=0.15, help="Server seconds per request.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with open(os.path.join(FIXTURES, "eprocure_latest_tenders.html"), encoding="utf-8") as f:
+        listing = RecordedListing(f.read(), args.pages, args.rows)
+    server, counts = serve(listing, args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{args.pages} pages x {args.rows} tenders, {args.latency * 1000:.0f} ms per request\n")
+    print(f"{'run':<34}{'200':>5}{'304':>5}{'tenders':>9}{'to eval':>9}{'seconds':>9}")
+
+    start = time.perf_counter()
+    tenders = sequential_scrape(base_url, args.pages)
+    print(f"{'sequential, unconditional':<34}{counts['200']:>5}{counts['304']:>5}{len(tenders):>9}"
+          f"{len(tenders):>9}{time.perf_counter() - start:>9.2f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TenderStateStore(os.path.join(tmp, "tender_state.sqlite3"))
+        crawler = TenderCrawler(parse_tender_table, store=store, start_url=base_url + PAGE_PATH.format(1),
+                                max_pages=args.pages, concurrency=args.concurrency)
+
+        def run(label: str):
+            counts["200"] = counts["304"] = 0
+            result = asyncio.run(crawler.crawl())
+            store.record(result.changed, result.pages)
+            print(f"{label:<34}{counts['200']:>5}{counts['304']:>5}{result.seen:>9}"
+                  f"{len(result.changed):>9}{result.seconds:>9.2f}")
+            return result
+
+        run(f"crawler cold, x{args.concurrency}")
+        run("crawler warm, nothing changed")
+
+        first_page = listing.pages[0]
+        first_page[3] = {**first_page[3], "due_date": "15-Jul-2025 03:00 PM"}
+        first_page.insert(0, {**first_page[5], "ref_no": "NEW/2025/0001"})
+        listing.render()
+        result = run("crawler warm, 1 changed + 1 new")
+        print(f"\nsent for evaluation: {', '.join(t['ref_no'] for t in result.changed)}")
+        print(f"state store: {len(store)} tenders")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Recall and LLM-call savings of the local tender pre-filter on saved listing pages.
+
+Each fixture is a saved page in the layout of eprocure's "latest active
+tenders" listing, parsed with the scraper's own table parser. Its labels file
+holds the verdict per `ref_no` that the scraper's `score_tenders` gave every
+tender, unfiltered; `--record` rescores the fixtures and rewrites the labels.
+Recording uses Gemini when GEMINI_API_KEY is set, or `--stub-judge`, a local
+stand-in that judges titles with a keyword rubric of its own (does the tender
+buy people's time or HR/management advice, not goods or works).
+
+The labels checked in were recorded with `--stub-judge`. They are a proxy,
+not a measure of recall against the LLM: the pages are synthetic and the
+stub's rubric is a regex. The run says which scorer each labels file came
+from, and reports proxy recall without judging it.
+
+To measure real recall, save a captured listing page next to these, add it to
+FIXTURE_PAGES and run `--record` with GEMINI_API_KEY set. Against labels
+recorded that way, the run exits non-zero when recall at the default threshold
+falls below `--min-recall`.
+
+The pre-filter only uses `companydata.json` and official NAICS titles, so no
+page here was used to pick its vocabulary.
+
+Usage:
+    python benchmarks/bench_tender_prefilter.py [--thresholds 0.05,0.1,0.15,0.2] [--top-fraction 0.1]
+        [--backend tfidf] [--min-recall 0.95]
+    python benchmarks/bench_tender_prefilter.py --record [--stub-judge]
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import datetime
+import warnings
+from types import SimpleNamespace
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+live_key = bool(os.getenv("GEMINI_API_KEY"))
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from src.llm_inference.evaluation.scraper import parse_tender_table, company_data, score_tenders, MODEL_NAME
+from src.llm_inference.utils.gemini import GeminiClient
+from src.llm_inference.utils.tender_filter import (TenderPrefilter, TENDER_FILTER_BACKEND,
+                                                     TENDER_FILTER_THRESHOLD)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+# (name, listing page); labels sit next to each page as <page>_labels.json
+FIXTURE_PAGES = [
+    ("page 1", os.path.join(FIXTURES, "eprocure_latest_tenders.html")),
+    ("page 2", os.path.join(FIXTURES, "eprocure_heldout_tenders.html")),
+    ("page 3", os.path.join(FIXTURES, "eprocure_unseen_tenders.html")),
+]
+
+TENDER_LINE = re.compile(r"^\[(\d+)\] Organization: .*?\| Title: (.*?) \|", re.MULTILINE)
+# People supplied to do the work, or advice on managing them
+PEOPLE = re.compile(r"\b(manpower|staff|staffing|personnel|workforce|employees|workers|labour|attendants?|"
+                    r"orderl(?:y|ies)|guards?|operators?|assistants?|stenographers?|technicians?|drivers?|"
+                    r"helpers?|nurses|nursing|paramedic\w*|recruit\w*|placement|payroll|deployment)\b", re.I)
+ADVICE = re.compile(r"\b(hr|human resources?|management consult\w*|organi[sz]ational|job evaluation|"
+                    r"pay structure|performance management|manpower planning)\b", re.I)
+# What is being bought, when it is goods or works rather than people
+GOODS = re.compile(r"\b(uniforms?|shoes|boots|quarters|canteen|building|software|licen[cs]es?|vehicles|"
+                   r"furniture|equipment|tents|kits?)\b", re.I)
+
+
+class StubJudge:
+    """Stands in for Gemini when recording labels without an API key."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @staticmethod
+    def verdict(title: str) -> dict:
+        # Judge the thing bought ("Supply of Shoes for Staff" buys shoes), not who it is for
+        purchase = re.split(r"\s+(?:for|at|in)\s+", title, maxsplit=1)[0]
+        relevant = not GOODS.search(purchase) and bool(PEOPLE.search(title) or ADVICE.search(title))
+        return {"is_relevant": relevant, "score": 0.9 if relevant else 0.1,
+                "reason": "buys people's time or HR advice" if relevant else "buys goods, works or other services",
+                "recommendations": []}
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        listed = TENDER_LINE.findall(prompt)
+        if listed:
+            payload = [{"id": int(i), **self.verdict(title)} for i, title in listed]
+        else:
+            title = re.search(r"^Title: (.*)$", prompt, re.MULTILINE).group(1)
+            payload = self.verdict(title)
+        return SimpleNamespace(text=json.dumps(payload))
+
+
+def labels_path(page: str) -> str:
+    return os.path.splitext(page)[0] + "_labels.json"
+
+
+def load_tenders(page: str) -> list:
+    with open(page, encoding="utf-8") as f:
+        return parse_tender_table(f.read())
+
+
+def record(stub_judge: bool):
+    """Scores every tender on each page, unfiltered, and saves the verdicts as its labels."""
+    if stub_judge:
+        client = GeminiClient("stub-judge", model_factory=StubJudge, requests_per_minute=0, rate_limits={})
+        scorer = "stub-judge (benchmarks/bench_tender_prefilter.py), a keyword proxy"
+    elif live_key:
+        client = GeminiClient()
+        scorer = MODEL_NAME
+    else:
+        sys.exit("Recording needs GEMINI_API_KEY, or --stub-judge")
+
+    for name, page in FIXTURE_PAGES:
+        results = asyncio.run(score_tenders(load_tenders(page), client=client))
+        failed = [r["tender"]["ref_no"] for r in results if "error" in r]
+        if failed:
+            sys.exit(f"{name}: {len(failed)} tender(s) could not be scored, e.g. {failed[0]}")
+        labels = {r["tender"]["ref_no"]: bool(r.get("is_relevant")) for r in results}
+        with open(labels_path(page), "w", encoding="utf-8") as f:
+            json.dump({
+                "source": os.path.basename(page),
+                "scorer": f"scraper.score_tenders with {scorer}",
+                "llm_labels": not stub_judge,
+                "recorded": datetime.date.today().isoformat(),
+                "labels": labels,
+                "scores": {r["tender"]["ref_no"]: r.get("score") for r in results},
+            }, f, indent=2)
+            f.write("\n")
+        print(f"{name}: recorded {sum(labels.values())}/{len(labels)} relevant -> {labels_path(page)}")
+
+
+def evaluate(name: str, page: str, thresholds: list, top_fraction: float, backend: str):
+    """Prints one row per threshold; returns `(recall per threshold, whether the labels are LLM verdicts)`."""
+    tenders = load_tenders(page)
+    with open(labels_path(page), encoding="utf-8") as f:
+        recorded = json.load(f)
+    relevant = {ref for ref, is_relevant in recorded["labels"].items() if is_relevant}
+    print(f"\n{name}: {len(tenders)} tenders in {recorded['source']}, {len(relevant)} relevant "
+          f"per {recorded.get('scorer', 'unknown scorer')}")
+    if not recorded.get("llm_labels"):
+        print("  proxy labels, not LLM verdicts: recall below is not checked against a target")
+
+    recalls = {}
+    print(f"{'threshold':>9}{'kept':>6}{'skipped':>9}{'recall':>8}{'precision':>11}{'ms':>7}  missed")
+    for threshold in thresholds:
+        prefilter = TenderPrefilter(company_data, threshold=threshold, top_fraction=top_fraction, backend=backend)
+        start = time.perf_counter()
+        kept, skipped = prefilter.split(tenders)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        kept_refs = {t["ref_no"] for t in kept}
+        hits = len(kept_refs & relevant)
+        recall = hits / len(relevant) if relevant else 1.0
+        precision = hits / len(kept_refs) if kept_refs else 0.0
+        missed = [t["title"] for t in skipped if t["ref_no"] in relevant]
+        recalls[threshold] = recall
+        print(f"{threshold:>9.2f}{len(kept):>6}{len(skipped):>9}{recall:>8.2f}{precision:>11.2f}"
+              f"{elapsed_ms:>7.1f}  {'; '.join(missed)[:80]}")
+    return recalls, bool(recorded.get("llm_labels"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--thresholds", default="0.05,0.1,0.15,0.2")
+    parser.add_argument("--top-fraction", type=float, default=0.1)
+    parser.add_argument("--backend", default=TENDER_FILTER_BACKEND, help="tfidf or a RAG embedding backend.")
+    parser.add_argument("--min-recall", type=float, default=0.95,
+                        help="Fail when recall against LLM labels at the default threshold is below this.")
+    parser.add_argument("--record", action="store_true", help="Rescore the fixtures and rewrite their labels.")
+    parser.add_argument("--stub-judge", action="store_true", help="Record with the local stub instead of Gemini.")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.record:
+        record(args.stub_judge)
+    thresholds = sorted({float(x) for x in args.thresholds.split(",")} | {TENDER_FILTER_THRESHOLD})
+    checked, failed = [], []
+    for name, page in FIXTURE_PAGES:
+        recalls, llm_labels = evaluate(name, page, thresholds, args.top_fraction, args.backend)
+        if llm_labels:
+            checked.append(name)
+            if recalls[TENDER_FILTER_THRESHOLD] < args.min_recall:
+                failed.append(f"{name} {recalls[TENDER_FILTER_THRESHOLD]:.2f}")
+
+    if not checked:
+        print("\nno page has LLM-recorded labels; recall was not checked against a target")
+        return
+    print(f"\nrecall against LLM labels at the default threshold {TENDER_FILTER_THRESHOLD:.2f}, "
+          f"target {args.min_recall:.2f}: {'below on ' + ', '.join(failed) if failed else 'met on ' + ', '.join(checked)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
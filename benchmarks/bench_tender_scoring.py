@@ -0,0 +1,101 @@
+"""Tender scoring throughput: one prompt per tender vs batched, concurrent prompts.
+
+A local stub model stands in for Gemini. Its latency is a fixed round trip
+plus a prefill cost per prompt character, so re-sending the company profile
+with every tender is charged the way a real model charges it.
+
+Usage:
+    python benchmarks/bench_tender_scoring.py [--limits 10,100,1000] [--batch-size 10] [--concurrency 4]
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import warnings
+from types import SimpleNamespace
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from src.llm_inference.utils.gemini import GeminiClient
+from src.llm_inference.evaluation.scraper import score_tenders
+
+TENDER_LINE = re.compile(r"^\[(\d+)\] Organization: .*?\| Title: (.*?) \|", re.MULTILINE)
+
+
+class StubTenderModel:
+    def __init__(self, model_name: str, round_trip: float, seconds_per_kchar: float):
+        self.round_trip = round_trip
+        self.seconds_per_kchar = seconds_per_kchar
+        self.calls = 0
+        self.prompt_chars = 0
+
+    @staticmethod
+    def verdict(title: str) -> dict:
+        relevant = "staff" in title.lower() or "manpower" in title.lower()
+        return {"is_relevant": relevant, "score": 0.9 if relevant else 0.1,
+                "reason": "stub", "recommendations": []}
+
+    async def generate_content_async(self, prompt: str):
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        await asyncio.sleep(self.round_trip + self.seconds_per_kchar * len(prompt) / 1000)
+        listed = TENDER_LINE.findall(prompt)
+        if listed:
+            payload = [{"id": int(i), **self.verdict(title)} for i, title in listed]
+        else:
+            title = re.search(r"^Title: (.*)$", prompt, re.MULTILINE).group(1)
+            payload = self.verdict(title)
+        return SimpleNamespace(text=json.dumps(payload))
+
+
+def make_tenders(n: int):
+    rng = random.Random(0)
+    kinds = ["Manpower Staffing Services", "Supply of Cement", "Road Construction Works",
+             "HR Consulting and Recruitment", "Annual Maintenance of Pumps", "Printing of Forms"]
+    return [{"organization": f"Department {rng.randint(1, 50)}",
+             "title": f"{rng.choice(kinds)} at Site {i}",
+             "ref_no": f"REF/{i:05d}", "due_date": "30-Jun-2025 03:00 PM"} for i in range(n)]
+
+
+def run(tenders, batch_size, concurrency, args):
+    client = GeminiClient("stub", model_factory=lambda name: StubTenderModel(
+        name, args.round_trip, args.seconds_per_kchar), requests_per_minute=0,
+        initial_concurrency=concurrency, max_concurrency=concurrency)
+    start = time.perf_counter()
+    results = asyncio.run(score_tenders(tenders, batch_size, concurrency, client=client))
+    elapsed = time.perf_counter() - start
+    model = client.get_model("gemini-2.0-flash")
+    errors = sum(1 for r in results if "error" in r)
+    return elapsed, model.calls, model.prompt_chars, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limits", default="10,100,1000")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--round-trip", type=float, default=0.02, help="Stub seconds per call.")
+    parser.add_argument("--seconds-per-kchar", type=float, default=0.005, help="Stub prefill cost.")
+    args = parser.parse_args()
+
+    print(f"{'limit':>6} {'mode':<22}{'calls':>7}{'prompt kB':>11}{'seconds':>9}{'tenders/s':>11}")
+    for limit in (int(x) for x in args.limits.split(",")):
+        tenders = make_tenders(limit)
+        for label, batch_size, concurrency in (("serial, 1 per prompt", 1, 1),
+                                               (f"{args.batch_size}/prompt x{args.concurrency}",
+                                                args.batch_size, args.concurrency)):
+            elapsed, calls, chars, errors = run(tenders, batch_size, concurrency, args)
+            print(f"{limit:>6} {label:<22}{calls:>7}{chars / 1000:>11.0f}{elapsed:>9.2f}"
+                  f"{limit / elapsed:>11.0f}" + (f"  ({errors} errors)" if errors else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Tender table parsing: BeautifulSoup tree vs the streaming table parser.
+
+Large listing pages are built from the saved fixture by repeating its rows
+(with unique reference numbers) until the page holds `--rows` tenders, the
+shape of the multi-megabyte pages the portal returns when it lists hundreds of
+tenders. `--tail-kb` appends that much unrelated markup after the listing,
+standing in for the footer, pager and hidden tables that follow it. Both
+parsers must return identical tenders on every page.
+
+Usage:
+    python benchmarks/bench_tender_table.py [--rows 60,1000,5000] [--tail-kb 200] [--repeat 3]
+"""
+import os
+import re
+import sys
+import time
+import logging
+import argparse
+import warnings
+
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+from src.llm_inference.evaluation.scraper import parse_tender_table, parse_tender_table_soup
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ROW_RE = re.compile(r'\s*<tr class="(?:odd|even)">.*?</tr>', re.DOTALL)
+REF_RE = re.compile(r"(<td>)(2025_[A-Z]+_\d+_\d+)(</td>)")
+
+
+def build_page(fixture: str, rows: int, tail_kb: int) -> str:
+    found = list(ROW_RE.finditer(fixture))
+    head, tail = fixture[:found[0].start()], fixture[found[-1].end():]
+    body = []
+    for i in range(rows):
+        row = found[i % len(found)].group(0)
+        body.append(REF_RE.sub(lambda m: f"{m.group(1)}{m.group(2)}-{i // len(found)}{m.group(3)}", row))
+    filler = ('<table class="hidden"><tr><td>Archived notice</td><td><a href="#">View</a></td></tr></table>\n'
+              * (tail_kb * 1024 // 90 + 1))
+    return head + "".join(body) + tail.replace("</body>", filler + "</body>")
+
+
+def timed(fn, html: str, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="60,1000,5000")
+    parser.add_argument("--tail-kb", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with open(os.path.join(FIXTURES, "eprocure_latest_tenders.html"), encoding="utf-8") as f:
+        fixture = f.read()
+
+    print(f"{'rows':>6}{'page MB':>9}{'soup s':>9}{'stream s':>10}{'speedup':>9}  identical")
+    for rows in (int(x) for x in args.rows.split(",")):
+        html = build_page(fixture, rows, args.tail_kb)
+        soup_s, expected = timed(parse_tender_table_soup, html, args.repeat)
+        stream_s, actual = timed(parse_tender_table, html, args.repeat)
+        identical = actual == expected and len(actual) == rows
+        print(f"{rows:>6}{len(html.encode('utf-8')) / 1e6:>9.2f}{soup_s:>9.3f}{stream_s:>10.3f}"
+              f"{soup_s / stream_s:>8.1f}x  {'yes' if identical else 'NO'}")
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
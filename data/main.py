@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-import json
+from fastapi.responses import JSONResponse, Response
+from typing import Optional
 import os
-import time
+import sys
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(project_root)
+
+from src.llm_inference.utils.tender_results import TenderResultsStore, FEED_PAGE_SIZE
+from src.llm_inference.utils.workspace import Workspace
+from src.llm_inference.utils.output_cache import OutputCache, OUTPUT_FILES, SHARED_ONLY_OUTPUTS
 
 app = FastAPI()
 
@@ -12,14 +20,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
+# Agent outputs change once per pipeline run but are polled constantly
+outputs = OutputCache()
+
+def serve_output(request: Request, name: str, job: Optional[str]) -> Response:
+    # With ?job=<id>, the output of that upload; without, the shared one under data/
+    try:
+        workspace = Workspace.for_job(job) if job else Workspace.shared()
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    try:
+        entry = outputs.get(workspace.path(OUTPUT_FILES[name]))
+    except ValueError as e:
+        return JSONResponse(status_code=503, content={"error": f"Could not read the {name} output: {e}"})
+    if entry is None:
+        return JSONResponse(status_code=404, content={"error": f"No {name} output for job {job}" if job
+                                                      else f"No {name} output yet"})
+    if entry.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=entry.headers)
+    return Response(content=entry.body, media_type="application/json", headers=entry.headers)
+
 @app.get("/data")
-async def get_data():
-    filepath = "checklist_output.json"
-    print(f"Reading file: {filepath} (last modified: {time.ctime(os.path.getmtime(filepath))})")
-    
-    with open(filepath, "r") as f:
-        data = json.load(f)
-    
-    return data
+async def get_data(request: Request, job: Optional[str] = None):
+    return serve_output(request, "checklist", job)
+
+@app.get("/outputs/{name}")
+async def get_output(name: str, request: Request, job: Optional[str] = None):
+    if name not in OUTPUT_FILES:
+        return JSONResponse(status_code=404, content={"error": f"Unknown output {name}; "
+                                                      f"expected one of {', '.join(OUTPUT_FILES)}"})
+    if job and name in SHARED_ONLY_OUTPUTS:
+        return JSONResponse(status_code=404, content={"error": f"Jobs have no {name} output; it is only "
+                                                      f"served without ?job=, and a job's plan of action "
+                                                      f"is in its checklist"})
+    return serve_output(request, name, job)
+
+@app.get("/outputs")
+async def get_output_cache_stats():
+    return {"outputs": list(OUTPUT_FILES), "shared_only": sorted(SHARED_ONLY_OUTPUTS), "cache": outputs.stats()}
+
+tender_results = TenderResultsStore()
+
+@app.get("/tenders")
+async def get_tenders(page: int = 1, page_size: int = FEED_PAGE_SIZE, since: Optional[int] = None,
+                      relevant_only: bool = True):
+    # Poll with since=<cursor from the last response> to fetch only tenders added since then
+    return tender_results.feed(page, page_size, since, relevant_only)
+
+@app.get("/tenders/cycles")
+async def get_tender_cycles(limit: int = 50):
+    return tender_results.cycles(limit)
@@ -5,11 +5,9 @@ import os
 import sys
 import asyncio
 import requests
-from typing import Dict, List, Optional, TypedDict
+from typing import Callable, Dict, List, Optional, TypedDict
 from dotenv import load_dotenv
 
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
 import argparse # for command-line arguments
 
 
@@ -22,26 +20,13 @@ sys.path.append(project_root)
 # --- Configuration ---
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_NAME = 'gemini-2.0-flash'
-COMPLIANCE = os.path.join(project_root, 'data', 'compliance_output.json') # Relative path within project
-ELIGIBLITY = os.path.join(project_root, 'data', 'eligibility_output.json')
-POA = os.path.join(project_root, 'data', 'gap_analysis_output.json')
 
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY environment variable not set.")
     sys.exit("Error: GEMINI_API_KEY environment variable not set.")
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel(MODEL_NAME)
-    logger.info(f"Successfully initialized Gemini model: {MODEL_NAME}")
-except Exception as config_error:
-    logger.error(f"Failed to configure Gemini API: {config_error}")
-    gemini_model = None  # Ensure model is None if initialization fails
-
-
-# Add project root to Python path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
-sys.path.append(project_root)
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.workspace import Workspace
 
 
 # --- Data Loading ---
@@ -61,31 +46,44 @@ def load_json_data(file_path: str) -> dict:
         logger.error(f"Error loading data from file: {file_path}: {e}")
         raise
 
-try:
-    compliance = load_json_data(COMPLIANCE)
+def load_agent_outputs(workspace: Optional[Workspace] = None):
+    """Load the upstream agents' outputs from `workspace` (default: the shared data/).
+
+    Read when the checklist runs, not at import time, so the orchestrator can
+    import this module before the other agents have written their files.
+    """
+    workspace = workspace or Workspace.shared()
+    compliance_path = workspace.path('compliance_output.json')
+    eligibility_path = workspace.path('eligibility_output.json')
+    poa_path = workspace.path('gap_analysis_output.json')
+
+    compliance = load_json_data(compliance_path)
     compliance = json.dumps(compliance, indent=2)
-except Exception:
-    logger.critical("Failed to load company data. Exiting.")
-    sys.exit(1)
-
-# --- RFP Data Loading (Handling Missing or Invalid Data) ---
-try:
-    eligiblity = load_json_data(ELIGIBLITY)
-    eligiblity = json.dumps(eligiblity, indent=2)
-except Exception:
-    logger.warning("Failed to load RFP data. Using placeholder.")
-    eligiblity = "{}"  # Placeholder
-
-try:
-    poa = load_json_data(POA)
-    poa = json.dumps(poa, indent=2)
-except Exception:
-    logger.warning("Failed to load RFP data. Using placeholder.")
-    poa = "{}"  # Placeholder
+
+    # --- RFP Data Loading (Handling Missing or Invalid Data) ---
+    try:
+        eligiblity = load_json_data(eligibility_path)
+        eligiblity = json.dumps(eligiblity, indent=2)
+    except Exception:
+        logger.warning("Failed to load RFP data. Using placeholder.")
+        eligiblity = "{}"  # Placeholder
+
+    try:
+        poa = load_json_data(poa_path)
+        poa = json.dumps(poa, indent=2)
+    except Exception:
+        logger.warning("Failed to load RFP data. Using placeholder.")
+        poa = "{}"  # Placeholder
+
+    return compliance, eligiblity, poa
 
 # --- Main Functionality ---
-def generate_checklist_and_recommendations(compliance_data: str, eligibility_data: str) -> str:
-    """Generates a checklist of requirements met, compliance status, and recommendations using Gemini."""
+async def generate_checklist_and_recommendations(compliance: str, eligiblity: str, poa: str,
+                                                 on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Generates a checklist of requirements met, compliance status, and recommendations using Gemini.
+
+    With `on_token`, the answer is streamed and each piece is passed to it as it arrives.
+    """
 
     prompt = f"""
 You are an AI assistant that analyzes company compliance data and RFP (Request for Proposal) eligibility requirements to generate a checklist, assess compliance, and provide recommendations.
@@ -122,18 +120,20 @@ Format your response as a well-structured JSON object with the following keys:
 Ensure the JSON output is properly formatted and valid.
 """
 
-    if gemini_model:
-        try:
-            response = gemini_model.generate_content(prompt)
-            return response.text
-        except google_exceptions.GoogleAPIError as api_error:
-            logger.error(f"Gemini API error: {api_error}")
-            return f"Error: Failed to generate checklist due to API error: {api_error}"
-        except Exception as e:
-            logger.error(f"An unexpected error occurred: {e}")
-            return f"Error: Failed to generate checklist due to an unexpected error: {e}"
-    else:
-        return "Error: Gemini model not initialized."
+    try:
+        if on_token is None:
+            return await gemini_client.generate_content(prompt, MODEL_NAME, validate=require_json)
+        parts = []
+        async for text in gemini_client.stream_content(prompt, MODEL_NAME, validate=require_json):
+            parts.append(text)
+            on_token(text)
+        return "".join(parts)
+    except RuntimeError as api_error:
+        logger.error(f"Gemini API error: {api_error}")
+        raise
+    except Exception as e:
+        logger.error(f"An unexpected error occurred: {e}")
+        raise
 
 
 def ensure_valid_json(text: str) -> dict:
@@ -158,6 +158,14 @@ def ensure_valid_json(text: str) -> dict:
         return {"response_text": text}
 
 
+def require_json(text: str) -> dict:
+    """`ensure_valid_json`, but raises on an answer holding no JSON, so it is not cached."""
+    data = ensure_valid_json(text)
+    if list(data) == ["response_text"]:
+        raise ValueError("No JSON object in the checklist response")
+    return data
+
+
 def save_to_json(data: str, output_path: str) -> bool:
     """Save data to a well-formatted JSON file."""
     try:
@@ -178,20 +186,28 @@ def save_to_json(data: str, output_path: str) -> bool:
         return False
 
 
-async def main():
+async def main(workspace: Optional[Workspace] = None, on_token: Optional[Callable[[str], None]] = None):
     """Main function to orchestrate the process."""
+    try:
+        compliance, eligiblity, poa = load_agent_outputs(workspace)
+    except Exception:
+        logger.critical("Failed to load compliance data. Skipping checklist.")
+        raise
+
     try:
         # Generate the checklist and recommendations
-        checklist_and_recommendations = generate_checklist_and_recommendations(compliance, eligiblity)
+        checklist_and_recommendations = await generate_checklist_and_recommendations(compliance, eligiblity, poa,
+                                                                                     on_token)
 
         # Define the output path
-        output_path = os.path.join(project_root, 'data', 'checklist_output.json')
+        output_path = (workspace or Workspace.shared()).path('checklist_output.json')
 
         # Save the output to a JSON file
         if save_to_json(checklist_and_recommendations, output_path):
             print(f"Output successfully saved to {output_path}")
         else:
             print("Failed to save output to file")
+            raise RuntimeError(f"Failed to save checklist to {output_path}")
 
         # Also print to console for immediate viewing
         print(checklist_and_recommendations)
@@ -201,6 +217,7 @@ async def main():
     except Exception as e:
         logger.error(f"An error occurred: {e}")
         print(f"An error occurred: {e}")
+        raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
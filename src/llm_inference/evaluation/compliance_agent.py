@@ -3,11 +3,10 @@ import json
 import re
 import os
 import sys
+import time
 import asyncio
 from typing import Dict, List, Optional, TypedDict
 
-import google.generativeai as genai
-from google.api_core import exceptions as google_exceptions
 import argparse # for command-line arguments
 
 
@@ -36,25 +35,33 @@ class EligibilityData(TypedDict):
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_NAME = 'gemini-2.0-flash'
 COMPANY_DATA_PATH = 'data/companydata.json'  # Relative path within project
-RFP_DATA_PATH = 'RAG/data/embedding.json'
+# Approximate token budget for the RFP excerpt sent to the model
+RFP_CONTEXT_TOKENS = int(os.environ.get("COMPLIANCE_RFP_CONTEXT_TOKENS", "3000"))
+RFP_CONTEXT_QUERIES = [
+    "liability indemnification hold harmless limitation of liability",
+    "insurance coverage requirements certificate of insurance",
+    "termination for cause or convenience default penalties liquidated damages",
+    "payment terms invoicing fees retainage",
+    "terms and conditions governing law disputes contract award",
+    "confidentiality data security privacy records retention",
+    "compliance with laws background checks nondiscrimination",
+]
 
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY environment variable not set.")
     sys.exit("Error: GEMINI_API_KEY environment variable not set.")
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel(MODEL_NAME)
-    logger.info(f"Successfully initialized Gemini model: {MODEL_NAME}")
-except Exception as config_error:
-    logger.error(f"Failed to configure Gemini API: {config_error}")
-    gemini_model = None  # Ensure model is None if initialization fails
-
-
 # Add project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 sys.path.append(project_root)
 
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.rfp_context import RfpContext, select_rfp_context, log_prompt_stats
+from src.llm_inference.utils.workspace import Workspace
+
+# Where the RAG server writes the RFP text when an upload has no job workspace
+RFP_DATA_PATH = Workspace.shared().rfp_path
+
 
 # --- Data Loading ---
 def load_json_data(file_path: str) -> dict:
@@ -80,14 +87,6 @@ except Exception:
     logger.critical("Failed to load company data. Exiting.")
     sys.exit(1)
 
-# --- RFP Data Loading (Handling Missing or Invalid Data) ---
-try:
-    client_rfp_text_json = load_json_data(RFP_DATA_PATH)
-    client_rfp_text_str = json.dumps(client_rfp_text_json, indent=2)
-except Exception:
-    logger.warning("Failed to load RFP data. Using placeholder.")
-    client_rfp_text_str = "{}"  # Placeholder
-
 # --- PROMPT ---
 
 ELIGIBILITY_PROMPT = """
@@ -128,37 +127,37 @@ Return JSON format:
 
 # --- Gemini API Interaction ---
 
-async def evaluate_eligibility(rfp_text: str) -> EligibilityData:
+async def evaluate_eligibility(rfp_context: RfpContext, workspace: Optional[Workspace] = None) -> EligibilityData:
     """
     Evaluates RFP eligibility using Gemini API, parses the response, and returns
     a dictionary containing the risk assessment data.
 
     Args:
-        rfp_text: The RFP text to evaluate.
+        rfp_context: The RFP excerpt to evaluate.
+        workspace: The job workspace the output is saved in (default: the shared data/).
 
     Returns:
         A dictionary containing the risk assessment data.
 
     Raises:
-        Exception: If the Gemini model is not initialized or if an error occurs
-            during the API call or response parsing.
+        Exception: If an error occurs during the API call or response parsing.
     """
-    if not gemini_model:
-        raise ValueError("Gemini model is not initialized.")
-
-    prompt = ELIGIBILITY_PROMPT.format(service_company_data_str=service_company_data_str, rfp_data=rfp_text)
+    prompt = ELIGIBILITY_PROMPT.format(service_company_data_str=service_company_data_str, rfp_data=rfp_context.text)
 
     try:
-        response = await gemini_model.generate_content_async(prompt)
+        started = time.perf_counter()
+        response_text = await gemini_client.generate_content(prompt, MODEL_NAME,
+                                                             validate=parse_gemini_response)
         logger.info("Successfully received response from Gemini API.")
-    except google_exceptions.GoogleAPIError as api_error:  # More specific exception
+        log_prompt_stats("compliance", prompt, rfp_context, time.perf_counter() - started)
+    except RuntimeError as api_error:
         logger.error(f"Gemini API error: {api_error}")
         raise  # Re-raise for handling upstream, perhaps with retry logic
 
-    eligibility_data = parse_gemini_response(response)
+    eligibility_data = parse_gemini_response(response_text)
 
     # Save the output to a JSON file
-    output_path = os.path.join(project_root, 'data', 'compliance_output.json')
+    output_path = (workspace or Workspace.shared()).path('compliance_output.json')
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     try:
@@ -167,17 +166,19 @@ async def evaluate_eligibility(rfp_text: str) -> EligibilityData:
         logger.info(f"Eligibility output saved to {output_path}")
     except IOError as e:
         logger.error(f"Failed to save eligibility output to {output_path}: {e}")
+        raise
     except TypeError as e:
         logger.error(f"Data serialization error when saving eligibility output: {e}")
+        raise
 
     return eligibility_data
 
-def parse_gemini_response(response) -> EligibilityData:
+def parse_gemini_response(text_content: str) -> EligibilityData:
     """
     Parses the response from Gemini API to extract risk assessment data.
 
     Args:
-        response: The response object from Gemini API.
+        text_content: The response text from Gemini API.
 
     Returns:
         A dictionary containing the parsed risk assessment data.
@@ -187,14 +188,8 @@ def parse_gemini_response(response) -> EligibilityData:
             structure is invalid.
     """
     try:
-        if not response.parts:
-            logger.warning("Gemini response has no parts.")
-            try:
-                text_content = response.text
-            except AttributeError:
-                raise ValueError("Gemini response has no parts and no direct text attribute.")
-        else:
-            text_content = response.parts[0].text
+        if not text_content:
+            raise ValueError("Gemini response has no text.")
 
         logger.debug(f"Raw response text:\n{text_content}")
 
@@ -273,41 +268,40 @@ def validate_eligibility_data(data: dict) -> None:
 
 # --- Main Function ---
 
-async def main(rfp_file_path: Optional[str] = None):
+async def main(rfp_file_path: Optional[str] = None, workspace: Optional[Workspace] = None):
     """
     Main function to run the eligibility check.
     """
     if not GEMINI_API_KEY:
         logger.error("Cannot run main function: GEMINI_API_KEY not set.")
-        return
-
-    if not gemini_model:
-        logger.error("Cannot run main function: Gemini model not initialized.")
-        return
+        raise RuntimeError("GEMINI_API_KEY not set")
 
     logger.info("Starting eligibility evaluation...")
+    started = time.perf_counter()
 
     # Load RFP data, either from the default path or a user-specified path
     try:
         if rfp_file_path:
             client_rfp_text_json = load_json_data(rfp_file_path)
         else:
-            client_rfp_text_json = load_json_data(RFP_DATA_PATH)
+            client_rfp_text_json = load_json_data(workspace.rfp_path if workspace else RFP_DATA_PATH)
 
-        client_rfp_text_str = json.dumps(client_rfp_text_json, indent=2)
+        rfp_context = await select_rfp_context(client_rfp_text_json, RFP_CONTEXT_QUERIES,
+                                               RFP_CONTEXT_TOKENS, "compliance")
     except Exception as e:
         logger.error(f"Failed to load RFP data: {e}")
-        return  # Exit if RFP data is not available
+        raise  # Fail the stage if RFP data is not available
 
     try:
-        result = await evaluate_eligibility(client_rfp_text_str)
+        result = await evaluate_eligibility(rfp_context, workspace)
 
-        logger.info("Eligibility evaluation completed.")
+        logger.info(f"Eligibility evaluation completed in {time.perf_counter() - started:.2f}s.")
         print("\nEligibility Assessment Result:")
         print(json.dumps(result, indent=2))
 
     except Exception as e:
         logger.error(f"Eligibility evaluation failed: {e}")
+        raise
 
 
 if __name__ == "__main__":
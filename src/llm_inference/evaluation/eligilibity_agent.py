@@ -2,10 +2,11 @@ import os
 import sys
 import re
 import json
+import time
 import logging
 import asyncio
+from typing import Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -14,26 +15,30 @@ logger = logging.getLogger(__name__)
 # --- Load Environment Variables ---
 load_dotenv()
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+MODEL_NAME = 'gemini-2.0-flash'
+# Approximate token budget for the RFP excerpt sent to the model
+RFP_CONTEXT_TOKENS = int(os.environ.get("ELIGIBILITY_RFP_CONTEXT_TOKENS", "3000"))
+RFP_CONTEXT_QUERIES = [
+    "mandatory minimum qualifications requirements must shall",
+    "required licenses certifications registrations accreditation",
+    "years of experience similar engagements references past performance",
+    "key personnel staff qualifications credentials",
+    "insurance bonding requirements",
+    "proposal submission deadline format required forms",
+    "proposals will be rejected disqualified non-responsive",
+]
 
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY environment variable not set.")
-else:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-    except Exception as config_error:
-        logger.error(f"Failed to configure Gemini API: {config_error}")
-
-# --- Initialize Gemini Model ---
-try:
-    gemini_model = genai.GenerativeModel('gemini-2.0-flash')
-except Exception as model_init_error:
-    logger.error(f"Failed to initialize Gemini model: {model_init_error}")
-    gemini_model = None
 
 # --- Add Project Root ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 sys.path.append(project_root)
 
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.rfp_context import RfpContext, select_rfp_context, log_prompt_stats
+from src.llm_inference.utils.workspace import Workspace
+
 # --- Load Company Data ---
 try:
     company_data_path = os.path.join(project_root, 'data', 'companydata.json')
@@ -51,20 +56,21 @@ except Exception as e:
     sys.exit(1)
 
 # --- Load RFP Data ---
-try:
-    rfp_data_path = os.path.join(project_root, 'RAG', 'data', 'embedding.json')
-    with open(rfp_data_path, 'r', encoding='utf-8') as f:
-        client_rfp_text_json = json.load(f)
-    client_rfp_text_str = json.dumps(client_rfp_text_json, indent=2)
-except FileNotFoundError:
-    logger.warning(f"RFP data file not found at: {rfp_data_path}.")
-    client_rfp_text_str = "{}"
-except json.JSONDecodeError:
-    logger.warning("Error decoding JSON from RFP data file.")
-    client_rfp_text_str = "{}"
-except Exception as e:
-    logger.warning(f"Error loading RFP data: {e}")
-    client_rfp_text_str = "{}"
+# Where the RAG server writes the RFP text when an upload has no job workspace
+RFP_DATA_PATH = Workspace.shared().rfp_path
+
+def load_rfp_data(rfp_data_path: str = RFP_DATA_PATH) -> dict:
+    """Read at call time, so a long-running process always sees the latest upload."""
+    try:
+        with open(rfp_data_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"RFP data file not found at: {rfp_data_path}.")
+    except json.JSONDecodeError:
+        logger.warning("Error decoding JSON from RFP data file.")
+    except Exception as e:
+        logger.warning(f"Error loading RFP data: {e}")
+    return {}
 
 # --- Prompt Template ---
 ELIGIBILITY_PROMPT = """
@@ -106,21 +112,26 @@ def parse_gemini_response(response_text: str) -> dict:
         logger.error(f"JSON decode error: {e}")
         return {"error": "Invalid JSON in response"}
 
-# --- Eligibility Evaluation Function ---
-async def evaluate_eligibility(rfp_text: str) -> dict:
-    if not gemini_model:
-        logger.error("Gemini model is not available.")
-        return {"error": "Model not available"}
+def check_gemini_response(response_text: str) -> None:
+    """Raises unless `response_text` parses, so a malformed answer is never cached."""
+    result = parse_gemini_response(response_text)
+    if "error" in result:
+        raise ValueError(result["error"])
 
+# --- Eligibility Evaluation Function ---
+async def evaluate_eligibility(rfp_context: RfpContext) -> dict:
     prompt = ELIGIBILITY_PROMPT.format(
         company_data=service_company_data_str,
-        rfp_data=rfp_text
+        rfp_data=rfp_context.text
     )
 
     try:
-        response = gemini_model.generate_content(prompt)
-        if hasattr(response, 'text'):
-            return parse_gemini_response(response.text)
+        started = time.perf_counter()
+        response_text = await gemini_client.generate_content(prompt, MODEL_NAME,
+                                                             validate=check_gemini_response)
+        log_prompt_stats("eligibility", prompt, rfp_context, time.perf_counter() - started)
+        if response_text:
+            return parse_gemini_response(response_text)
         else:
             logger.error("No text found in Gemini response.")
             return {"error": "Empty response from model"}
@@ -129,18 +140,30 @@ async def evaluate_eligibility(rfp_text: str) -> dict:
         return {"error": str(e)}
 
 # --- Main ---
-async def main():
+async def main(rfp_file_path: Optional[str] = None, workspace: Optional[Workspace] = None):
     if not GEMINI_API_KEY:
         logger.error("GEMINI_API_KEY not set.")
-        return
-    if not gemini_model:
-        logger.error("Gemini model not initialized.")
-        return
-    if not client_rfp_text_str or client_rfp_text_str == "{}":
+        raise RuntimeError("GEMINI_API_KEY not set")
+    if not rfp_file_path:
+        rfp_file_path = workspace.rfp_path if workspace else RFP_DATA_PATH
+    client_rfp_text_json = load_rfp_data(rfp_file_path)
+    if not client_rfp_text_json:
         logger.error("RFP data missing or invalid.")
-        return
-
-    result = await evaluate_eligibility(client_rfp_text_str)
+        raise ValueError(f"RFP data missing or invalid: {rfp_file_path}")
+
+    started = time.perf_counter()
+    rfp_context = await select_rfp_context(client_rfp_text_json, RFP_CONTEXT_QUERIES,
+                                           RFP_CONTEXT_TOKENS, "eligibility")
+    result = await evaluate_eligibility(rfp_context)
+    if "error" in result:
+        # Don't leave an error in place of the checklist agent's input
+        raise RuntimeError(f"Eligibility evaluation failed: {result['error']}")
+
+    # The checklist agent reads this file
+    output_path = (workspace or Workspace.shared()).path('eligibility_output.json')
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    logger.info(f"Eligibility agent finished in {time.perf_counter() - started:.2f}s")
     print("\nEligibility Assessment Result:")
     print(json.dumps(result, indent=2))
 
@@ -3,11 +3,11 @@ import json
 import re
 import os
 import sys
+import time
 import asyncio
 from typing import List, Optional, TypedDict
 import argparse
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 
 # --- Load environment variables ---
@@ -32,24 +32,32 @@ class GapAnalysis(TypedDict):
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_NAME = 'gemini-1.5-pro'  # ✅ Correct model name
 COMPANY_DATA_PATH = 'data/companydata.json'
-RFP_DATA_PATH = 'RAG/data/embedding.json'
+# Approximate token budget for the RFP excerpt sent to the model
+RFP_CONTEXT_TOKENS = int(os.environ.get("GAP_ANALYSIS_RFP_CONTEXT_TOKENS", "4000"))
+RFP_CONTEXT_QUERIES = [
+    "scope of work services to be provided deliverables",
+    "technical requirements specifications standards",
+    "reports deliverables findings recommendations presentation",
+    "project schedule timeline milestones completion date",
+    "key personnel staffing qualifications experience",
+    "evaluation criteria scoring selection",
+]
 
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY environment variable not set.")
     sys.exit("Error: GEMINI_API_KEY environment variable not set.")
 
-# Configure Gemini
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel(MODEL_NAME)
-except Exception as config_error:
-    logger.error(f"Failed to configure Gemini API: {config_error}")
-    sys.exit(1)
-
 # --- Project Root Fix ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 sys.path.append(project_root)
 
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.rfp_context import RfpContext, select_rfp_context, log_prompt_stats
+from src.llm_inference.utils.workspace import Workspace
+
+# Where the RAG server writes the RFP text when an upload has no job workspace
+RFP_DATA_PATH = Workspace.shared().rfp_path
+
 # --- Load JSON ---
 def load_json_data(file_path: str) -> dict:
     try:
@@ -91,24 +99,24 @@ Return JSON in the following format:
 """
 
 # --- Perform Gap Analysis ---
-async def perform_gap_analysis(rfp_text: str, company_data: str) -> GapAnalysis:
+async def perform_gap_analysis(rfp_context: RfpContext, company_data: str) -> GapAnalysis:
     prompt = GAP_ANALYSIS_PROMPT.format(
         company_data=company_data,
-        rfp_data=rfp_text
+        rfp_data=rfp_context.text
     )
 
     try:
-        response = await gemini_model.generate_content_async(prompt)
-        return parse_gap_response(response)
+        started = time.perf_counter()
+        response_text = await gemini_client.generate_content(prompt, MODEL_NAME, validate=parse_gap_response)
+        log_prompt_stats("gap_analysis", prompt, rfp_context, time.perf_counter() - started)
+        return parse_gap_response(response_text)
     except Exception as e:
         logger.error(f"Gemini API Error: {e}")
         raise
 
 # --- Parse Response ---
-def parse_gap_response(response) -> GapAnalysis:
+def parse_gap_response(text_content: str) -> GapAnalysis:
     try:
-        text_content = response.text if hasattr(response, "text") else getattr(response, "candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-
         logger.debug(f"Raw response:\n{text_content}")
 
         json_pattern = r'```json\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*?\})'
@@ -126,31 +134,34 @@ def parse_gap_response(response) -> GapAnalysis:
         raise
 
 # --- Main Logic ---
-async def main(rfp_file_path: Optional[str] = None):
+async def main(rfp_file_path: Optional[str] = None, workspace: Optional[Workspace] = None):
     logger.info("Starting Gap Analysis Agent...")
+    started = time.perf_counter()
 
     try:
         company_data = load_json_data(COMPANY_DATA_PATH)
-        rfp_data = load_json_data(rfp_file_path or RFP_DATA_PATH)
+        rfp_data = load_json_data(rfp_file_path or (workspace.rfp_path if workspace else RFP_DATA_PATH))
     except Exception as e:
         logger.critical(f"Failed to load input data: {e}")
-        return
+        raise
 
     company_data_str = json.dumps(company_data, indent=2)
-    rfp_data_str = json.dumps(rfp_data, indent=2)
+    rfp_context = await select_rfp_context(rfp_data, RFP_CONTEXT_QUERIES,
+                                           RFP_CONTEXT_TOKENS, "gap_analysis")
 
     try:
-        result = await perform_gap_analysis(rfp_data_str, company_data_str)
+        result = await perform_gap_analysis(rfp_context, company_data_str)
 
-        output_path = os.path.join(project_root, "data/gap_analysis_output.json")
+        output_path = (workspace or Workspace.shared()).path("gap_analysis_output.json")
         with open(output_path, "w", encoding="utf-8") as f:
             json.dump(result, f, indent=2, ensure_ascii=False)
 
-        logger.info("Gap analysis completed. Output saved.")
+        logger.info(f"Gap analysis completed in {time.perf_counter() - started:.2f}s. Output saved.")
         print("\nGap Analysis Result:\n", json.dumps(result, indent=2))
 
     except Exception as e:
         logger.error(f"Gap analysis failed: {e}")
+        raise
 
 # --- Entry Point ---
 if __name__ == "__main__":
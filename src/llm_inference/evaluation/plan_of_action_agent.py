@@ -3,11 +3,11 @@ import json
 import os
 import sys
 import re
+import time
 import asyncio
 from typing import List, TypedDict, Optional
 import argparse
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # --- Load Environment ---
 load_dotenv()
@@ -31,24 +31,33 @@ class PlanOfAction(TypedDict):
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 MODEL_NAME = "models/gemini-1.5-pro-latest"
 COMPANY_DATA_PATH = 'data/companydata.json'
-RFP_DATA_PATH = 'RAG/data/embedding.json'
+# Approximate token budget for the RFP excerpt sent to the model
+RFP_CONTEXT_TOKENS = int(os.environ.get("PLAN_OF_ACTION_RFP_CONTEXT_TOKENS", "3000"))
+RFP_CONTEXT_QUERIES = [
+    "project schedule timeline milestones deadlines",
+    "proposal due date submission instructions questions deadline",
+    "deliverables scope of services reports",
+    "required documents forms certifications attachments",
+    "evaluation criteria selection process award",
+    "insurance licenses registration required before contract award",
+]
 
 # --- Gemini Setup ---
 if not GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY not set in environment.")
     sys.exit(1)
 
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel(MODEL_NAME)
-except Exception as e:
-    logger.error(f"Gemini setup failed: {e}")
-    sys.exit(1)
-
 # --- Project Root Fix ---
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
 sys.path.append(project_root)
 
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.rfp_context import RfpContext, select_rfp_context, log_prompt_stats
+from src.llm_inference.utils.workspace import Workspace
+
+# Where the RAG server writes the RFP text when an upload has no job workspace
+RFP_DATA_PATH = Workspace.shared().rfp_path
+
 # --- Load JSON ---
 def load_json(file_path: str) -> dict:
     try:
@@ -92,9 +101,8 @@ Return JSON in this format:
 """
 
 # --- Parse Response ---
-def parse_plan_response(response) -> PlanOfAction:
+def parse_plan_response(text: str) -> PlanOfAction:
     try:
-        text = response.text if hasattr(response, "text") else getattr(response, "candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
         match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*?\})', text, re.DOTALL)
         json_str = match.group(1) or match.group(2) if match else None
 
@@ -107,44 +115,49 @@ def parse_plan_response(response) -> PlanOfAction:
         raise
 
 # --- Core Evaluation Function ---
-async def generate_plan_of_action(company_data: str, rfp_data: str) -> PlanOfAction:
+async def generate_plan_of_action(company_data: str, rfp_context: RfpContext) -> PlanOfAction:
     prompt = PLAN_OF_ACTION_PROMPT.format(
         company_data=company_data,
-        rfp_data=rfp_data,
+        rfp_data=rfp_context.text,
     )
 
     try:
-        response = await gemini_model.generate_content_async(prompt)
-        return parse_plan_response(response)
+        started = time.perf_counter()
+        response_text = await gemini_client.generate_content(prompt, MODEL_NAME, validate=parse_plan_response)
+        log_prompt_stats("plan_of_action", prompt, rfp_context, time.perf_counter() - started)
+        return parse_plan_response(response_text)
     except Exception as e:
         logger.error(f"Error generating plan of action: {e}")
         raise
 
 # --- Main ---
-async def main(rfp_file: Optional[str] = None):
+async def main(rfp_file: Optional[str] = None, workspace: Optional[Workspace] = None):
     logger.info("Starting Plan of Action Agent...")
+    started = time.perf_counter()
 
     try:
         company = load_json(COMPANY_DATA_PATH)
-        rfp = load_json(rfp_file or RFP_DATA_PATH)
+        rfp = load_json(rfp_file or (workspace.rfp_path if workspace else RFP_DATA_PATH))
     except Exception as e:
         logger.error(f"Input data loading failed: {e}")
-        return
+        raise
 
     company_str = json.dumps(company, indent=2)
-    rfp_str = json.dumps(rfp, indent=2)
+    rfp_context = await select_rfp_context(rfp, RFP_CONTEXT_QUERIES,
+                                           RFP_CONTEXT_TOKENS, "plan_of_action")
 
     try:
-        result = await generate_plan_of_action(company_str, rfp_str)
+        result = await generate_plan_of_action(company_str, rfp_context)
 
-        output_path = os.path.join(project_root, 'data/plan_of_action_output.json')
+        output_path = (workspace or Workspace.shared()).path('plan_of_action_output.json')
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(result, f, indent=2, ensure_ascii=False)
 
-        logger.info("Plan of Action generated successfully.")
+        logger.info(f"Plan of Action generated successfully in {time.perf_counter() - started:.2f}s.")
         print("\nPlan of Action Result:\n", json.dumps(result, indent=2))
     except Exception as e:
         logger.error(f"Agent execution failed: {e}")
+        raise
 
 # --- Entry Point ---
 if __name__ == "__main__":
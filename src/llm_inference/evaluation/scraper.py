@@ -4,10 +4,12 @@ import json
 import logging
 import asyncio
 import re
+import time
+import argparse
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
 import requests
 from bs4 import BeautifulSoup
-import google.generativeai as genai
 from fpdf import FPDF
 
 # --- Helper to remove emojis and non-latin characters ---
@@ -16,7 +18,7 @@ def remove_emojis(text):
 
 # --- Logging ---
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-logger = logging.getLogger(_name_)
+logger = logging.getLogger(__name__)
 
 # --- Load ENV ---
 load_dotenv()
@@ -24,22 +26,42 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     logger.error("Missing GEMINI_API_KEY in environment.")
     sys.exit(1)
-genai.configure(api_key=GEMINI_API_KEY)
 
 # --- Model ---
-model = genai.GenerativeModel("gemini-2.0-flash")
+MODEL_NAME = "gemini-2.0-flash"
+# Tenders packed into one scoring prompt (1 = one prompt per tender) and batches in flight
+TENDER_BATCH_SIZE = int(os.getenv("TENDER_BATCH_SIZE", "10"))
+TENDER_SCORING_CONCURRENCY = int(os.getenv("TENDER_SCORING_CONCURRENCY", "4"))
+# Seconds between polls in watch mode
+TENDER_WATCH_INTERVAL = float(os.getenv("TENDER_WATCH_INTERVAL", "900"))
 
 # --- Load Company Profile ---
-project_root = os.path.abspath(os.path.join(os.path.dirname(_file_), "../../../"))
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../"))
+sys.path.append(project_root)
+
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.tender_filter import TenderPrefilter, TENDER_FILTER_ENABLED
+from src.llm_inference.utils.tender_crawler import TenderCrawler, TenderStateStore
+from src.llm_inference.utils.tender_results import TenderResultsStore
+from src.llm_inference.utils.tender_table import is_tender_header, parse_tender_rows
+
 company_data_path = os.path.join(project_root, "data", "companydata.json")
 try:
     with open(company_data_path, "r") as f:
         company_data = json.load(f)
-        company_data_str = json.dumps(company_data, indent=2)
 except Exception as e:
     logger.error(f"Error loading company profile: {e}")
     sys.exit(1)
 
+# Every scoring prompt starts with this exact text, so the profile is rendered
+# once and the provider can reuse its cached prefix across tenders and batches
+COMPANY_PROFILE_PREFIX = f"""
+You are TenderScout, an expert tender evaluation assistant.
+
+Company Profile:
+{json.dumps(company_data, separators=(",", ":"))}
+"""
+
 # --- PDF Generator ---
 def generate_pdf_report(matching, filename="relevant_tenders_report.pdf"):
     pdf = FPDF()
@@ -75,54 +97,47 @@ def find_real_tender_table(soup):
         rows = table.find_all("tr")
         for row in rows[:2]:
             text = row.get_text(" ", strip=True).lower()
-            if (
-                "tender title" in text
-                and "organisation" in text
-                and ("closing date" in text or "due date" in text)
-            ):
+            if is_tender_header(text):
                 logger.info(f"Detected Tender Table #{idx}")
                 return table
     return None
 
-# --- Scrape Tender Data ---
-def scrape_tenders(limit=10):
-    try:
-        url = "https://eprocure.gov.in/eprocure/app?action=latestActiveTenders"
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        table = find_real_tender_table(soup)
-        if not table:
-            logger.warning("Could not find tender table.")
-            return []
-
-        tenders = []
-        for row in table.find_all("tr")[1:]:
-            cols = row.find_all("td")
-            if len(cols) >= 6:
-                tender = {
-                    "organization": cols[0].get_text(strip=True),
-                    "title": cols[1].get_text(strip=True),
-                    "ref_no": cols[2].get_text(strip=True),
-                    "due_date": cols[5].get_text(strip=True),
-                }
-                tenders.append(tender)
-                if len(tenders) >= limit:
-                    break
-
-        return tenders
-    except Exception as e:
-        logger.error(f"Error scraping tenders: {e}")
+# --- Parse Tender Table ---
+def parse_tender_table(html: str, limit: Optional[int] = None) -> List[dict]:
+    """Streaming parse that stops at the end of the tender table; same output as the soup parser."""
+    tenders = parse_tender_rows(html, limit)
+    if tenders is None:
+        logger.warning("Could not find tender table.")
         return []
+    return tenders
 
-# --- Prompt Builder ---
-def build_prompt(company: str, tender: dict) -> str:
-    return f"""
-You are TenderScout, an expert tender evaluation assistant.
+def parse_tender_table_soup(html: str, limit: Optional[int] = None) -> List[dict]:
+    soup = BeautifulSoup(html, "html.parser")
 
-Company Profile:
-{company}
+    table = find_real_tender_table(soup)
+    if not table:
+        logger.warning("Could not find tender table.")
+        return []
+
+    tenders = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) >= 6:
+            tender = {
+                "organization": cols[0].get_text(strip=True),
+                "title": cols[1].get_text(strip=True),
+                "ref_no": cols[2].get_text(strip=True),
+                "due_date": cols[5].get_text(strip=True),
+            }
+            tenders.append(tender)
+            if limit is not None and len(tenders) >= limit:
+                break
 
+    return tenders
+
+# --- Prompt Builder ---
+def build_prompt(company: str, tender: dict) -> str:
+    return f"""{company}
 Evaluate the following tender:
 
 Organization: {tender['organization']}
@@ -139,6 +154,31 @@ Is this relevant to the company? Reply in JSON:
 }}
 """
 
+def build_batch_prompt(company: str, tenders: List[dict]) -> str:
+    """One prompt scoring several tenders; verdicts come back keyed by `id`."""
+    listing = "\n".join(
+        f"[{i}] Organization: {t['organization']} | Title: {t['title']} | "
+        f"Reference No: {t['ref_no']} | Due Date: {t['due_date']}"
+        for i, t in enumerate(tenders)
+    )
+    return f"""{company}
+Evaluate each of the following {len(tenders)} tenders independently:
+
+{listing}
+
+Is each tender relevant to the company? Reply with a JSON array holding exactly
+one object per tender, in the same order:
+[
+  {{
+    "id": int (the number in brackets),
+    "is_relevant": true/false,
+    "score": float between 0 and 1,
+    "reason": string,
+    "recommendations": [string]
+  }}
+]
+"""
+
 # --- Parse Gemini JSON ---
 def parse_json_response(text: str) -> dict:
     try:
@@ -147,12 +187,94 @@ def parse_json_response(text: str) -> dict:
     except Exception as e:
         return {"error": str(e)}
 
+def parse_batch_response(text: str, count: int) -> List[Optional[dict]]:
+    """Verdicts for ids `0..count-1`; None where the model skipped or garbled one."""
+    verdicts: List[Optional[dict]] = [None] * count
+    try:
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        items = json.loads(match.group()) if match else []
+    except Exception as e:
+        logger.warning(f"Could not parse batch response: {e}")
+        return verdicts
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("id", position)
+        if isinstance(index, int) and 0 <= index < count and verdicts[index] is None:
+            verdicts[index] = item
+    return verdicts
+
+def check_json_response(text: str) -> None:
+    """Raises unless `text` holds a verdict, so a garbled answer is never cached."""
+    result = parse_json_response(text)
+    if "error" in result:
+        raise ValueError(result["error"])
+
+def check_batch_response(count: int) -> Callable[[str], None]:
+    def check(text: str) -> None:
+        if None in parse_batch_response(text, count):
+            raise ValueError(f"Batch answer is missing verdicts for some of its {count} tenders")
+    return check
+
+# --- Scoring ---
+async def score_tender(tender: dict, client=gemini_client) -> dict:
+    try:
+        text = await client.generate_content(build_prompt(COMPANY_PROFILE_PREFIX, tender), MODEL_NAME,
+                                             validate=check_json_response)
+        result = parse_json_response(text)
+    except Exception as e:
+        result = {"error": str(e)}
+    result["tender"] = tender
+    return result
+
+async def score_batch(tenders: List[dict], client=gemini_client, retry_missed: bool = True) -> List[dict]:
+    if len(tenders) == 1:
+        return [await score_tender(tenders[0], client)]
+    try:
+        text = await client.generate_content(build_batch_prompt(COMPANY_PROFILE_PREFIX, tenders), MODEL_NAME,
+                                             validate=check_batch_response(len(tenders)))
+        verdicts = parse_batch_response(text, len(tenders))
+    except Exception as e:
+        logger.error(f"Batch scoring failed: {e}")
+        return [{"error": str(e), "tender": t} for t in tenders]
+
+    # Re-ask once for just the tenders the batch answer missed, as one smaller batch
+    missed = [tender for tender, verdict in zip(tenders, verdicts) if verdict is None]
+    retried = iter(await score_batch(missed, client, retry_missed=False) if missed and retry_missed else [])
+    results = []
+    for tender, verdict in zip(tenders, verdicts):
+        if verdict is None:
+            results.append(next(retried, {"error": "Missing from the batch answer", "tender": tender}))
+        else:
+            verdict["tender"] = tender
+            results.append(verdict)
+    return results
+
+async def score_tenders(tenders: List[dict], batch_size: int = TENDER_BATCH_SIZE,
+                        concurrency: int = TENDER_SCORING_CONCURRENCY,
+                        client=gemini_client) -> List[dict]:
+    """Score `tenders` in batches of `batch_size`, at most `concurrency` batches at a time."""
+    batch_size = max(1, batch_size)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(batch: List[dict]) -> List[dict]:
+        async with semaphore:
+            return await score_batch(batch, client)
+
+    started = time.perf_counter()
+    batches = [tenders[i:i + batch_size] for i in range(0, len(tenders), batch_size)]
+    scored = await asyncio.gather(*(run(batch) for batch in batches))
+    results = [result for batch in scored for result in batch]
+    logger.info(f"Scored {len(tenders)} tenders in {len(batches)} batch(es) of up to {batch_size} "
+                f"in {time.perf_counter() - started:.2f}s")
+    return results
+
 def send_pdf_to_server(pdf_path):
     try:
         with open(pdf_path, 'rb') as f:
             files = {'file': f}
             # Replace this with your actual frontend domain
-            response = requests.post('http://localhost:3000/api/upload-pdf', files=files)
+            response = requests.post('http://localhost:3000/api/upload-pdf', files=files, timeout=30)
             if response.status_code == 200:
                 logger.info("✅ PDF successfully sent to frontend")
             else:
@@ -160,24 +282,74 @@ def send_pdf_to_server(pdf_path):
     except Exception as e:
         logger.error(f"❌ Error sending PDF: {e}")
 
+async def publish_report(matching: List[dict], filename: str = "relevant_tenders_report.pdf") -> None:
+    """Render the report and send it to the frontend; both block, so they run on a thread."""
+    await asyncio.to_thread(generate_pdf_report, matching, filename)
+    await asyncio.to_thread(send_pdf_to_server, filename)
 
-# --- Main Runner ---
-async def run_evaluation():
-    tenders = scrape_tenders(limit=10)
+
+# --- Crawl Tender Listing ---
+async def crawl_tenders(store: Optional[TenderStateStore] = None, **crawler_options):
+    """New or changed tenders across the listing pages since the last recorded run."""
+    crawler = TenderCrawler(parse_tender_table, store=store, **crawler_options)
+    try:
+        return await crawler.crawl()
+    except Exception as e:
+        logger.error(f"Error crawling tenders: {e}")
+        return None
+
+# --- Evaluate New Tenders ---
+async def evaluate_new_tenders(store: TenderStateStore, results_store: TenderResultsStore,
+                               limit: Optional[int] = None, prefilter: Optional[TenderPrefilter] = None):
+    """`(crawl, results, skipped)` for up to `limit` new or changed tenders; the rest wait for the next run.
+
+    Verdicts are saved to `results_store` before the tenders are marked seen,
+    so a tender is never settled without its verdict on `/tenders`. Tenders the
+    pre-filter skips are kept apart in `store` instead, and are offered again
+    here once the pre-filter's settings change (or it is turned off).
+    """
+    crawl = await crawl_tenders(store)
+    if crawl is None:
+        return None, [], []
+
+    # Obviously irrelevant tenders never reach the LLM, when the pre-filter is on
+    if prefilter is None and TENDER_FILTER_ENABLED:
+        prefilter = TenderPrefilter(company_data)
+    settings = prefilter.settings_id if prefilter else None
+    changed_refs = {t["ref_no"] for t in crawl.changed}
+    rescored = [t for t in store.prefiltered(settings) if t["ref_no"] not in changed_refs]
+    candidates = crawl.changed + rescored
+    tenders = candidates[:limit] if limit is not None else candidates
     if not tenders:
-        logger.warning("No tenders to evaluate.")
-        return
+        store.record([], crawl.pages)
+        return crawl, [], []
 
-    results = []
-    for tender in tenders:
-        prompt = build_prompt(company_data_str, tender)
-        try:
-            response = model.generate_content(prompt)
-            result = parse_json_response(response.text)
-            result["tender"] = tender
-            results.append(result)
-        except Exception as e:
-            results.append({"error": str(e), "tender": tender})
+    tenders, skipped = prefilter.split(tenders) if prefilter else (tenders, [])
+    results = await score_tenders(tenders) if tenders else []
+    results_store.save(results)
+
+    # Only tenders with a verdict are marked seen; page validators are kept only
+    # when nothing on them is left over, otherwise a 304 would hide the leftovers
+    evaluated = [r["tender"] for r in results if "error" not in r]
+    if skipped:
+        store.record_prefiltered(skipped, settings)
+    settled = {t["ref_no"] for t in evaluated + skipped}
+    store.record(evaluated, crawl.pages if changed_refs <= settled else [])
+    return crawl, results, skipped
+
+# --- Main Runner ---
+async def run_evaluation(limit: Optional[int] = 10):
+    store = TenderStateStore()
+    results_store = TenderResultsStore()
+    crawl, results, skipped = await evaluate_new_tenders(store, results_store, limit)
+    if crawl is None:
+        return
+    if not results and not skipped:
+        logger.warning("No new or changed tenders to evaluate.")
+        return
+    if not results:
+        print(f"\n🚫 Pre-filter found no candidate tenders ({len(skipped)} skipped).\n")
+        return
 
     matching = [r for r in results if r.get("is_relevant", False)]
 
@@ -198,9 +370,63 @@ async def run_evaluation():
             print(f"       ➤ {rec}")
         print("-" * 70)
 
-    pdf_filename = "relevant_tenders_report.pdf"
-    generate_pdf_report(matching, pdf_filename)
-    send_pdf_to_server(pdf_filename)
+    await publish_report(matching)
+
+# --- Watch Mode ---
+async def run_watch_cycle(store: TenderStateStore, results_store: TenderResultsStore,
+                          prefilter: Optional[TenderPrefilter], limit: Optional[int] = None) -> Dict:
+    """One poll: crawl, evaluate what is new, store verdicts and the cycle's metrics."""
+    started = time.time()
+    clock = time.perf_counter()
+    metrics = {"started": started, "error": None}
+    try:
+        crawl, results, skipped = await evaluate_new_tenders(store, results_store, limit, prefilter)
+        if crawl is None:
+            raise RuntimeError("crawl failed")
+        relevant = [r for r in results if r.get("is_relevant", False)]
+        metrics.update(
+            pages_fetched=crawl.fetched, pages_not_modified=crawl.not_modified,
+            tenders_parsed=crawl.seen, tenders_new=len(crawl.changed),
+            evaluated=len(results), skipped=len(skipped), relevant=len(relevant),
+            errors=sum(1 for r in results if "error" in r),
+            crawl_seconds=round(crawl.seconds, 3),
+            eval_seconds=round(time.perf_counter() - clock - crawl.seconds, 3),
+        )
+        if relevant:
+            # The PDF covers this cycle's new finds; /tenders serves the full history
+            await publish_report(relevant)
+    except Exception as e:
+        logger.error(f"Watch cycle failed: {e}")
+        metrics["error"] = str(e)
+    metrics["seconds"] = round(time.perf_counter() - clock, 3)
+    results_store.record_cycle(metrics)
+    logger.info(f"Watch cycle: {metrics.get('tenders_parsed', 0)} parsed, {metrics.get('tenders_new', 0)} new, "
+                f"{metrics.get('evaluated', 0)} evaluated, {metrics.get('relevant', 0)} relevant "
+                f"in {metrics['seconds']:.2f}s")
+    return metrics
+
+async def watch(interval: float = TENDER_WATCH_INTERVAL, limit: Optional[int] = None,
+                cycles: Optional[int] = None):
+    """Polls every `interval` seconds (measured start to start) until cancelled or `cycles` ran."""
+    store = TenderStateStore()
+    results_store = TenderResultsStore()
+    prefilter = TenderPrefilter(company_data) if TENDER_FILTER_ENABLED else None
+    count = 0
+    while cycles is None or count < cycles:
+        started = time.perf_counter()
+        await run_watch_cycle(store, results_store, prefilter, limit)
+        count += 1
+        if cycles is None or count < cycles:
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
 
-if _name_ == "_main_":
-    asyncio.run(run_evaluation())
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find tenders relevant to the company profile.")
+    parser.add_argument("--watch", action="store_true", help="Keep polling for new tenders.")
+    parser.add_argument("--interval", type=float, default=TENDER_WATCH_INTERVAL, help="Seconds between polls.")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Most new tenders evaluated per run (default: 10 one-shot, all when watching).")
+    args = parser.parse_args()
+    if args.watch:
+        asyncio.run(watch(args.interval, args.limit))
+    else:
+        asyncio.run(run_evaluation(args.limit if args.limit is not None else 10))
@@ -1,30 +1,77 @@
 # main.py
 
 import os
+import sys
+import time
 import asyncio
+import argparse
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+sys.path.append(project_root)
+
 # Import async main functions from agents
 from evaluation.eligilibity_agent import main as eligibility_main
 from evaluation.compliance_agent import main as compliance_main
 from evaluation.gap_analysis_agent import main as poa_main
 from evaluation.checklist_agent import main as checklist_main
+from src.llm_inference.utils.dag import Stage, StageTiming, run_dag, format_timing_report
+from src.llm_inference.utils.gemini import gemini_client
+from src.llm_inference.utils.workspace import Workspace
+
+# Upper bound on agents (and so LLM calls) running at the same time
+AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", "3"))
+
+
+def build_stages(rfp_path: Optional[str] = None, workspace: Optional[Workspace] = None,
+                 on_token: Optional[Callable[[str], None]] = None) -> List[Stage]:
+    """Eligibility, compliance and gap analysis are independent; the checklist
+    reads all three outputs, so it starts as soon as the last of them is written.
 
+    With a `workspace`, every agent reads the RFP from it and writes its output
+    into it, so runs for different jobs can overlap. With `on_token`, the
+    checklist is streamed from the model and each piece is passed to it.
+    """
+    return [
+        Stage("eligibility", lambda: eligibility_main(rfp_path, workspace)),
+        Stage("compliance", lambda: compliance_main(rfp_path, workspace)),
+        Stage("gap_analysis", lambda: poa_main(rfp_path, workspace)),
+        Stage("checklist", lambda: checklist_main(workspace, on_token),
+              deps=("eligibility", "compliance", "gap_analysis")),
+    ]
 
-async def run_agents():
-    print("Running Eligibility Agent...")
-    await eligibility_main()
 
-    print("Running Compliance Agent...")
-    await compliance_main()
+async def run_agents(rfp_path: Optional[str] = None,
+                     on_event: Optional[Callable[[str, str], None]] = None,
+                     workspace: Optional[Workspace] = None,
+                     on_token: Optional[Callable[[str], None]] = None) -> Dict[str, StageTiming]:
+    """Runs the agent DAG on the RFP at `rfp_path` (default: the workspace's, else each agent's own path)."""
+    stages = build_stages(rfp_path, workspace, on_token)
+    print(f"Running {len(stages)} agents (up to {AGENT_CONCURRENCY} at a time)...")
+    started = time.perf_counter()
+    # Counted per run: the server runs several jobs' agents on the same client at once
+    with gemini_client.track_usage() as usage:
+        timings = await run_dag(stages, max_concurrency=AGENT_CONCURRENCY, on_event=on_event)
+    print("\nAgent timing report:")
+    print(format_timing_report(stages, timings, time.perf_counter() - started))
+    print("\nLLM gateway metrics (this run):")
+    for model_name, counters in usage.models.items():
+        print(f"  {model_name}: " + ", ".join(f"{k}={v}" for k, v in counters.items()))
+    print(f"\nLLM response cache (this run): {usage.cache_hits} hits, {usage.cache_misses} misses, "
+          f"~{usage.saved_seconds:.2f}s of model latency saved")
+    return timings
 
-    print("Running  Gap Analysis Agent...")
-    await poa_main()
 
-    print("Running Checklist Agent...")
-    await checklist_main()
 if __name__ == "__main__":
-    asyncio.run(run_agents())
+    parser = argparse.ArgumentParser(description="Run the RFP evaluation agents.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached LLM responses and refresh them.")
+    parser.add_argument("--job", help="Re-run the agents in this upload job's workspace.")
+    args = parser.parse_args()
+    if args.no_cache:
+        gemini_client.cache_bypass = True
+    asyncio.run(run_agents(workspace=Workspace.for_job(args.job) if args.job else None))
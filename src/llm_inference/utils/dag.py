@@ -0,0 +1,150 @@
+"""Minimal async DAG scheduler for the evaluation agents.
+
+Each `Stage` names the stages it depends on. Every stage becomes a task that
+waits for its dependencies and then for a slot in a shared semaphore, so
+independent agents overlap (up to `max_concurrency` LLM calls at a time) and a
+dependent stage starts the moment its last input is ready rather than after
+a fixed barrier. A stage whose dependency failed is skipped.
+"""
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(NamedTuple):
+    """One node of the DAG.
+
+    A stage fails only when `run` raises; returning normally counts as "ok"
+    even if nothing was produced. Callables that catch their own errors to
+    log them must re-raise, or their dependents run on missing inputs.
+    """
+    name: str
+    run: Callable[[], Awaitable]
+    deps: Tuple[str, ...] = ()
+
+
+class StageTiming(NamedTuple):
+    name: str
+    status: str      # "ok", "failed" or "skipped"
+    ready: float     # seconds from start until all dependencies finished
+    start: float     # seconds from start until the stage got a slot
+    end: float
+    error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+def _check_graph(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Stage names must be unique")
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+
+    # Kahn's algorithm: every stage must be reachable without a cycle
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {', '.join(sorted(remaining))}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+async def run_dag(stages: Sequence[Stage], max_concurrency: int = 3,
+                  on_event: Optional[Callable[[str, str], None]] = None) -> Dict[str, StageTiming]:
+    """Run `stages` respecting their dependencies; returns a timing per stage.
+
+    `on_event(stage_name, status)` is called when a stage starts ("started")
+    and when it ends ("ok", "failed" or "skipped").
+    """
+    _check_graph(stages)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    started = time.perf_counter()
+    tasks: Dict[str, asyncio.Task] = {}
+    timings: Dict[str, StageTiming] = {}
+
+    def elapsed() -> float:
+        return time.perf_counter() - started
+
+    def notify(name: str, status: str) -> None:
+        if on_event is not None:
+            try:
+                on_event(name, status)
+            except Exception as e:
+                logger.warning(f"Stage event handler failed for '{name}': {e}")
+
+    async def run_stage(stage: Stage) -> bool:
+        upstream = await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        ready = elapsed()
+        if not all(upstream):
+            failed = [dep for dep, ok in zip(stage.deps, upstream) if not ok]
+            logger.warning(f"Skipping stage '{stage.name}': upstream stage(s) {', '.join(failed)} failed")
+            timings[stage.name] = StageTiming(stage.name, "skipped", ready, ready, ready)
+            notify(stage.name, "skipped")
+            return False
+
+        async with semaphore:
+            start = elapsed()
+            notify(stage.name, "started")
+            try:
+                await stage.run()
+            except Exception as e:
+                logger.error(f"Stage '{stage.name}' failed: {e}")
+                timings[stage.name] = StageTiming(stage.name, "failed", ready, start, elapsed(), str(e))
+                notify(stage.name, "failed")
+                return False
+        timings[stage.name] = StageTiming(stage.name, "ok", ready, start, elapsed())
+        notify(stage.name, "ok")
+        return True
+
+    # Tasks are created in dependency order, so each stage can look up its upstream tasks
+    pending = list(stages)
+    while pending:
+        for stage in list(pending):
+            if all(dep in tasks for dep in stage.deps):
+                tasks[stage.name] = asyncio.create_task(run_stage(stage))
+                pending.remove(stage)
+    await asyncio.gather(*tasks.values())
+    return {stage.name: timings[stage.name] for stage in stages}
+
+
+def critical_path(stages: Sequence[Stage], timings: Dict[str, StageTiming]) -> Tuple[List[str], float]:
+    """Longest chain of stage durations through the DAG (the lower bound on wall time)."""
+    by_name = {stage.name: stage for stage in stages}
+    memo: Dict[str, Tuple[List[str], float]] = {}
+
+    def longest(name: str) -> Tuple[List[str], float]:
+        if name not in memo:
+            best: Tuple[List[str], float] = ([], 0.0)
+            for dep in by_name[name].deps:
+                path = longest(dep)
+                if path[1] > best[1]:
+                    best = path
+            memo[name] = (best[0] + [name], best[1] + timings[name].seconds)
+        return memo[name]
+
+    return max((longest(stage.name) for stage in stages), key=lambda path: path[1])
+
+
+def format_timing_report(stages: Sequence[Stage], timings: Dict[str, StageTiming],
+                         wall_seconds: float) -> str:
+    lines = [f"{'stage':<16}{'status':<9}{'ready':>8}{'start':>8}{'end':>8}{'seconds':>9}"]
+    for stage in stages:
+        t = timings[stage.name]
+        lines.append(f"{t.name:<16}{t.status:<9}{t.ready:>8.2f}{t.start:>8.2f}{t.end:>8.2f}{t.seconds:>9.2f}")
+    path, path_seconds = critical_path(stages, timings)
+    serial_seconds = sum(t.seconds for t in timings.values())
+    lines.append(f"wall {wall_seconds:.2f}s | serial sum {serial_seconds:.2f}s | "
+                 f"critical path {' -> '.join(path)} {path_seconds:.2f}s")
+    return "\n".join(lines)
@@ -1,20 +1,513 @@
+"""Process-wide gateway for the Gemini models used by the evaluation agents.
+
+Agents call `gemini_client.generate_content(prompt, model_name)` instead of
+building their own `GenerativeModel`s, so one process configures the API
+once and keeps one model object per model name. Models with a native
+`generate_content_async` are awaited directly; models that only offer the
+blocking `generate_content` run on a bounded thread pool, so a slow call
+never blocks the event loop and concurrent agents really overlap.
+
+Every call goes through a per-model lane:
+
+- a token bucket caps the request rate (`LLM_REQUESTS_PER_MINUTE`, with
+  per-model overrides in `LLM_RATE_LIMITS="gemini-1.5-pro=2,gemini-2.0-flash=15"`)
+- an AIMD limit caps requests in flight: it grows by about one per window of
+  successful calls and halves on 429/503
+- 429 and 5xx responses are retried with full-jitter exponential backoff
+
+`gemini_client.metrics()` reports queue depth, in-flight requests, the
+current concurrency limit and retry counts per model, over the life of the
+process. Inside `with gemini_client.track_usage() as usage:`, the calls made
+by that block (and the tasks it starts) are also counted in `usage`, so one
+run's report is not mixed with other runs sharing the client.
+
+`gemini_client.stream_content(prompt, model_name)` yields the answer in
+pieces as the model generates it, for callers that show output while it is
+being written. It goes through the same lane; a stream is only retried if it
+failed before its first piece.
+
+Responses of the shared `gemini_client` are cached on disk by model and
+prompt hash (see `response_cache.py`); `LLM_CACHE_BYPASS=1` skips lookups
+and refreshes the stored answers. Callers that parse the answer pass their
+parser as `validate`: an answer is only stored once it parses, and a cached
+answer that no longer does is evicted and asked again, so one malformed reply
+does not fail every re-run until it expires.
+
+Set `LLM_TRANSPORT=rest` and `LLM_API_ENDPOINT=http://127.0.0.1:8080` to send
+requests to a local fake server instead of Google.
+"""
 import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from functools import partial
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from src.llm_inference.utils.response_cache import ResponseCache
+
 load_dotenv()
 
-class GeminiClient:
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-2.5-pro-exp-03-25'
+# Threads available to models without a native async API
+LLM_MAX_THREADS = int(os.getenv("LLM_MAX_THREADS", "8"))
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT")        # None (gRPC) or "rest"
+LLM_API_ENDPOINT = os.getenv("LLM_API_ENDPOINT")  # e.g. a local fake server
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+LLM_BURST = int(os.getenv("LLM_BURST", "4"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(project_root, "data", "llm_response_cache.sqlite3"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+OVERLOAD_STATUS = {429, 503}
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """`"model-a=15,model-b=2"` -> requests per minute per model."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rpm = item.partition("=")
+        limits[name.strip()] = float(rpm)
+    return limits
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a google.api_core error (gRPC errors map to one too)."""
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def chunk_text(chunk) -> str:
+    """Text of one streamed response chunk; the closing chunk may carry none."""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+# ===== Throttles =====
+class TokenBucket:
+    """Allows `rate` requests per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """Concurrency limit with additive increase and multiplicative decrease."""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1, decrease: float = 0.5):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop = None
+
+    def _check_loop(self) -> None:
+        # Waiters belong to one event loop; a new asyncio.run() starts clean
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._waiters.clear()
+            self.in_flight = 0
+
+    async def acquire(self) -> None:
+        self._check_loop()
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = self._loop.create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(None)  # woken and cancelled at once: hand the slot on
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, overloaded: Optional[bool]) -> None:
+        """Free a slot; `overloaded` True shrinks the limit, False grows it, None keeps it."""
+        self.in_flight = max(0, self.in_flight - 1)
+        if overloaded:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+        elif overloaded is False:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class ModelLane:
+    """Throttles and counters for one model."""
+
+    def __init__(self, rpm: float, burst: int, initial_concurrency: int, max_concurrency: int):
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.limiter = AIMDLimiter(initial_concurrency, max_concurrency)
+        self.queued = 0
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0  # 429 responses
+
+    def metrics(self) -> Dict:
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.limiter.in_flight,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
+
+
+# ===== Per-Run Usage =====
+LANE_COUNTERS = ("requests", "succeeded", "failed", "retries", "throttled")
+
+
+class RunUsage:
+    """Counters for the calls made inside one `GeminiClient.track_usage()` block."""
+
     def __init__(self):
+        self.models: Dict[str, Dict[str, int]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.saved_seconds = 0.0
+
+    def count(self, model_name: str, field: str) -> None:
+        counters = self.models.setdefault(model_name, dict.fromkeys(LANE_COUNTERS, 0))
+        counters[field] += 1
+
+
+# Tasks copy the context they are created in, so agents started inside a
+# `track_usage()` block count into the same `RunUsage`
+_run_usage: ContextVar[Optional[RunUsage]] = ContextVar("llm_run_usage", default=None)
+
+
+# ===== Client =====
+class GeminiClient:
+    def __init__(self, model_name: str = DEFAULT_MODEL,
+                 model_factory: Optional[Callable[[str], object]] = None,
+                 max_threads: int = LLM_MAX_THREADS,
+                 transport: Optional[str] = LLM_TRANSPORT,
+                 api_endpoint: Optional[str] = LLM_API_ENDPOINT,
+                 requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 burst: int = LLM_BURST,
+                 initial_concurrency: int = LLM_INITIAL_CONCURRENCY,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE,
+                 backoff_max: float = LLM_BACKOFF_MAX,
+                 response_cache: Optional[ResponseCache] = None,
+                 cache_bypass: bool = LLM_CACHE_BYPASS):
         self.api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro-exp-03-25')
+        self._call_options = {}
+        if model_factory is None:
+            options = {"api_key": self.api_key}
+            if transport:
+                options["transport"] = transport
+            if api_endpoint:
+                options["client_options"] = {"api_endpoint": api_endpoint}
+            genai.configure(**options)
+            model_factory = genai.GenerativeModel
+            # Retries are ours; the library's own retry on 503 would hide them from the limiter
+            self._call_options = {"request_options": {"retry": None}}
+        self.default_model = model_name
+        # The REST transport has no working async API, so it always goes through threads
+        self.native_async = transport != "rest"
+        self.requests_per_minute = requests_per_minute
+        self.rate_limits = rate_limits if rate_limits is not None else parse_rate_limits(LLM_RATE_LIMITS)
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.response_cache = response_cache
+        self.cache_bypass = cache_bypass
+        self._model_factory = model_factory
+        self._models: Dict[str, object] = {}
+        self._lanes: Dict[str, ModelLane] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="llm")
+        self.model = self.get_model(model_name)
 
-    async def generate_content(self, prompt: str) -> str:
+    def get_model(self, model_name: Optional[str] = None):
+        """The shared model object for `model_name`, created on first use."""
+        model_name = model_name or self.default_model
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self._model_factory(model_name)
+            return self._models[model_name]
+
+    def lane(self, model_name: str) -> ModelLane:
+        with self._lock:
+            if model_name not in self._lanes:
+                rpm = self.rate_limits.get(model_name, self.requests_per_minute)
+                self._lanes[model_name] = ModelLane(rpm, self.burst, self.initial_concurrency,
+                                                    self.max_concurrency)
+            return self._lanes[model_name]
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: lane.metrics() for name, lane in self._lanes.items()}
+
+    @contextmanager
+    def track_usage(self) -> Iterator[RunUsage]:
+        """Counts the calls made inside the block (and the tasks it starts) into a fresh `RunUsage`."""
+        usage = RunUsage()
+        token = _run_usage.set(usage)
         try:
-            response = await self.model.generate_content_async(prompt)
-            return response.text
+            yield usage
+        finally:
+            _run_usage.reset(token)
+
+    @staticmethod
+    def _count(lane: ModelLane, model_name: str, field: str) -> None:
+        setattr(lane, field, getattr(lane, field) + 1)
+        usage = _run_usage.get()
+        if usage is not None:
+            usage.count(model_name, field)
+
+    @staticmethod
+    def _cached(cache: ResponseCache, model_name: str, prompt: str) -> Optional[str]:
+        entry = cache.lookup(model_name, prompt)
+        usage = _run_usage.get()
+        if usage is not None:
+            if entry is None:
+                usage.cache_misses += 1
+            else:
+                usage.cache_hits += 1
+                usage.saved_seconds += entry[1]
+        return entry[0] if entry is not None else None
+
+    @staticmethod
+    def _accepted(validate: Optional[Callable[[str], object]], text: str) -> bool:
+        if validate is None:
+            return True
+        try:
+            validate(text)
+            return True
         except Exception as e:
-            raise RuntimeError(f"Gemini API error: {str(e)}")
+            logger.warning(f"Not caching a response its caller rejected: {e}")
+            return False
+
+    async def _call(self, model, prompt: str):
+        if self.native_async and hasattr(model, "generate_content_async"):
+            return await model.generate_content_async(prompt, **self._call_options)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(model.generate_content, prompt, **self._call_options)
+        )
+
+    async def generate_content(self, prompt: str, model_name: Optional[str] = None,
+                               use_cache: bool = True,
+                               validate: Optional[Callable[[str], object]] = None) -> str:
+        """The model's answer to `prompt`; `validate` (raising on a bad answer) gates the cache."""
+        model_name = model_name or self.default_model
+        cache = self.response_cache if use_cache else None
+        if cache is not None and not self.cache_bypass:
+            cached = self._cached(cache, model_name, prompt)
+            if cached is not None:
+                if self._accepted(validate, cached):
+                    return cached
+                cache.delete(model_name, prompt)
+
+        started = time.perf_counter()
+        text = await self._generate(prompt, model_name)
+        if cache is not None and text and self._accepted(validate, text):
+            cache.put(model_name, prompt, text, time.perf_counter() - started)
+        return text
+
+    async def _generate(self, prompt: str, model_name: str) -> str:
+        model = self.get_model(model_name)
+        lane = self.lane(model_name)
+        self._count(lane, model_name, "requests")
+
+        for attempt in range(self.max_retries + 1):
+            lane.queued += 1
+            try:
+                await lane.bucket.acquire()
+                await lane.limiter.acquire()
+            finally:
+                lane.queued -= 1
+
+            overloaded = None
+            try:
+                response = await self._call(model, prompt)
+                text = response.text
+                overloaded = False
+                self._count(lane, model_name, "succeeded")
+                return text
+            except Exception as e:
+                overloaded = True if error_status(e) in OVERLOAD_STATUS else None
+                delay = self._retry_delay(lane, model_name, e, attempt)
+            finally:
+                lane.limiter.release(overloaded)
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, lane: ModelLane, model_name: str, error: Exception, attempt: int,
+                     retryable: bool = True) -> float:
+        """Backoff before the next attempt; raises when the call should not be retried."""
+        status = error_status(error)
+        if not retryable or status not in RETRYABLE_STATUS or attempt == self.max_retries:
+            self._count(lane, model_name, "failed")
+            raise RuntimeError(f"Gemini API error: {str(error)}") from error
+        self._count(lane, model_name, "retries")
+        if status == 429:
+            self._count(lane, model_name, "throttled")
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        logger.warning(f"{model_name}: HTTP {status}, retry {attempt + 1}/{self.max_retries} "
+                       f"in {delay:.2f}s (concurrency limit {lane.limiter.limit:.1f})")
+        return delay
+
+    # ----- Streaming -----
+    async def stream_content(self, prompt: str, model_name: Optional[str] = None,
+                             use_cache: bool = True,
+                             validate: Optional[Callable[[str], object]] = None) -> AsyncIterator[str]:
+        """Yields the answer in pieces as the model generates it; a cached answer comes as one piece.
+
+        The whole answer is checked with `validate` before it is cached, as in `generate_content`.
+        """
+        model_name = model_name or self.default_model
+        cache = self.response_cache if use_cache else None
+        if cache is not None and not self.cache_bypass:
+            cached = self._cached(cache, model_name, prompt)
+            if cached is not None:
+                if self._accepted(validate, cached):
+                    yield cached
+                    return
+                cache.delete(model_name, prompt)
+
+        started = time.perf_counter()
+        parts = []
+        async for text in self._stream(prompt, model_name):
+            parts.append(text)
+            yield text
+        text = "".join(parts)
+        if cache is not None and text and self._accepted(validate, text):
+            cache.put(model_name, prompt, text, time.perf_counter() - started)
+
+    async def _stream(self, prompt: str, model_name: str) -> AsyncIterator[str]:
+        model = self.get_model(model_name)
+        lane = self.lane(model_name)
+        self._count(lane, model_name, "requests")
+
+        for attempt in range(self.max_retries + 1):
+            lane.queued += 1
+            try:
+                await lane.bucket.acquire()
+                await lane.limiter.acquire()
+            finally:
+                lane.queued -= 1
+
+            overloaded = None
+            streamed = False
+            try:
+                async for text in self._stream_call(model, prompt):
+                    if text:
+                        streamed = True
+                        yield text
+                overloaded = False
+                self._count(lane, model_name, "succeeded")
+                return
+            except Exception as e:
+                overloaded = True if error_status(e) in OVERLOAD_STATUS else None
+                # Pieces already handed to the caller cannot be taken back
+                delay = self._retry_delay(lane, model_name, e, attempt, retryable=not streamed)
+            finally:
+                lane.limiter.release(overloaded)
+            await asyncio.sleep(delay)
+
+    async def _stream_call(self, model, prompt: str) -> AsyncIterator[str]:
+        if self.native_async and hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(prompt, stream=True, **self._call_options)
+            async for chunk in response:
+                yield chunk_text(chunk)
+            return
+
+        # Blocking streams are read on the thread pool and handed over piece by piece
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        # Set once the consumer stops reading, so the thread stops pulling chunks
+        stopped = threading.Event()
+
+        def put(item):
+            if not stopped.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        def produce():
+            try:
+                for chunk in model.generate_content(prompt, stream=True, **self._call_options):
+                    if stopped.is_set():
+                        break
+                    put(chunk_text(chunk))
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        reader = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stopped.set()
+        await reader
 
-gemini_client = GeminiClient()
\ No newline at end of file
+gemini_client = GeminiClient(
+    response_cache=ResponseCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_HOURS * 3600,
+                                 max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024))
+)
@@ -0,0 +1,129 @@
+"""In-memory cache of the agents' JSON outputs, for the data API.
+
+The dashboard polls for the checklist (and the other agents' outputs) far
+more often than the pipeline rewrites them. Each output is read and parsed
+once, serialized once, and kept as response bytes with an ETag and a
+Last-Modified date. A request then costs one `os.stat`: the cached entry is
+served while the file's (mtime, size) signature is unchanged, and reloaded
+as soon as it changes. Clients that send `If-None-Match` or
+`If-Modified-Since` get a 304 with no body.
+
+An output caught half-written by an agent fails to parse; the previous
+version is served until the write completes.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ===== Configuration =====
+OUTPUT_CACHE_MAX_ENTRIES = int(os.getenv("OUTPUT_CACHE_MAX_ENTRIES", "256"))  # files kept parsed
+
+# Outputs the data API serves, by the name used in its URLs
+OUTPUT_FILES = {
+    "checklist": "checklist_output.json",
+    "eligibility": "eligibility_output.json",
+    "compliance": "compliance_output.json",
+    "gap_analysis": "gap_analysis_output.json",
+    "plan_of_action": "plan_of_action_output.json",
+}
+# Only the standalone plan_of_action agent writes this, under data/; upload jobs
+# do not run it, and a job's plan of action is the checklist's "plan_of_action"
+SHARED_ONLY_OUTPUTS = {"plan_of_action"}
+
+
+class CachedOutput:
+    __slots__ = ("path", "signature", "body", "etag", "last_modified", "mtime")
+
+    def __init__(self, path: str, signature: Tuple[int, int], body: bytes):
+        self.path = path
+        self.signature = signature
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.mtime = signature[0] / 1e9
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Last-Modified": self.last_modified, "Cache-Control": "no-cache"}
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Whether a conditional request's validators still match this version."""
+        if if_none_match is not None:
+            # If-None-Match wins over If-Modified-Since when both are sent
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.mtime) <= since
+        return False
+
+
+class OutputCache:
+    """Parsed-and-serialized JSON files, revalidated against their mtime on every lookup."""
+
+    def __init__(self, max_entries: int = OUTPUT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedOutput]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, path: str) -> Optional[CachedOutput]:
+        """The current version of `path`, or None when the file does not exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            if entry is None:
+                raise
+            logger.warning(f"{path} is not valid JSON yet ({e}); serving the previous version")
+            return entry
+
+        # Same encoding as Starlette's JSONResponse, so clients see identical bodies
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None,
+                          separators=(",", ":")).encode("utf-8")
+        entry = CachedOutput(path, signature, body)
+        logger.info(f"Loaded {path} ({len(body)} bytes, last modified {entry.last_modified})")
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.loads += 1
+        return entry
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drops `path` (or everything) so the next lookup reloads it from disk."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "loads": self.loads}
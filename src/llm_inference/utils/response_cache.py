@@ -0,0 +1,120 @@
+"""Persistent LLM response cache keyed by model name and rendered-prompt hash.
+
+Re-running the agents on the same RFP and `companydata.json` renders exactly
+the same prompts, so a response is looked up by `(model, sha256(prompt))`
+before the model is called. Entries expire after `ttl_seconds`, and the least
+recently used ones are evicted once the stored responses exceed `max_bytes`.
+Each entry remembers how long the original call took, so hits can report the
+latency they saved.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """TTL + size-bounded LRU cache of model responses stored in SQLite."""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                   model       TEXT NOT NULL,
+                   prompt_hash TEXT NOT NULL,
+                   response    TEXT NOT NULL,
+                   size        INTEGER NOT NULL,
+                   latency     REAL NOT NULL,
+                   created     REAL NOT NULL,
+                   last_used   REAL NOT NULL,
+                   PRIMARY KEY (model, prompt_hash)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """The cached response for `prompt`, or None if missing or expired."""
+        entry = self.lookup(model, prompt)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, model: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """`(response, latency of the original call)` for `prompt`, or None if missing or expired."""
+        key = prompt_hash(prompt)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency, created FROM responses WHERE model = ? AND prompt_hash = ?",
+                (model, key),
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE model = ? AND prompt_hash = ?",
+                                       (model, key))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE model = ? AND prompt_hash = ?",
+                               (now, model, key))
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[1]
+            return row[0], row[1]
+
+    def put(self, model: str, prompt: str, response: str, latency: float) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(model, prompt_hash, response, size, latency, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (model, prompt_hash(prompt), response, size, latency, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, model: str, prompt: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE model = ? AND prompt_hash = ?",
+                               (model, prompt_hash(prompt)))
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for rowid, size in self._conn.execute("SELECT rowid, size FROM responses ORDER BY last_used"):
+            victims.append((rowid,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE rowid = ?", victims)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "saved_seconds": round(self.saved_seconds, 2), "entries": len(self)}
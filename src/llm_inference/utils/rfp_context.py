@@ -0,0 +1,158 @@
+"""Retrieval-scoped RFP context for the evaluation agents.
+
+Instead of pasting the whole `embedding.json` into every prompt, each agent
+asks a handful of questions about the RFP ("which clauses carry risk?",
+"what is mandatory?") and only the best-matching chunks are packed into the
+prompt, up to the agent's token budget. Selected chunks are put back in
+document order and labelled with their page and section.
+
+Chunks come from the RAG corpus when the RFP's `source_file` has been
+ingested there with the current embedding backend; otherwise the RFP text is
+chunked and ranked in memory with the same chunker and embedder.
+
+Set `RFP_CONTEXT_MODE=full` to send the full RFP dump as before, e.g. to
+compare prompt size and latency between the two modes in the agent logs.
+"""
+import os
+import json
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from RAG.chunker import count_tokens, iter_structured_chunks
+from RAG.corpus import Corpus, CORPUS_MANIFEST
+from RAG.embeddings import get_embedder
+from RAG.retriever import LocalRetriever, top_k_indices
+from src.llm_inference.utils.workspace import SHARED_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# The RAG server files uploads here too (its STORAGE_PATH), so both read one corpus
+RAG_CORPUS_DIR = os.getenv("RAG_CORPUS_DIR", os.path.join(SHARED_DATA_DIR, "embeddings"))
+RFP_CONTEXT_MODE = os.getenv("RFP_CONTEXT_MODE", "retrieval")  # "retrieval" or "full"
+RFP_CONTEXT_TOP_K = int(os.getenv("RFP_CONTEXT_TOP_K", "8"))    # candidates per query
+
+
+class RfpContext(NamedTuple):
+    text: str          # what goes into the prompt
+    tokens: int        # approximate tokens of `text`
+    full_tokens: int   # approximate tokens of the full RFP dump it replaces
+    chunks: int        # chunks selected (0 when the full dump is used)
+    source: str        # "corpus", "local" or "full"
+
+
+@lru_cache(maxsize=1)
+def _embedder():
+    return get_embedder()
+
+
+@lru_cache(maxsize=1)
+def _corpus_retriever() -> Optional[LocalRetriever]:
+    if not os.path.exists(os.path.join(RAG_CORPUS_DIR, CORPUS_MANIFEST)):
+        return None
+    embedder = _embedder()
+    return LocalRetriever(Corpus(RAG_CORPUS_DIR), embedder.embed, embedder.model_id)
+
+
+def _corpus_candidates(source_file: str, queries: Sequence[str], top_k: int) -> List[Dict]:
+    retriever = _corpus_retriever()
+    if retriever is None or source_file not in retriever.corpus.documents():
+        return []
+    candidates = []
+    for query in queries:
+        candidates.extend(retriever.retrieve(query, top_k=top_k, source_files=[source_file]))
+    return candidates
+
+
+def _local_candidates(text: str, queries: Sequence[str], top_k: int) -> List[Dict]:
+    records = [{"text": chunk["page_content"], "metadata": chunk["metadata"]}
+               for chunk in iter_structured_chunks([(1, text)], "rfp")]
+    if not records:
+        return []
+    embedder = _embedder()
+    matrix = embedder.embed_batch([r["text"] for r in records])
+    query_matrix = embedder.embed_batch(list(queries))
+    candidates = []
+    for query_embed in query_matrix:
+        scores = matrix @ query_embed
+        for i in top_k_indices(scores, top_k):
+            candidates.append({**records[i], "score": float(scores[i])})
+    return candidates
+
+
+def _label(metadata: Dict, text: str) -> str:
+    page, page_end = metadata.get("page"), metadata.get("page_end")
+    parts = []
+    if page is not None and metadata.get("source") != "rfp":
+        parts.append(f"p. {page}" if page_end in (None, page) else f"pp. {page}-{page_end}")
+    # Chunks that open a section already start with its heading
+    if metadata.get("section") and not text.startswith(metadata["section"]):
+        parts.append(metadata["section"])
+    return f"[{' | '.join(parts)}]\n" if parts else ""
+
+
+def pack_chunks(candidates: List[Dict], token_budget: int) -> List[Dict]:
+    """Best-scoring distinct chunks that fit in `token_budget`, in document order."""
+    best: Dict[tuple, Dict] = {}
+    for record in candidates:
+        meta = record.get("metadata", {})
+        key = (meta.get("char_start"), meta.get("char_end"), record["text"][:64])
+        if key not in best or record.get("score", 0.0) > best[key].get("score", 0.0):
+            best[key] = record
+
+    selected, used = [], 0
+    for record in sorted(best.values(), key=lambda r: r.get("score", 0.0), reverse=True):
+        tokens = count_tokens(_label(record.get("metadata", {}), record["text"]) + record["text"])
+        if used + tokens > token_budget:
+            continue
+        selected.append(record)
+        used += tokens
+    selected.sort(key=lambda r: r.get("metadata", {}).get("char_start") or 0)
+    return selected
+
+
+def build_rfp_context(rfp_data: Dict, queries: Sequence[str], token_budget: int,
+                      agent: str) -> RfpContext:
+    """Select the parts of `rfp_data` (the parsed `embedding.json`) relevant to `queries`."""
+    full_dump = json.dumps(rfp_data, indent=2)
+    full_tokens = count_tokens(full_dump)
+    text = rfp_data.get("text", "") if isinstance(rfp_data, dict) else ""
+
+    if RFP_CONTEXT_MODE == "full" or not text:
+        return RfpContext(full_dump, full_tokens, full_tokens, 0, "full")
+    if count_tokens(text) <= token_budget:
+        # Short RFPs fit as they are; only the JSON wrapping is dropped
+        return RfpContext(text, count_tokens(text), full_tokens, 0, "local")
+
+    source = "corpus"
+    candidates = []
+    if rfp_data.get("source_file"):
+        candidates = _corpus_candidates(rfp_data["source_file"], queries, RFP_CONTEXT_TOP_K)
+    if not candidates:
+        source = "local"
+        candidates = _local_candidates(text, queries, RFP_CONTEXT_TOP_K)
+
+    selected = pack_chunks(candidates, token_budget)
+    context = "\n\n".join(_label(r.get("metadata", {}), r["text"]) + r["text"] for r in selected)
+    tokens = count_tokens(context)
+    logger.info(f"{agent}: selected {len(selected)} RFP chunks ({tokens} of {full_tokens} tokens, "
+                f"budget {token_budget}) from {source} retrieval")
+    return RfpContext(context, tokens, full_tokens, len(selected), source)
+
+
+async def select_rfp_context(rfp_data: Dict, queries: Sequence[str], token_budget: int,
+                             agent: str) -> RfpContext:
+    """`build_rfp_context` on a worker thread.
+
+    Chunking, embedding and ranking are CPU-bound, and the agents run on the
+    server's event loop, so the selection is kept off it.
+    """
+    return await asyncio.to_thread(build_rfp_context, rfp_data, queries, token_budget, agent)
+
+
+def log_prompt_stats(agent: str, prompt: str, context: RfpContext, llm_seconds: float) -> None:
+    """Log prompt size and LLM latency so the retrieval and full modes can be compared."""
+    logger.info(f"{agent}: prompt {len(prompt)} chars / ~{count_tokens(prompt)} tokens "
+                f"(RFP {context.tokens} of {context.full_tokens} tokens, mode={context.source}), "
+                f"LLM latency {llm_seconds:.2f}s")
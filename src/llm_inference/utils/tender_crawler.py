@@ -0,0 +1,277 @@
+"""Incremental, concurrent crawler for paginated tender listings.
+
+The crawler fetches the first listing page, discovers the other pages from
+its numeric pagination links, and then fetches them in waves of
+`concurrency` pages over one pooled `httpx.AsyncClient` (keep-alive
+connections, shared cookies). Every request carries the `ETag` /
+`Last-Modified` validators from the previous run, so unchanged pages come back
+as `304 Not Modified` and are not parsed at all.
+
+Parsed tenders are compared with a local SQLite store of seen `ref_no`s and
+content fingerprints: only new tenders, or tenders whose details changed (a
+corrigendum moving the due date, say), are returned for evaluation. Once a
+wave adds nothing new the crawl stops, since listings put the newest tenders
+first.
+
+Nothing is recorded during the crawl itself. Call `TenderStateStore.record`
+after the returned tenders have been evaluated, so a failed run is retried in
+full next time. Tenders the local pre-filter skipped go to
+`record_prefiltered` instead: the crawler does not return them again, but
+they are not seen either, and `prefiltered` hands them back for scoring once
+the pre-filter's settings change.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from html import unescape
+from urllib.parse import urljoin
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    raise ImportError("The 'httpx' module is not installed. Please install it using 'pip install httpx'.")
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
+
+TENDER_LIST_URL = os.getenv("TENDER_LIST_URL", "https://eprocure.gov.in/eprocure/app?action=latestActiveTenders")
+TENDER_STATE_PATH = os.getenv("TENDER_STATE_PATH", os.path.join(project_root, "data", "tender_state.sqlite3"))
+TENDER_MAX_PAGES = int(os.getenv("TENDER_MAX_PAGES", "20"))
+TENDER_CRAWL_CONCURRENCY = int(os.getenv("TENDER_CRAWL_CONCURRENCY", "4"))
+
+PAGE_LINK_RE = re.compile(r"""<a\s[^>]*?href\s*=\s*["']([^"']+)["'][^>]*>\s*(\d{1,4})\s*</a>""", re.IGNORECASE)
+
+
+def tender_fingerprint(tender: Dict) -> str:
+    fields = {k: v for k, v in tender.items() if k != "prefilter_score"}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def page_links(html: str, base_url: str) -> List[str]:
+    """Absolute URLs of the numbered pagination links (2, 3, ...) in page order."""
+    pages: Dict[int, str] = {}
+    for href, number in PAGE_LINK_RE.findall(html):
+        number = int(number)
+        if number > 1 and number not in pages:
+            pages[number] = urljoin(base_url, unescape(href))
+    return [pages[n] for n in sorted(pages)]
+
+
+class PageState(NamedTuple):
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    links: List[str]
+
+
+class CrawlResult(NamedTuple):
+    changed: List[Dict]          # new or updated tenders, listing order
+    seen: int                    # tenders parsed from the pages that were fetched
+    pages: List[PageState]       # validators to record once evaluation succeeds
+    fetched: int                 # pages downloaded with 200
+    not_modified: int            # pages answered 304
+    seconds: float
+
+
+# ===== State Store =====
+class TenderStateStore:
+    """Seen tenders and per-page HTTP validators, persisted in SQLite."""
+
+    def __init__(self, path: str = TENDER_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tenders (
+                   ref_no      TEXT PRIMARY KEY,
+                   fingerprint TEXT NOT NULL,
+                   data        TEXT NOT NULL,
+                   first_seen  REAL NOT NULL,
+                   last_seen   REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS prefiltered (
+                   ref_no      TEXT PRIMARY KEY,
+                   fingerprint TEXT NOT NULL,
+                   data        TEXT NOT NULL,
+                   settings    TEXT NOT NULL,
+                   score       REAL,
+                   recorded    REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                   url           TEXT PRIMARY KEY,
+                   etag          TEXT,
+                   last_modified TEXT,
+                   links         TEXT NOT NULL,
+                   fetched       REAL NOT NULL
+               )"""
+        )
+        self._conn.commit()
+
+    def page(self, url: str) -> Optional[PageState]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, links FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return PageState(url, row[0], row[1], json.loads(row[2])) if row else None
+
+    def changed(self, tenders: List[Dict]) -> List[Dict]:
+        """The tenders that are new or differ from what was last recorded, seen or pre-filtered."""
+        refs = [t["ref_no"] for t in tenders]
+        known: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(refs), 500):
+                batch = refs[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                # A tender is in one of the two tables, never both
+                known.update(self._conn.execute(
+                    f"SELECT ref_no, fingerprint FROM tenders WHERE ref_no IN ({placeholders}) UNION ALL "
+                    f"SELECT ref_no, fingerprint FROM prefiltered WHERE ref_no IN ({placeholders})", batch * 2
+                ).fetchall())
+        return [t for t in tenders if known.get(t["ref_no"]) != tender_fingerprint(t)]
+
+    def record(self, tenders: List[Dict], pages: List[PageState] = ()) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO tenders (ref_no, fingerprint, data, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(ref_no) DO UPDATE SET "
+                "fingerprint = excluded.fingerprint, data = excluded.data, last_seen = excluded.last_seen",
+                [(t["ref_no"], tender_fingerprint(t), json.dumps(t), now, now) for t in tenders],
+            )
+            self._conn.executemany("DELETE FROM prefiltered WHERE ref_no = ?", [(t["ref_no"],) for t in tenders])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, links, fetched) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(p.url, p.etag, p.last_modified, json.dumps(p.links), now) for p in pages],
+            )
+            self._conn.commit()
+
+    def record_prefiltered(self, tenders: List[Dict], settings: str) -> None:
+        """Keeps tenders the pre-filter skipped under `settings`, with their `prefilter_score`."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prefiltered (ref_no, fingerprint, data, settings, score, recorded) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(t["ref_no"], tender_fingerprint(t),
+                  json.dumps({k: v for k, v in t.items() if k != "prefilter_score"}),
+                  settings, t.get("prefilter_score"), now) for t in tenders],
+            )
+            self._conn.executemany("DELETE FROM tenders WHERE ref_no = ?", [(t["ref_no"],) for t in tenders])
+            self._conn.commit()
+
+    def prefiltered(self, current_settings: Optional[str] = None) -> List[Dict]:
+        """Pre-filtered tenders skipped under settings other than `current_settings`, oldest first.
+
+        With `current_settings=None` (the pre-filter is off) every pre-filtered tender is returned.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM prefiltered WHERE settings IS NOT ? ORDER BY recorded, ref_no",
+                (current_settings,),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tenders").fetchone()[0]
+
+
+# ===== Crawler =====
+class TenderCrawler:
+    """Walks the listing pages concurrently and returns new or changed tenders."""
+
+    def __init__(self, parse_page: Callable[[str], List[Dict]],
+                 store: Optional[TenderStateStore] = None,
+                 start_url: str = TENDER_LIST_URL,
+                 max_pages: int = TENDER_MAX_PAGES,
+                 concurrency: int = TENDER_CRAWL_CONCURRENCY,
+                 timeout: float = 30.0,
+                 stop_at_known: bool = True):
+        self.parse_page = parse_page
+        self.store = store if store is not None else TenderStateStore()
+        self.start_url = start_url
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.stop_at_known = stop_at_known
+
+    async def _fetch(self, client: "httpx.AsyncClient",
+                     url: str) -> Tuple[Optional[List[Dict]], PageState]:
+        """`(tenders, state)`; tenders is None when the page is unchanged (304)."""
+        previous = self.store.page(url)
+        headers = {}
+        if previous and previous.etag:
+            headers["If-None-Match"] = previous.etag
+        if previous and previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+
+        response = await client.get(url, headers=headers)
+        if response.status_code == 304 and previous:
+            return None, previous
+        response.raise_for_status()
+        html = response.text
+        # Parsing is CPU work; keep the event loop free for the other downloads
+        tenders = await asyncio.to_thread(self.parse_page, html)
+        state = PageState(url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                          page_links(html, str(response.url)))
+        return tenders, state
+
+    async def crawl(self) -> CrawlResult:
+        started = time.perf_counter()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        pages: List[PageState] = []
+        changed: List[Dict] = []
+        changed_refs = set()
+        seen = fetched = not_modified = 0
+
+        def absorb(tenders: Optional[List[Dict]], state: PageState) -> int:
+            nonlocal seen, fetched, not_modified
+            pages.append(state)
+            if tenders is None:
+                not_modified += 1
+                return 0
+            fetched += 1
+            seen += len(tenders)
+            fresh = [t for t in self.store.changed(tenders) if t["ref_no"] not in changed_refs]
+            changed_refs.update(t["ref_no"] for t in fresh)
+            changed.extend(fresh)
+            return len(fresh)
+
+        async with httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True,
+                                     headers={"User-Agent": "Mozilla/5.0"}) as client:
+            first = await self._fetch(client, self.start_url)
+            absorb(*first)
+            remaining = first[1].links[:max(0, self.max_pages - 1)]
+
+            for start in range(0, len(remaining), self.concurrency):
+                wave = remaining[start:start + self.concurrency]
+                results = await asyncio.gather(*(self._fetch(client, url) for url in wave),
+                                               return_exceptions=True)
+                added = 0
+                for url, result in zip(wave, results):
+                    if isinstance(result, Exception):
+                        logger.warning(f"Failed to fetch {url}: {result}")
+                        continue
+                    added += absorb(*result)
+                if self.stop_at_known and added == 0:
+                    break
+
+        result = CrawlResult(changed, seen, pages, fetched, not_modified, time.perf_counter() - started)
+        logger.info(f"Crawled {fetched + not_modified} page(s) ({fetched} fetched, {not_modified} not modified) "
+                    f"in {result.seconds:.2f}s: {len(changed)} new or changed of {seen} tenders parsed")
+        return result
@@ -0,0 +1,151 @@
+"""Local relevance pre-filter for scraped tenders.
+
+Before any tender reaches the LLM scorer, its title is compared with short
+profile phrases built from `companydata.json` alone: services, industries,
+past contracts, and the official titles of the company's NAICS codes, plus
+any phrases an operator adds in `TENDER_FILTER_KEYWORDS`. A tender's score is
+its best cosine similarity to any phrase. Tenders at or above the threshold,
+plus the top fraction of the listing, are kept; the rest are skipped without
+an LLM call. The organisation is not scored: "Ministry of Labour" says
+nothing about what a tender buys.
+
+`TENDER_FILTER_BACKEND` picks how titles and phrases become vectors:
+
+- `tfidf`  stemmed word unigrams and bigrams weighted by IDF over the titles
+           being scored and the phrases (default; no model files)
+- any `RAG.embeddings` backend name, e.g. `sentence-transformers` with
+  `EMBEDDING_MODEL_PATH`, for semantic matching
+
+With `tfidf`, a tender only scores if its title shares words with the profile,
+and buyers rarely use the company's wording ("Hiring of Computer Operators"),
+so the filter misses relevant tenders. It is therefore off unless
+`TENDER_FILTER_ENABLED=1`. Skipped tenders are not settled: the crawler's
+state store keeps them apart, tagged with `TenderPrefilter.settings_id`, and
+offers them again once the backend, phrases or cut-offs change. Measure recall
+with `benchmarks/bench_tender_prefilter.py` against verdicts recorded from the
+LLM before turning it on.
+"""
+import os
+import math
+import json
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+import numpy as np
+
+from RAG.embeddings import TOKEN_PATTERN, STOP_WORDS, get_embedder
+
+logger = logging.getLogger(__name__)
+
+TENDER_FILTER_ENABLED = os.getenv("TENDER_FILTER_ENABLED", "0") == "1"
+TENDER_FILTER_BACKEND = os.getenv("TENDER_FILTER_BACKEND", "tfidf")
+TENDER_FILTER_THRESHOLD = float(os.getenv("TENDER_FILTER_THRESHOLD", "0.1"))
+TENDER_FILTER_TOP_FRACTION = float(os.getenv("TENDER_FILTER_TOP_FRACTION", "0.1"))
+# Extra comma-separated phrases, e.g. "data entry operators,housekeeping"
+TENDER_FILTER_KEYWORDS = os.getenv("TENDER_FILTER_KEYWORDS", "")
+
+# Official NAICS titles of the codes a staffing or HR consulting firm lists
+NAICS_TITLES = {
+    "561311": "Employment Placement Agencies",
+    "561312": "Executive Search Services",
+    "561320": "Temporary Help Services",
+    "561330": "Professional Employer Organizations",
+    "541611": "Administrative Management and General Management Consulting Services",
+    "541612": "Human Resources Consulting Services",
+}
+
+
+def profile_phrases(company_data: Dict) -> List[str]:
+    """Short phrases describing what the company sells."""
+    phrases: List[str] = []
+    capabilities = company_data.get("capabilities", {})
+    phrases.extend(capabilities.get("services", []))
+    phrases.extend(f"{industry} staffing" for industry in capabilities.get("industries", []))
+    for contract in company_data.get("experience", {}).get("pastPerformance", []):
+        if contract.get("contract"):
+            phrases.append(contract["contract"])
+    for code in company_data.get("companyProfile", {}).get("naicsCodes", []):
+        if str(code) in NAICS_TITLES:
+            phrases.append(NAICS_TITLES[str(code)])
+    phrases.extend(p.strip() for p in TENDER_FILTER_KEYWORDS.split(",") if p.strip())
+    return list(dict.fromkeys(p.lower() for p in phrases))
+
+
+def _stem(word: str) -> str:
+    # Just enough for plurals: "agencies" -> "agency", "services" -> "service"
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def terms(text: str) -> FrozenSet[str]:
+    """Stemmed word unigrams plus adjacent-word bigrams, minus stop words."""
+    words = [_stem(w) for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+    return frozenset(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+
+def tfidf_similarity(texts: Sequence[str], phrases: Sequence[str]) -> np.ndarray:
+    """`(len(texts), len(phrases))` cosine similarities of binary-tf, smoothed-IDF vectors.
+
+    IDF is fitted on `texts` and `phrases` together, so words every title in a
+    listing shares ("supply", "services") weigh little.
+    """
+    docs = [terms(t) for t in texts] + [terms(p) for p in phrases]
+    df = Counter(term for doc in docs for term in doc)
+    vocabulary = {term: i for i, term in enumerate(df)}
+    idf = np.log((1 + len(docs)) / (1 + np.array(list(df.values()), dtype=np.float32))) + 1
+
+    matrix = np.zeros((len(docs), len(vocabulary)), dtype=np.float32)
+    for row, doc in enumerate(docs):
+        columns = [vocabulary[term] for term in doc]
+        matrix[row, columns] = idf[columns]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix[:len(texts)] @ matrix[len(texts):].T
+
+
+class TenderPrefilter:
+    """Scores tender titles by their similarity to the company profile phrases."""
+
+    def __init__(self, company_data: Dict, threshold: float = TENDER_FILTER_THRESHOLD,
+                 top_fraction: float = TENDER_FILTER_TOP_FRACTION, backend: str = TENDER_FILTER_BACKEND):
+        self.threshold = threshold
+        self.top_fraction = top_fraction
+        self.backend = backend
+        self.phrases = profile_phrases(company_data)
+        self.embedder = None if backend == "tfidf" else get_embedder(backend)
+        self._phrase_matrix = self.embedder.embed_batch(self.phrases) if self.embedder else None
+
+    @property
+    def settings_id(self) -> str:
+        """Identifies the scoring setup; skipped tenders are re-scored when it changes."""
+        settings = {"backend": self.embedder.model_id if self.embedder else self.backend,
+                    "phrases": self.phrases, "threshold": self.threshold, "top_fraction": self.top_fraction}
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def scores(self, tenders: Sequence[Dict]) -> np.ndarray:
+        if not tenders or not self.phrases:
+            return np.zeros(len(tenders), dtype=np.float32)
+        titles = [t.get("title", "") for t in tenders]
+        if self.embedder is None:
+            return tfidf_similarity(titles, self.phrases).max(axis=1)
+        return (self.embedder.embed_batch(titles) @ self._phrase_matrix.T).max(axis=1)
+
+    def split(self, tenders: Sequence[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """`(kept, skipped)`, each in the original order; both carry `prefilter_score`."""
+        scores = self.scores(tenders)
+        keep = scores >= self.threshold
+        top_n = math.ceil(self.top_fraction * len(tenders))
+        if top_n:
+            keep[np.argsort(-scores, kind="stable")[:top_n]] = True
+
+        kept, skipped = [], []
+        for tender, score, wanted in zip(tenders, scores.tolist(), keep.tolist()):
+            (kept if wanted else skipped).append({**tender, "prefilter_score": round(score, 3)})
+        logger.info(f"Pre-filter kept {len(kept)} of {len(tenders)} tenders; "
+                    f"skipped {len(skipped)} LLM evaluations")
+        return kept, skipped
@@ -0,0 +1,132 @@
+"""Relevance results and watch-cycle metrics for the tender watcher.
+
+Every evaluated tender is stored once, keyed by `ref_no`, with a sequence
+number that grows with each insert or re-evaluation. The UI reads results as a
+paginated feed, newest first, and polls with `since=<cursor>` to fetch only
+what was added after its last fetch, so nothing is re-rendered when a cycle
+finds nothing new. Each watch cycle appends one row of metrics: pages fetched,
+tenders parsed, new, evaluated, relevant and the time each phase took.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from src.llm_inference.utils.tender_crawler import TENDER_STATE_PATH
+
+FEED_PAGE_SIZE = int(os.getenv("TENDER_FEED_PAGE_SIZE", "50"))
+FEED_MAX_PAGE_SIZE = 200
+
+CYCLE_FIELDS = ("started", "pages_fetched", "pages_not_modified", "tenders_parsed", "tenders_new",
+                "evaluated", "skipped", "relevant", "errors", "crawl_seconds", "eval_seconds", "seconds",
+                "error")
+
+
+def column_type(field: str) -> str:
+    if field == "error":
+        return "TEXT"
+    return "REAL" if field == "started" or field.endswith("seconds") else "INTEGER"
+
+
+class TenderResultsStore:
+    """Tender verdicts and per-cycle metrics, persisted in SQLite."""
+
+    def __init__(self, path: str = TENDER_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                   seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+                   ref_no          TEXT NOT NULL UNIQUE,
+                   tender          TEXT NOT NULL,
+                   is_relevant     INTEGER NOT NULL,
+                   score           REAL,
+                   reason          TEXT,
+                   recommendations TEXT NOT NULL,
+                   prefilter_score REAL,
+                   evaluated_at    REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_relevant ON results (is_relevant, seq)")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS cycles (
+                   id INTEGER PRIMARY KEY AUTOINCREMENT,
+                   {", ".join(f"{field} {column_type(field)}" for field in CYCLE_FIELDS)}
+               )"""
+        )
+        self._conn.commit()
+
+    def save(self, results: List[Dict]) -> int:
+        """Stores scored results (as returned by `score_tenders`); returns how many were saved."""
+        now = time.time()
+        rows = []
+        for result in results:
+            if "error" in result:
+                continue
+            tender = {k: v for k, v in result["tender"].items() if k != "prefilter_score"}
+            rows.append((tender["ref_no"], json.dumps(tender), int(bool(result.get("is_relevant", False))),
+                         result.get("score"), result.get("reason"),
+                         json.dumps(result.get("recommendations", [])),
+                         result["tender"].get("prefilter_score"), now))
+        with self._lock:
+            # Re-evaluated tenders get a new seq so the feed shows them as updates
+            self._conn.executemany("DELETE FROM results WHERE ref_no = ?", [(row[0],) for row in rows])
+            self._conn.executemany(
+                "INSERT INTO results (ref_no, tender, is_relevant, score, reason, recommendations, "
+                "prefilter_score, evaluated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _items(self, clause: str, params: List, limit: int = -1, offset: int = 0) -> List[Dict]:
+        rows = self._conn.execute(
+            f"SELECT seq, tender, is_relevant, score, reason, recommendations, prefilter_score, "
+            f"evaluated_at FROM results {clause} ORDER BY seq DESC LIMIT ? OFFSET ?",
+            list(params) + [limit, offset],
+        ).fetchall()
+        return [{"seq": seq, **json.loads(tender), "is_relevant": bool(is_relevant), "score": score,
+                 "reason": reason, "recommendations": json.loads(recommendations),
+                 "prefilter_score": prefilter_score, "evaluated_at": evaluated_at}
+                for seq, tender, is_relevant, score, reason, recommendations, prefilter_score, evaluated_at
+                in rows]
+
+    def feed(self, page: int = 1, page_size: int = FEED_PAGE_SIZE, since: Optional[int] = None,
+             relevant_only: bool = True) -> Dict:
+        """One page of results, newest first; with `since`, only results added after that cursor."""
+        page = max(1, page)
+        page_size = min(max(1, page_size), FEED_MAX_PAGE_SIZE)
+        where, params = [], []
+        if relevant_only:
+            where.append("is_relevant = 1")
+        if since is not None:
+            where.append("seq > ?")
+            params.append(since)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            (total,) = self._conn.execute(f"SELECT COUNT(*) FROM results {clause}", params).fetchone()
+            (cursor,) = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM results").fetchone()
+            items = self._items(clause, params, page_size, (page - 1) * page_size)
+        return {"items": items, "page": page, "page_size": page_size, "total": total,
+                "pages": (total + page_size - 1) // page_size, "cursor": cursor}
+
+    def record_cycle(self, metrics: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO cycles ({', '.join(CYCLE_FIELDS)}) VALUES ({', '.join('?' * len(CYCLE_FIELDS))})",
+                [metrics.get(field) for field in CYCLE_FIELDS],
+            )
+            self._conn.commit()
+
+    def cycles(self, limit: int = 50) -> List[Dict]:
+        """The most recent cycles' metrics, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(CYCLE_FIELDS)} FROM cycles ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(zip(("id",) + CYCLE_FIELDS, row)) for row in rows]
@@ -0,0 +1,254 @@
+"""Streaming parser for the tender listing table.
+
+`BeautifulSoup(html, "html.parser")` builds a tree of every element on the
+page before `find_real_tender_table` looks at a single table. This parser
+drives the same stdlib `html.parser` tokenizer but only keeps what the
+detection and row extraction read: the tables, their descendant rows, the
+rows' descendant cells, and the stripped strings under each. Everything else
+is tracked on the open-element stack by name only, so that end tags close
+elements exactly the way BeautifulSoup's tree builder closes them.
+
+Tables are judged in document order on the text of their first two rows,
+matching `find_real_tender_table`. Tokenizing stops as soon as the detected
+table is closed, so the page's footer, and any tables after the listing, are
+never looked at.
+"""
+import re
+import logging
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from bs4.dammit import EntitySubstitution, UnicodeDammit
+
+logger = logging.getLogger(__name__)
+
+# Elements BeautifulSoup closes as soon as they open
+VOID_ELEMENTS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer",
+])
+# Their strings are Script / Stylesheet / TemplateString / Ruby*, which get_text() skips
+SKIPPED_TEXT_ELEMENTS = frozenset(["script", "style", "template", "rt", "rp"])
+
+# BeautifulSoup resolves character references itself rather than letting
+# html.parser do it; these mirror its handling of malformed numeric ones
+DECIMAL_REFERENCE = re.compile(r"^([0-9]+)(.*)")
+HEX_REFERENCE = re.compile(r"^([0-9a-f]+)(.*)")
+
+
+def is_tender_header(text: str) -> bool:
+    """Whether a row's lower-cased text looks like the tender listing's header."""
+    return (
+        "tender title" in text
+        and "organisation" in text
+        and ("closing date" in text or "due date" in text)
+    )
+
+
+class _TableClosed(Exception):
+    """Raised from a handler to stop tokenizing once the tender table is complete."""
+
+
+class _Node:
+    __slots__ = ("name", "strings", "children", "index", "verdict")
+
+    def __init__(self, name: str, index: int = -1):
+        self.name = name
+        self.strings: List[str] = []    # stripped, non-empty descendant strings
+        self.children: List["_Node"] = []  # tables: descendant rows; rows: descendant cells
+        self.index = index
+        self.verdict: Optional[bool] = None
+
+
+class TenderTableParser(HTMLParser):
+    """Finds the first table whose first two rows read like the tender header."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._stack: List[tuple] = []     # (tag name, _Node or None)
+        self._closed_void: List[str] = []  # void tags whose explicit end tag is still to be ignored
+        self._text: List[str] = []
+        self._skip_text = 0
+        self._tables: List[_Node] = []
+        self._undecided = 0               # first table in document order without a verdict
+        self.table: Optional[_Node] = None
+
+    # ----- tree building -----
+    def _flush(self) -> None:
+        if not self._text:
+            return
+        text = "".join(self._text).strip()
+        self._text = []
+        if text and not self._skip_text:
+            self._add_string(text)
+
+    def _add_string(self, text: str) -> None:
+        for _, node in self._stack:
+            if node is not None and node.name != "table":
+                node.strings.append(text)
+
+    def handle_starttag(self, tag, attrs, void_end: bool = True):
+        self._flush()
+        node = None
+        if tag == "table":
+            node = _Node(tag, len(self._tables))
+            self._tables.append(node)
+        elif tag == "tr":
+            node = _Node(tag)
+            for _, parent in self._stack:
+                if parent is not None and parent.name == "table":
+                    parent.children.append(node)
+        elif tag == "td":
+            node = _Node(tag)
+            for _, parent in self._stack:
+                if parent is not None and parent.name == "tr":
+                    parent.children.append(node)
+        if tag in SKIPPED_TEXT_ELEMENTS:
+            self._skip_text += 1
+        self._stack.append((tag, node))
+        if tag in VOID_ELEMENTS and void_end:
+            self._close(tag)
+            self._closed_void.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, void_end=False)
+        self._close(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._close(tag)
+
+    def _close(self, tag: str) -> None:
+        self._flush()
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth][0] == tag:
+                break
+        else:
+            return  # stray end tag, ignored like BeautifulSoup does
+        while len(self._stack) > depth:
+            self._pop()
+
+    def handle_data(self, data):
+        self._text.append(data)
+
+    def handle_entityref(self, name):
+        character = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def handle_charref(self, name):
+        base, pattern = (16, HEX_REFERENCE) if name[:1] in ("x", "X") else (10, DECIMAL_REFERENCE)
+        digits = name[1:] if base == 16 else name
+        extra = ""
+        try:
+            number = int(digits, base)
+        except ValueError:
+            match = pattern.search(digits)
+            if match is None:
+                self.handle_data(digits)
+                return
+            number, extra = int(match.group(1), base), match.group(2)
+        self.handle_data(UnicodeDammit.numeric_character_reference(number)[0])
+        if extra:
+            self.handle_data(extra)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        # CDATA sections are their own strings and, unlike comments, count as text
+        self._flush()
+        if data.upper().startswith("CDATA["):
+            text = data[len("CDATA["):].strip()
+            if text:
+                self._add_string(text)
+
+    def _pop(self) -> None:
+        tag, node = self._stack.pop()
+        if tag in SKIPPED_TEXT_ELEMENTS:
+            self._skip_text -= 1
+        if node is None:
+            return
+        if node.name == "tr":
+            self._judge()
+        elif node.name == "table":
+            if node.verdict is None:
+                node.verdict = self._header_matches(node)
+                self._judge()
+            if node is self.table:
+                raise _TableClosed
+
+    # ----- detection -----
+    @staticmethod
+    def _header_matches(table: _Node) -> bool:
+        return any(is_tender_header(" ".join(row.strings).lower()) for row in table.children[:2])
+
+    def _row_complete(self, row: _Node) -> bool:
+        return all(node is not row for _, node in self._stack)
+
+    def _judge(self) -> None:
+        """Settles verdicts in document order once a table's first two rows are closed."""
+        while self.table is None and self._undecided < len(self._tables):
+            table = self._tables[self._undecided]
+            if table.verdict is None:
+                head = table.children[:2]
+                if len(head) < 2 or not all(self._row_complete(row) for row in head):
+                    # A closed first row can already decide it; otherwise wait
+                    if head and self._row_complete(head[0]) and self._header_matches(table):
+                        table.verdict = True
+                    else:
+                        return
+                else:
+                    table.verdict = self._header_matches(table)
+            if table.verdict:
+                self.table = table
+                if all(node is not table for _, node in self._stack):
+                    raise _TableClosed
+                return
+            self._undecided += 1
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self._stack:
+            self._pop()
+        self._judge()
+
+
+def parse_tender_rows(html: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+    """Tender rows of the listing table, or None when no table looks like one."""
+    parser = TenderTableParser()
+    try:
+        # One feed, as BeautifulSoup does: html.parser's handling of some
+        # malformed markup depends on where the input is split
+        parser.feed(html)
+        parser.close()
+    except _TableClosed:
+        pass
+
+    table = parser.table
+    if table is None:
+        return None
+    logger.info(f"Detected Tender Table #{table.index}")
+
+    tenders = []
+    for row in table.children[1:]:
+        cols = row.children
+        if len(cols) >= 6:
+            tenders.append({
+                "organization": "".join(cols[0].strings),
+                "title": "".join(cols[1].strings),
+                "ref_no": "".join(cols[2].strings),
+                "due_date": "".join(cols[5].strings),
+            })
+            if limit is not None and len(tenders) >= limit:
+                break
+    return tenders
@@ -0,0 +1,101 @@
+"""Per-job workspaces, so concurrent uploads never share a file.
+
+Every upload job gets a directory under `JOB_WORKSPACE_DIR` named after its
+job id. The job's extracted RFP text (`embedding.json`) and each agent's
+output (`eligibility_output.json`, ..., `checklist_output.json`) live there,
+and the job's chunks are filed in the shared corpus under a key that carries
+the job id, so two uploads of the same file name do not replace each other.
+The job's document stays in the corpus for as long as its workspace is kept.
+
+Code run without a workspace (the agents' command lines, the legacy `/data`
+endpoint) keeps reading and writing the shared files under `data/`, or under
+`DATA_DIR` when it is set; the RAG corpus and the job workspaces default to
+directories inside it.
+"""
+import os
+import re
+import shutil
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
+
+# ===== Configuration =====
+SHARED_DATA_DIR = os.getenv("DATA_DIR", os.path.join(project_root, "data"))
+JOB_WORKSPACE_DIR = os.getenv("JOB_WORKSPACE_DIR", os.path.join(SHARED_DATA_DIR, "jobs"))
+JOB_WORKSPACE_KEEP = int(os.getenv("JOB_WORKSPACE_KEEP", "200"))  # finished workspaces kept on disk
+
+RFP_FILE = "embedding.json"
+JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Workspace:
+    """The directory holding one job's RFP text and agent outputs."""
+
+    def __init__(self, root: str, job_id: Optional[str] = None):
+        self.root = root
+        self.job_id = job_id
+
+    @classmethod
+    def for_job(cls, job_id: str, base: Optional[str] = None) -> "Workspace":
+        # Job ids come from URLs, so never let one escape the workspace directory
+        if not JOB_ID_RE.match(job_id or ""):
+            raise ValueError(f"Invalid job id: {job_id!r}")
+        return cls(os.path.join(base or JOB_WORKSPACE_DIR, job_id), job_id)
+
+    @classmethod
+    def shared(cls) -> "Workspace":
+        """The pre-job layout: every run reads and writes the same files under `data/`."""
+        return cls(SHARED_DATA_DIR)
+
+    def create(self) -> "Workspace":
+        os.makedirs(self.root, exist_ok=True)
+        return self
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.root)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @property
+    def rfp_path(self) -> str:
+        return self.path(RFP_FILE)
+
+    def document_key(self, filename: str) -> str:
+        """The corpus `source_file` for `filename` uploaded in this workspace."""
+        return f"{self.job_id}:{filename}" if self.job_id else filename
+
+    def __repr__(self) -> str:
+        return f"Workspace({self.root!r})"
+
+
+def prune_workspaces(keep: int = JOB_WORKSPACE_KEEP, base: Optional[str] = None,
+                     on_remove: Optional[Callable[[Workspace], None]] = None) -> int:
+    """Removes all but the `keep` most recently modified job workspaces; returns how many went.
+
+    `on_remove` is called with each workspace before it is deleted, e.g. to
+    drop the job's document from the corpus; if it fails, the workspace is
+    kept and the next prune retries it.
+    """
+    base = base or JOB_WORKSPACE_DIR
+    try:
+        entries = [entry for entry in os.scandir(base) if entry.is_dir()]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = 0
+    for entry in entries[max(0, keep):]:
+        if on_remove is not None:
+            try:
+                on_remove(Workspace(entry.path, entry.name))
+            except Exception as e:
+                logger.warning(f"Keeping job workspace {entry.path}: {e}")
+                continue
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed += 1
+    if removed:
+        logger.info(f"Removed {removed} old job workspaces from {base}")
+    return removed